@@ -7,10 +7,18 @@ db = SQLAlchemy()
 migrate = Migrate()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object('config.Config')
+    # Override konfigurasi (mis. untuk benchmark dengan database sementara)
+    if config:
+        app.config.update(config)
+
+    from app.utils import sqlite_mode
+    sqlite_mode.configure(app)
     db.init_app(app)
+    sqlite_mode.init_app(app)
+    app.cli.add_command(sqlite_mode.sqlite_cli)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
@@ -28,9 +36,50 @@ def create_app():
     from app.routes.guru import guru_bp
     app.register_blueprint(guru_bp)
 
-    from app.models import User
+    from app.utils import karir
+    karir.init_app(app)
+
+    from app.utils import assets
+    assets.init_app(app)
+    app.cli.add_command(assets.assets_cli)
+
+    from app.utils import http_cache
+    http_cache.init_app(app)
+
+    from app.utils.model_registry import model_cli
+    app.cli.add_command(model_cli)
+
+    from app.utils.rekom_log import rekom_cli
+    from app.utils import penjelasan  # noqa: F401 (mendaftarkan `flask rekomendasi jelaskan`)
+    app.cli.add_command(rekom_cli)
+
+    from app.utils.riasec_scoring import riasec_cli
+    app.cli.add_command(riasec_cli)
+
+    from app.utils.ringkasan import summary_cli
+    app.cli.add_command(summary_cli)
+
+    from app.utils.ekspor import ekspor_cli
+    app.cli.add_command(ekspor_cli)
+
+    from app.utils.impor import impor_cli
+    app.cli.add_command(impor_cli)
+
+    from app.utils.passwords import password_cli
+    app.cli.add_command(password_cli)
+
+    from app.utils import identity
+    app.cli.add_command(identity.student_cli)
+
+    from app.utils.mirip import mirip_cli
+    app.cli.add_command(mirip_cli)
+
+    from app.utils.arsip import arsip_cli
+    app.cli.add_command(arsip_cli)
+
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Snapshot ter-cache (lihat app/utils/identity.py), bukan baris ORM
+        return identity.load(int(user_id))
 
     return app
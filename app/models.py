@@ -1,4 +1,5 @@
 from app import db
+from app.utils import kohort
 from flask_login import UserMixin
 
 class User(UserMixin, db.Model):
@@ -15,12 +16,18 @@ class User(UserMixin, db.Model):
 
 class Student(db.Model):
     __tablename__ = "students"
+    # Satu baris student per user (lihat identity.ensure_student)
+    __table_args__ = (
+        db.UniqueConstraint('id_user', name='uq_students_id_user'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     id_user = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     nisn = db.Column(db.String(20), nullable=True)   # <--- tambahkan ini
     nama = db.Column(db.String(100), nullable=False)
     kelas = db.Column(db.String(50), nullable=True)  # <--- tambahkan ini
-    user = db.relationship("User", backref="student", uselist=False)
+    # Kohort, mis. '2025/2026'; kohort yang sudah lulus dipindah ke arsip (app/utils/arsip.py)
+    tahun_ajaran = db.Column(db.String(9), nullable=False, default=kohort.aktif, index=True)
+    user = db.relationship("User", backref=db.backref("student", uselist=False))
 
 class RiasecQuestion(db.Model):
     __tablename__ = "riasec_questions"
@@ -49,6 +56,8 @@ class RiasecResult(db.Model):
     skor_E = db.Column(db.Integer, default=0, nullable=False)
     skor_C = db.Column(db.Integer, default=0, nullable=False)
     top3 = db.Column(db.String(3), nullable=True)
+    # Skor hasil mode adaptif adalah estimasi tes penuh (lihat app/utils/tes_adaptif.py)
+    adaptif = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     student = db.relationship("Student", backref="riasec_result")
 
@@ -64,12 +73,123 @@ class ReportScore(db.Model):
     sosiologi = db.Column(db.Integer)
 
 class Recommendation(db.Model):
+    """Rekomendasi terkini per siswa. Riwayat lengkap ada di RecommendationLog."""
     __tablename__ = 'recommendations'
     id = db.Column(db.Integer, primary_key=True)
+    id_student = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
+    paket_prediksi = db.Column(db.String(50), nullable=False)
+    probabilitas = db.Column(db.Float, nullable=True)
+    model_version = db.Column(db.String(50), nullable=True)
+    input_key = db.Column(db.String(16), nullable=True)  # hash input saat dihitung (penjelasan.input_key)
+    proba = db.Column(db.Text, nullable=True)  # JSON {label: probabilitas} semua paket
+    created_at = db.Column(db.DateTime, default=db.func.now())
+
+    student = db.relationship("Student", backref="recommendations")
+
+class RecommendationExplanation(db.Model):
+    """
+    Kontribusi 12 fitur terhadap paket hasil prediksi, dihitung batch oleh
+    `flask rekomendasi jelaskan` (lihat app/utils/penjelasan.py). Hanya
+    ditampilkan jika model dan input siswa masih sama dengan saat dihitung.
+    """
+    __tablename__ = 'recommendation_explanations'
+    id = db.Column(db.Integer, primary_key=True)
+    id_student = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, unique=True)
+    model_version = db.Column(db.String(50), nullable=False)
+    input_key = db.Column(db.String(16), nullable=False)  # hash pendek 12 nilai input
+    paket = db.Column(db.String(50), nullable=False)
+    kontribusi = db.Column(db.Text, nullable=False)  # JSON list 12 angka, urutan fitur model
+    created_at = db.Column(db.DateTime, default=db.func.now())
+
+class RecommendationLog(db.Model):
+    """Log append-only setiap prediksi (tidak pernah di-update)."""
+    __tablename__ = 'recommendation_logs'
+    __table_args__ = (
+        db.Index('ix_recommendation_logs_student_time', 'id_student', 'created_at'),
+    )
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
     id_student = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    model_version = db.Column(db.String(50), nullable=True)
     paket_prediksi = db.Column(db.String(50), nullable=False)
     probabilitas = db.Column(db.Float, nullable=True)
-    # Optional: waktu pembuatan (jika ingin tracking)
-    # created_at = db.Column(db.DateTime, default=db.func.now())
+    fitur = db.Column(db.Text, nullable=False)  # JSON list 12 fitur input model
+    proba = db.Column(db.Text, nullable=True)  # JSON {"Paket 1": p, ...}
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
 
-    student = db.relationship("Student", backref="recommendations")
\ No newline at end of file
+class ModelVersion(db.Model):
+    __tablename__ = 'model_versions'
+    id = db.Column(db.Integer, primary_key=True)
+    nama = db.Column(db.String(50), unique=True, nullable=False)
+    algoritma = db.Column(db.String(20), nullable=True)  # 'xgb', 'rf', dst
+    path = db.Column(db.String(255), nullable=False)  # nama file di direktori registry
+    sha256 = db.Column(db.String(64), nullable=False)
+    # 'active' = melayani siswa, 'shadow' = dievaluasi diam-diam, 'standby', 'retired'
+    status = db.Column(db.String(20), nullable=False, default='standby')
+    # Porsi trafik (0-100) untuk A/B serving; hanya berlaku untuk versi non-active
+    traffic_pct = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=db.func.now())
+
+class ShadowEvaluation(db.Model):
+    __tablename__ = 'shadow_evaluations'
+    id = db.Column(db.Integer, primary_key=True)
+    id_student = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=True)
+    versi_serving = db.Column(db.String(50), nullable=False)
+    versi_shadow = db.Column(db.String(50), nullable=False)
+    paket_serving = db.Column(db.String(50), nullable=False)
+    paket_shadow = db.Column(db.String(50), nullable=False)
+    setuju = db.Column(db.Boolean, nullable=False)
+    latency_serving_ms = db.Column(db.Float, nullable=True)
+    latency_shadow_ms = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.now(), index=True)
+
+class StudentSummary(db.Model):
+    """
+    Ringkasan denormalisasi satu baris per user siswa untuk daftar, filter,
+    dan ekspor. Diperbarui di jalur tulis (lihat app/utils/ringkasan.py) dan
+    bisa dibangun ulang dengan `flask summary rebuild`.
+    """
+    __tablename__ = 'student_summary'
+    __table_args__ = (
+        db.Index('ix_student_summary_kelas_nama', 'kelas', 'nama'),
+    )
+    id_user = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    id_student = db.Column(db.Integer, nullable=True, index=True)
+    username = db.Column(db.String(100), nullable=False)
+    # Identitas gabungan: nilai di users diutamakan, fallback ke students
+    nama = db.Column(db.String(150), nullable=False, index=True)
+    nisn = db.Column(db.String(20), nullable=True, index=True)
+    kelas = db.Column(db.String(50), nullable=True)
+    top3 = db.Column(db.String(3), nullable=True, index=True)
+    skor_R = db.Column(db.Integer, nullable=True)
+    skor_I = db.Column(db.Integer, nullable=True)
+    skor_A = db.Column(db.Integer, nullable=True)
+    skor_S = db.Column(db.Integer, nullable=True)
+    skor_E = db.Column(db.Integer, nullable=True)
+    skor_C = db.Column(db.Integer, nullable=True)
+    has_rapor = db.Column(db.Boolean, nullable=False, default=False)
+    paket = db.Column(db.String(50), nullable=True, index=True)
+    probabilitas = db.Column(db.Float, nullable=True)
+    model_version = db.Column(db.String(50), nullable=True)
+    rekom_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+class ImportJob(db.Model):
+    """
+    Job import data siswa dari file unggahan. `rows_done` adalah checkpoint:
+    jumlah baris data yang sudah diproses dan di-commit, sehingga job yang
+    terhenti bisa dilanjutkan (lihat app/utils/impor.py).
+    """
+    __tablename__ = 'import_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    file_hash = db.Column(db.String(64), nullable=False, index=True)  # sha256 isi file
+    file_path = db.Column(db.String(500), nullable=False)
+    # 'menunggu', 'berjalan', 'gagal', 'selesai'
+    status = db.Column(db.String(20), nullable=False, default='menunggu')
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    success_count = db.Column(db.Integer, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.now())
+    updated_at = db.Column(db.DateTime, default=db.func.now())
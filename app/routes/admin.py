@@ -1,11 +1,12 @@
-from flask import Blueprint, render_template, redirect, url_for, send_file, request, flash, jsonify
+from flask import Blueprint, Response, render_template, redirect, url_for, send_file, request, flash, jsonify
 from flask_login import login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
 from app import db
-from app.models import User, Student, RiasecResult, Recommendation
-from sqlalchemy import func
+from app.models import User, StudentSummary, ImportJob
+from app.utils import akun_massal, analitik, ekspor, identity, impor, karir, passwords, ringkasan
 import io
 import csv
+import json
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -19,93 +20,40 @@ def dashboard_admin():
     page = request.args.get('page', 1, type=int)
     per_page = 10
     
-    filter_riasec = request.args.get('riasec', '')
-    filter_kelas = request.args.get('kelas', '')
-    filter_paket = request.args.get('paket', '')
-    filter_nama = request.args.get('nama', '')
+    filters = ringkasan.filters_from_args(request.args)
 
-    # --- HITUNG STATISTIK GLOBAL (Semua Data) ---
-    # Total Siswa
-    total_siswa = User.query.filter_by(role='siswa').count()
+    # --- STATISTIK GLOBAL & TABEL: dibaca dari tabel ringkasan student_summary ---
+    total_siswa, sudah_tes, distribusi_list = ringkasan.statistik()
     # Total Guru
     total_guru = User.query.filter_by(role='guru').count()
-    
-    # Siswa Sudah Tes (yang punya record RiasecResult)
-    # Join: User -> Student -> RiasecResult
-    sudah_tes = db.session.query(func.count(User.id))\
-        .join(Student, User.id == Student.id_user)\
-        .join(RiasecResult, Student.id == RiasecResult.id_student)\
-        .filter(User.role == 'siswa').scalar()
-        
     belum_tes = total_siswa - sudah_tes
-    
-    # Distribusi Paket (Paket 1, 2, 3)
-    # Group by paket_prediksi
-    dist_query = db.session.query(Recommendation.paket_prediksi, func.count(Recommendation.id))\
-        .join(Student, Recommendation.id_student == Student.id)\
-        .join(User, Student.id_user == User.id)\
-        .filter(User.role == 'siswa')\
-        .group_by(Recommendation.paket_prediksi).all()
-        
-    distribusi_dict = {"Paket 1": 0, "Paket 2": 0, "Paket 3": 0}
-    for paket, count in dist_query:
-        if paket in distribusi_dict:
-            distribusi_dict[paket] = count
-            
-    distribusi_list = [distribusi_dict["Paket 1"], distribusi_dict["Paket 2"], distribusi_dict["Paket 3"]]
-
-    # --- QUERY UTAMA UNTUK TABEL (Filtered & Paginated) ---
-    # Kita perlu join table agar bisa filter
-    # Base query: Pilih User, Student, RiasecResult, Recommendation
-    query = db.session.query(User, Student, RiasecResult, Recommendation)\
-        .outerjoin(Student, User.id == Student.id_user)\
-        .outerjoin(RiasecResult, Student.id == RiasecResult.id_student)\
-        .outerjoin(Recommendation, Student.id == Recommendation.id_student)\
-        .filter(User.role == 'siswa')
-        
-    # Apply Filters
-    if filter_riasec:
-        query = query.filter(RiasecResult.top3.ilike(f"%{filter_riasec}%"))
-        
-    if filter_kelas:
-        query = query.filter(User.kelas.ilike(f"%{filter_kelas}%"))
-        
-    if filter_paket:
-        query = query.filter(Recommendation.paket_prediksi == filter_paket)
 
-    if filter_nama:
-        query = query.filter(User.nama.ilike(f"%{filter_nama}%"))
+    pagination = ringkasan.daftar(filters).paginate(page=page, per_page=per_page, error_out=False)
 
-    # Sorting (Optional: by ID desc or Name asc)
-    query = query.order_by(User.nama.asc())
+    # Hash password hanya untuk baris di halaman ini (satu query)
+    page_ids = [r.id_user for r in pagination.items]
+    hash_per_user = dict(db.session.query(User.id, User.password)
+                         .filter(User.id.in_(page_ids)).all()) if page_ids else {}
 
-    # Pagination
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    
     siswa_list = []
-    for u, s, res, rec in pagination.items:
-        # Logika prioritas data (User > Student)
-        nama_siswa = u.nama if u.nama else (s.nama if s else u.username)
-        nisn_siswa = u.nisn if u.nisn else (s.nisn if s else "-")
-        kelas_siswa = u.kelas if u.kelas else (s.kelas if s else "-")
-        
-        kode_riasec = res.top3 if res else "-"
-        paket = rec.paket_prediksi if rec else "-"
+    for r in pagination.items:
+        nisn_siswa = r.nisn or "-"
+        password = hash_per_user.get(r.id_user) or ""
         is_default_password = False
         try:
-            if nisn_siswa and check_password_hash(u.password, nisn_siswa):
+            if nisn_siswa and check_password_hash(password, nisn_siswa):
                 is_default_password = True
         except Exception:
-            if nisn_siswa and u.password == nisn_siswa:
+            if nisn_siswa and password == nisn_siswa:
                 is_default_password = True
         siswa_list.append({
-            "id": u.id,
-            "nama": nama_siswa,
+            "id": r.id_user,
+            "nama": r.nama,
             "nisn": nisn_siswa,
-            "kelas": kelas_siswa,
-            "kode_riasec": kode_riasec,
-            "paket_rekomendasi": paket,
-            "username": u.username,
+            "kelas": r.kelas or "-",
+            "kode_riasec": r.top3 or "-",
+            "paket_rekomendasi": r.paket or "-",
+            "username": r.username,
             "is_default_password": is_default_password
         })
 
@@ -119,12 +67,9 @@ def dashboard_admin():
         total_guru=total_guru,
         distribusi=distribusi_list,
         # Kirim balik filter values ke template
-        filters={
-            'riasec': filter_riasec,
-            'kelas': filter_kelas,
-            'paket': filter_paket,
-            'nama': filter_nama
-        }
+        filters=filters,
+        # Pilihan kelas persis untuk reset password massal
+        daftar_kelas=analitik.daftar_kelas()
     )
 
 @admin_bp.route('/admin/guru')
@@ -178,7 +123,7 @@ def add_guru():
 
         new_guru = User(
             username=username,
-            password=generate_password_hash(password),
+            password=passwords.hash_password(password),
             role='guru',
             nama=nama,
             nisn=nisn
@@ -239,10 +184,11 @@ def edit_guru(id):
             if password != confirm_password:
                 flash('Password baru tidak cocok.', 'error')
                 return redirect(url_for('admin.edit_guru', id=id))
-            guru.password = generate_password_hash(password)
+            guru.password = passwords.hash_password(password)
             
         try:
             db.session.commit()
+            identity.invalidate(guru.id)
             flash('Data guru berhasil diperbarui.', 'success')
             return redirect(url_for('admin.guru_list'))
         except Exception as e:
@@ -266,6 +212,7 @@ def delete_guru(id):
     try:
         db.session.delete(guru)
         db.session.commit()
+        identity.invalidate(id)
         flash('Guru berhasil dihapus.', 'success')
     except Exception as e:
         db.session.rollback()
@@ -289,106 +236,66 @@ def import_data():
             flash('Tidak ada file yang dipilih.', 'error')
             return redirect(request.url)
             
-        if file and (file.filename.endswith('.csv') or file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
+        if file and file.filename.lower().endswith(impor.EKSTENSI):
             try:
-                import pandas as pd
-                
-                if file.filename.endswith('.csv'):
-                    df = pd.read_csv(file, dtype=str)
-                else:
-                    df = pd.read_excel(file, dtype=str)
-                
-                # Normalisasi nama kolom (lowercase)
-                df.columns = [c.lower() for c in df.columns]
-                
-                required_cols = ['nama', 'nisn', 'kelas']
-                missing_cols = [col for col in required_cols if col not in df.columns]
-                
-                if missing_cols:
-                    flash(f'Format file salah. Kolom wajib: {", ".join(missing_cols)} tidak ditemukan.', 'error')
-                    return redirect(request.url)
-                
-                success_count = 0
-                error_count = 0
-                
-                for index, row in df.iterrows():
-                    try:
-                        nama = str(row['nama']).strip()
-                        nisn = str(row['nisn']).strip()
-                        kelas = str(row['kelas']).strip()
-                        
-                        # Generate username & password default dari NISN
-                        username = nisn
-                        password = nisn
-                        role = 'siswa'
-
-                        # Override jika kolom ada di CSV
-                        if 'username' in df.columns and str(row['username']) != 'nan' and str(row['username']).strip():
-                            username = str(row['username']).strip()
-                        
-                        if 'password' in df.columns and str(row['password']) != 'nan' and str(row['password']).strip():
-                            password = str(row['password']).strip()
-
-                        if 'role' in df.columns and str(row['role']) != 'nan' and str(row['role']).strip():
-                            role = str(row['role']).strip().lower()
-                        
-                        if not nisn or not nama:
-                            continue
-                            
-                        # Cek duplikat NISN
-                        if User.query.filter_by(nisn=nisn).first():
-                            error_count += 1
-                            continue
-                            
-                        # Cek duplikat Username
-                        if User.query.filter_by(username=username).first():
-                            # Jika username (NISN) sudah ada, coba tambahkan suffix atau skip
-                            # Di sini kita skip saja karena NISN harus unik sebagai username siswa
-                            error_count += 1
-                            continue
-                            
-                        new_user = User(
-                            username=username,
-                            password=generate_password_hash(password),
-                            role=role,
-                            nama=nama,
-                            nisn=nisn,
-                            kelas=kelas
-                        )
-                        db.session.add(new_user)
-                        db.session.flush() # Flush untuk dapat ID user
-                        
-                        new_student = Student(
-                            id_user=new_user.id,
-                            nama=nama,
-                            nisn=nisn,
-                            kelas=kelas
-                        )
-                        db.session.add(new_student)
-                        success_count += 1
-                        
-                    except Exception as e:
-                        error_count += 1
-                        print(f"Error importing row {index}: {e}")
-                        continue
-                        
-                db.session.commit()
-                
-                if success_count > 0:
-                    flash(f'Berhasil mengimport {success_count} data siswa. Gagal/Duplikat: {error_count}.', 'success')
-                else:
-                    flash(f'Tidak ada data yang diimport. Semua data ({error_count}) mungkin duplikat atau error.', 'error')
-                    
-                return redirect(url_for('admin.dashboard_admin'))
-                
+                # File disimpan dulu lalu diproses per potongan; file yang sama
+                # dengan job yang terhenti dilanjutkan dari checkpoint-nya
+                job = impor.buat_job(file.stream, file.filename, current_user.id)
+                return _jalankan_import(job)
             except Exception as e:
+                db.session.rollback()
                 flash(f'Terjadi kesalahan saat memproses file: {str(e)}', 'error')
                 return redirect(request.url)
         else:
             flash('Format file tidak didukung. Gunakan CSV atau Excel.', 'error')
             return redirect(request.url)
             
-    return render_template('import_data.html')
+    return render_template('import_data.html', jobs=impor.belum_selesai())
+
+@admin_bp.route('/admin/import/<int:job_id>/lanjut', methods=['POST'])
+@login_required
+def lanjut_import(job_id):
+    if current_user.role != 'admin':
+        return redirect(url_for('auth.login'))
+    job = db.get_or_404(ImportJob, job_id)
+    return _jalankan_import(job)
+
+def _jalankan_import(job):
+    try:
+        job = impor.jalankan(job)
+    except impor.ImportJobError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('admin.import_data'))
+
+    if job.status == 'gagal':
+        flash(f'Import terhenti setelah {job.rows_done} baris ({job.last_error}). '
+              f'Data sebelum titik itu sudah tersimpan; klik Lanjutkan untuk meneruskan.', 'error')
+        return redirect(url_for('admin.import_data'))
+    if job.success_count > 0:
+        flash(f'Berhasil mengimport {job.success_count} data siswa. Gagal/Duplikat: {job.error_count}.', 'success')
+    else:
+        flash(f'Tidak ada data yang diimport. Semua data ({job.error_count}) mungkin duplikat atau error.', 'error')
+    return redirect(url_for('admin.dashboard_admin'))
+
+
+@admin_bp.route('/admin/karir', methods=['GET', 'POST'])
+@login_required
+def career_catalog():
+    if current_user.role != 'admin':
+        return redirect(url_for('auth.login'))
+
+    if request.method == 'POST':
+        katalog = request.form.get('katalog', '')
+        try:
+            karir.save_catalog(json.loads(katalog))
+        except ValueError as e:
+            # json.JSONDecodeError juga turunan ValueError
+            flash(f'Katalog tidak disimpan: {str(e)}', 'error')
+            return render_template('career_catalog.html', katalog=katalog)
+        flash('Katalog karir berhasil disimpan.', 'success')
+        return redirect(url_for('admin.career_catalog'))
+
+    return render_template('career_catalog.html', katalog=karir.read_catalog_text())
 
 @admin_bp.route('/admin/download-template')
 @login_required
@@ -451,8 +358,9 @@ def reset_password_default(user_id):
         return jsonify({"error": "invalid_role"}), 400
     if not u.nisn:
         return jsonify({"error": "nisn_missing"}), 400
-    u.password = generate_password_hash(u.nisn)
+    u.password = passwords.hash_password(u.nisn)
     db.session.commit()
+    identity.invalidate(u.id)
     return jsonify({"success": True, "password": u.nisn})
 
 @admin_bp.route('/admin/user/<int:user_id>/generate-temp-password', methods=['POST'])
@@ -467,23 +375,48 @@ def generate_temp_password(user_id):
         return jsonify({"error": "invalid_role"}), 400
     alphabet = string.ascii_letters + string.digits
     temp = ''.join(secrets.choice(alphabet) for _ in range(10))
-    u.password = generate_password_hash(temp)
+    u.password = passwords.hash_password(temp)
     db.session.commit()
+    identity.invalidate(u.id)
     return jsonify({"success": True, "password": temp})
 
+@admin_bp.route('/admin/users/reset-password-massal', methods=['POST'])
+@login_required
+def reset_password_massal():
+    if current_user.role != 'admin':
+        return redirect(url_for('auth.login'))
+    # Satu kelas persis (kelas) atau siswa yang dicentang (ids); mode 'nisn' / 'sementara'
+    kelas = (request.form.get('kelas') or '').strip()
+    ids = request.form.getlist('ids', type=int)
+    try:
+        akun = akun_massal.target(kelas=kelas, ids=ids)
+        if not akun:
+            flash(f"Tidak ada akun siswa di kelas {kelas}." if kelas and not ids else "Tidak ada akun siswa terpilih.")
+            return redirect(url_for('admin.dashboard_admin', kelas=kelas))
+        hasil = akun_massal.reset(akun, request.form.get('mode', 'sementara'))
+    except akun_massal.AkunMassalError as e:
+        flash(str(e))
+        return redirect(url_for('admin.dashboard_admin'))
+    nama_file = f"kredensial_{kelas.replace(' ', '_')}.csv" if kelas and not ids else 'kredensial_siswa.csv'
+    return Response(
+        akun_massal.lembar_csv(hasil),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{nama_file}"', 'Cache-Control': 'no-store'}
+    )
+
 # Optional: Download CSV
 @admin_bp.route('/admin/download-csv')
 @login_required
 def download_csv():
-    siswa_list = Student.query.all()
+    # Satu scan tabel ringkasan, tanpa query per siswa
+    rows = db.session.query(StudentSummary.nama, StudentSummary.nisn, StudentSummary.top3, StudentSummary.paket)\
+        .order_by(*ringkasan.URUTAN).all()
     output = io.StringIO()
     writer = csv.writer(output)
     writer.writerow(['Nama', 'NISN', 'Status Tes', 'Paket Rekomendasi'])
-    for s in siswa_list:
-        status_tes = "Sudah Tes" if RiasecResult.query.filter_by(id_student=s.id).first() else "Belum Tes"
-        rekom = Recommendation.query.filter_by(id_student=s.id).first()
-        paket = rekom.paket_prediksi if rekom else "-"
-        writer.writerow([s.nama, s.nisn, status_tes, paket])
+    for nama, nisn, top3, paket in rows:
+        status_tes = "Sudah Tes" if top3 else "Belum Tes"
+        writer.writerow([nama, nisn, status_tes, paket or "-"])
     output.seek(0)
     return send_file(
         io.BytesIO(output.read().encode('utf-8')),
@@ -491,3 +424,20 @@ def download_csv():
         as_attachment=True,
         download_name='data_siswa.csv'
     )
+
+
+@admin_bp.route('/admin/download-xlsx')
+@login_required
+def download_xlsx():
+    if current_user.role != 'admin':
+        return redirect(url_for('auth.login'))
+
+    # Filter sama dengan dashboard; per_kelas=1 -> satu sheet per kelas
+    filters = ringkasan.filters_from_args(request.args)
+    per_kelas = request.args.get('per_kelas') == '1'
+    return send_file(
+        ekspor.ekspor_siswa(filters, per_kelas),
+        mimetype=ekspor.MIMETYPE,
+        as_attachment=True,
+        download_name='data_siswa_per_kelas.xlsx' if per_kelas else 'data_siswa.xlsx'
+    )
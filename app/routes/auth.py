@@ -1,8 +1,8 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, make_response, current_app
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.models import User
 from app import db
+from app.utils import identity, passwords, signals
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -17,19 +17,22 @@ def login():
         password = request.form['password']
         user = User.query.filter_by(username=username).first()
         
-        # Verifikasi password (mendukung Hash dan Plain Text untuk backward compatibility)
+        # Verifikasi password (hash atau plain text data lama) di pool terbatas;
+        # saat antrean penuh (mis. awal sesi tes) klien diminta mencoba lagi
         is_valid_password = False
         if user:
-            # 1. Cek Hash (Prioritas Utama)
             try:
-                if check_password_hash(user.password, password):
-                    is_valid_password = True
-            except:
-                pass
-            
-            # 2. Cek Plain Text (Fallback untuk data lama)
-            if not is_valid_password and user.password == password:
-                is_valid_password = True
+                is_valid_password, perlu_rehash = passwords.verify_bounded(user.password, password)
+            except passwords.Overloaded:
+                flash("Server sedang sibuk melayani banyak login. Coba lagi beberapa detik lagi.", 'error')
+                resp = make_response(render_template('login.html'), 503)
+                resp.headers['Retry-After'] = str(current_app.config.get('PASSWORD_RETRY_AFTER', 5))
+                return resp
+
+            # Password plain text / parameter hash lama: simpan ulang dengan metode saat ini
+            if is_valid_password and perlu_rehash:
+                passwords.upgrade(user, password)
+                db.session.commit()
 
         if user and is_valid_password:
             login_user(user)
@@ -68,24 +71,19 @@ def register():
         
         user = User(
             username=username,
-            password=generate_password_hash(password),
+            password=passwords.hash_password(password),
             role='siswa',
             nama=nama if nama else username,
             nisn=nisn if nisn else None,
             kelas=kelas if kelas else None
         )
         db.session.add(user)
+        db.session.flush()
+        # Baris student dibuat sekarang (satu transaksi dengan user), sehingga
+        # halaman siswa cukup membaca
+        student_id = identity.ensure_student(user.id, user.nama, user.nisn, user.kelas)
         db.session.commit()
-        
-        from app.models import Student
-        student = Student(
-            id_user=user.id,
-            nama=user.nama,
-            nisn=user.nisn,
-            kelas=user.kelas
-        )
-        db.session.add(student)
-        db.session.commit()
+        signals.kirim_student_changed(student_id, user.id, 'student')
         
         login_user(user)
         return redirect(url_for('siswa.dashboard_siswa'))
@@ -95,5 +93,6 @@ def register():
 @auth_bp.route('/logout')
 @login_required
 def logout():
+    identity.invalidate(current_user.id)
     logout_user()
     return redirect(url_for('auth.home'))
@@ -1,8 +1,9 @@
-from flask import Blueprint, render_template, redirect, url_for, request
+from flask import Blueprint, abort, jsonify, render_template, redirect, url_for, request, flash, send_file, Response, stream_with_context
 from flask_login import login_required, current_user
-from app.models import User, Student, RiasecResult, Recommendation
+from app.models import Student
 from app import db
-from sqlalchemy import func
+from app.utils import analitik, laporan, live, mirip, profil, ringkasan
+import io
 
 guru_bp = Blueprint('guru', __name__)
 
@@ -16,87 +17,23 @@ def dashboard_guru():
     page = request.args.get('page', 1, type=int)
     per_page = 10
     
-    filter_riasec = request.args.get('riasec', '')
-    filter_kelas = request.args.get('kelas', '')
-    filter_paket = request.args.get('paket', '')
-    filter_nama = request.args.get('nama', '')
-
-    # --- HITUNG STATISTIK GLOBAL (Semua Data) ---
-    # Total Siswa
-    total_siswa = User.query.filter_by(role='siswa').count()
-    
-    # Siswa Sudah Tes (yang punya record RiasecResult)
-    # Join: User -> Student -> RiasecResult
-    sudah_tes = db.session.query(func.count(User.id))\
-        .join(Student, User.id == Student.id_user)\
-        .join(RiasecResult, Student.id == RiasecResult.id_student)\
-        .filter(User.role == 'siswa').scalar()
-        
-    belum_tes = total_siswa - sudah_tes
-    
-    # Distribusi Paket (Paket 1, 2, 3)
-    # Group by paket_prediksi
-    dist_query = db.session.query(Recommendation.paket_prediksi, func.count(Recommendation.id))\
-        .join(Student, Recommendation.id_student == Student.id)\
-        .join(User, Student.id_user == User.id)\
-        .filter(User.role == 'siswa')\
-        .group_by(Recommendation.paket_prediksi).all()
-        
-    distribusi_dict = {"Paket 1": 0, "Paket 2": 0, "Paket 3": 0}
-    for paket, count in dist_query:
-        if paket in distribusi_dict:
-            distribusi_dict[paket] = count
-            
-    distribusi_list = [distribusi_dict["Paket 1"], distribusi_dict["Paket 2"], distribusi_dict["Paket 3"]]
-
-
-    # --- QUERY UTAMA UNTUK TABEL (Filtered & Paginated) ---
-    # Kita perlu join table agar bisa filter
-    # Base query: Pilih User, Student, RiasecResult, Recommendation
-    query = db.session.query(User, Student, RiasecResult, Recommendation)\
-        .outerjoin(Student, User.id == Student.id_user)\
-        .outerjoin(RiasecResult, Student.id == RiasecResult.id_student)\
-        .outerjoin(Recommendation, Student.id == Recommendation.id_student)\
-        .filter(User.role == 'siswa')
-        
-    # Apply Filters
-    if filter_riasec:
-        query = query.filter(RiasecResult.top3.ilike(f"%{filter_riasec}%"))
-        
-    if filter_kelas:
-        # Prioritaskan filter dari User.kelas, tapi cek juga Student.kelas sebagai fallback jika perlu
-        # Namun agar konsisten dengan display, kita filter di User.kelas dulu karena itu data utama sekarang
-        query = query.filter(User.kelas.ilike(f"%{filter_kelas}%"))
-        
-    if filter_paket:
-        query = query.filter(Recommendation.paket_prediksi == filter_paket)
+    filters = ringkasan.filters_from_args(request.args)
 
-    if filter_nama:
-        query = query.filter(User.nama.ilike(f"%{filter_nama}%"))
+    # --- STATISTIK GLOBAL & TABEL: dibaca dari tabel ringkasan student_summary ---
+    total_siswa, sudah_tes, distribusi_list = ringkasan.statistik()
+    belum_tes = total_siswa - sudah_tes
 
-    # Sorting (Optional: by ID desc or Name asc)
-    query = query.order_by(User.nama.asc())
+    pagination = ringkasan.daftar(filters).paginate(page=page, per_page=per_page, error_out=False)
 
-    # Pagination
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    
     siswa_list = []
-    for u, s, res, rec in pagination.items:
-        # Logika prioritas data (User > Student)
-        nama_siswa = u.nama if u.nama else (s.nama if s else u.username)
-        nisn_siswa = u.nisn if u.nisn else (s.nisn if s else "-")
-        kelas_siswa = u.kelas if u.kelas else (s.kelas if s else "-")
-        
-        kode_riasec = res.top3 if res else "-"
-        paket = rec.paket_prediksi if rec else "-"
-        
+    for r in pagination.items:
         siswa_list.append({
-            "id": u.id,
-            "nama": nama_siswa,
-            "nisn": nisn_siswa,
-            "kelas": kelas_siswa,
-            "kode_riasec": kode_riasec,
-            "paket_rekomendasi": paket
+            "id": r.id_user,
+            "nama": r.nama,
+            "nisn": r.nisn or "-",
+            "kelas": r.kelas or "-",
+            "kode_riasec": r.top3 or "-",
+            "paket_rekomendasi": r.paket or "-"
         })
 
     return render_template(
@@ -108,12 +45,45 @@ def dashboard_guru():
         total_siswa=total_siswa,
         distribusi=distribusi_list,
         # Kirim balik filter values ke template
-        filters={
-            'riasec': filter_riasec,
-            'kelas': filter_kelas,
-            'paket': filter_paket,
-            'nama': filter_nama
-        }
+        filters=filters,
+        filter_args={k: v for k, v in filters.items() if v}
+    )
+
+@guru_bp.route('/guru/live')
+@login_required
+def live_stream():
+    """Server-sent events kemajuan tes siswa (?kelas=... seperti filter dashboard, kosong = semua kelas)."""
+    if current_user.role not in ('guru', 'admin'):
+        abort(403)
+
+    kelas = request.args.get('kelas', '').strip()
+    last_id = request.headers.get('Last-Event-ID', request.args.get('last_id', 0), type=int) or 0
+    try:
+        events = live.stream(kelas, last_id)
+    except live.TooManyStreams:
+        return Response('Terlalu banyak koneksi pemantauan.', status=503, headers={'Retry-After': '30'})
+    # Stream bisa terbuka lama: kembalikan koneksi database ke pool sekarang
+    db.session.remove()
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # nginx: jangan buffer event
+    })
+
+@guru_bp.route('/guru/analytics')
+@login_required
+def analytics():
+    if current_user.role not in ('guru', 'admin'):
+        return redirect(url_for('auth.login'))
+
+    kelas = request.args.get('kelas', '').strip()
+    data = analitik.get(kelas or None)
+    if request.args.get('format') == 'json':
+        return jsonify(data)
+    return render_template(
+        "analytics_guru.html",
+        data=data,
+        kelas=kelas,
+        daftar_kelas=analitik.daftar_kelas()
     )
 
 @guru_bp.route('/guru/detail_siswa/<int:user_id>')
@@ -122,50 +92,75 @@ def detail_siswa(user_id):
     if current_user.role != 'guru':
         return redirect(url_for('auth.login'))
         
-    user = User.query.get_or_404(user_id)
-    student = Student.query.filter_by(id_user=user.id).first()
-    
-    # Default values
-    riasec_data = None
-    rekom_data = None
-    rapor_data = None
-    
-    if student:
-        riasec_result = RiasecResult.query.filter_by(id_student=student.id).first()
-        if riasec_result:
-            riasec_data = {
-                'top3': riasec_result.top3,
-                'skor': {
-                    'R': riasec_result.skor_R,
-                    'I': riasec_result.skor_I,
-                    'A': riasec_result.skor_A,
-                    'S': riasec_result.skor_S,
-                    'E': riasec_result.skor_E,
-                    'C': riasec_result.skor_C
-                }
-            }
-            
-        rekom = Recommendation.query.filter_by(id_student=student.id).first()
-        if rekom:
-            rekom_data = rekom.paket_prediksi
-            
-        from app.models import ReportScore
-        rapor = ReportScore.query.filter_by(id_student=student.id).first()
-        if rapor:
-            rapor_data = {
-                'Biologi': rapor.biologi,
-                'Fisika': rapor.fisika,
-                'Kimia': rapor.kimia,
-                'Matematika': rapor.matematika,
-                'Ekonomi': rapor.ekonomi,
-                'Sosiologi': rapor.sosiologi
-            }
+    # Posisi siswa di daftar dashboard (filter yang sama) untuk navigasi & prefetch
+    filters = ringkasan.filters_from_args(request.args)
+    prev_id, next_id = ringkasan.tetangga(user_id, filters)
+
+    # Satu query untuk profil ini + profil sebelum/sesudahnya (yang belum ter-cache)
+    p = profil.get_profile(user_id, prefetch=(prev_id, next_id))
+    if p is None:
+        abort(404)
+
+    riasec_data = {'top3': p.top3, 'skor': dict(p.skor)} if p.riasec_done else None
+    rekom_data = p.paket
+    faktor = p.penjelasan
+    serupa = mirip.tetangga(p.student_id) if p.riasec_done and p.rapor_done else []
+    rapor_data = dict(p.rapor) if p.rapor_done else None
 
     return render_template(
         "detail_siswa_guru.html",
-        user=user,
-        student=student,
+        user=p,
         riasec_data=riasec_data,
         rekom_data=rekom_data,
-        rapor_data=rapor_data
+        faktor=faktor,
+        serupa=serupa,
+        rapor_data=rapor_data,
+        prev_id=prev_id,
+        next_id=next_id,
+        filters={k: v for k, v in filters.items() if v}
+    )
+
+@guru_bp.route('/guru/laporan/<int:user_id>')
+@login_required
+def laporan_siswa(user_id):
+    if current_user.role not in ('guru', 'admin'):
+        return redirect(url_for('auth.login'))
+    if not laporan.REPORTLAB_AVAILABLE:
+        flash("Pembuatan PDF di server membutuhkan paket reportlab.")
+        return redirect(url_for('guru.detail_siswa', user_id=user_id))
+
+    student = Student.query.filter_by(id_user=user_id).first_or_404()
+    data = laporan.data_siswa(student.id)
+    if data is None:
+        flash("Siswa belum menyelesaikan tes, nilai rapor, dan rekomendasi.")
+        return redirect(url_for('guru.detail_siswa', user_id=user_id))
+    return send_file(
+        io.BytesIO(laporan.pdf_siswa(data)),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=laporan.nama_file(data)
+    )
+
+@guru_bp.route('/guru/laporan_kelas')
+@login_required
+def laporan_kelas():
+    if current_user.role not in ('guru', 'admin'):
+        return redirect(url_for('auth.login'))
+    kelas = request.args.get('kelas', '').strip()
+    if not kelas:
+        flash("Pilih kelas terlebih dahulu.")
+        return redirect(url_for('guru.dashboard_guru'))
+    if not laporan.REPORTLAB_AVAILABLE:
+        flash("Pembuatan PDF di server membutuhkan paket reportlab.")
+        return redirect(url_for('guru.dashboard_guru', kelas=kelas))
+
+    items = laporan.data_kelas(kelas)
+    if not items:
+        flash(f"Belum ada siswa kelas {kelas} dengan hasil rekomendasi lengkap.")
+        return redirect(url_for('guru.dashboard_guru', kelas=kelas))
+    # ZIP dikirim bertahap selama PDF selesai dibuat di worker pool
+    return Response(
+        stream_with_context(laporan.zip_kelas(items)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="Laporan_{kelas.replace(" ", "_")}.zip"'}
     )
@@ -1,10 +1,10 @@
-import os
-import joblib
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+import io
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, current_app, session
 from flask_login import login_required, current_user, logout_user
-from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
 from app import db
-from app.models import Student, RiasecQuestion, RiasecAnswer, RiasecResult, ReportScore, Recommendation
+from app.models import Student, RiasecQuestion, RiasecAnswer, RiasecResult, ReportScore, Recommendation, RecommendationExplanation
+from app.utils import http_cache, identity, karir, laporan, live, model_registry, penjelasan, progress, rekom_latar, riasec_scoring, signals, sqlite_mode, tes_adaptif
 
 siswa_bp = Blueprint('siswa', __name__)
 
@@ -17,28 +17,26 @@ def landing_page():
 
 def get_or_create_student(user):
     """
-    Helper untuk mendapatkan data student berdasarkan user.
-    Jika belum ada di tabel 'students', buat baru dari data 'users'.
+    Data student milik user. Baris students dibuat saat registrasi/import
+    dan ikut di snapshot identitas, jadi jalur umum hanya membaca cache.
+    User siswa lama yang belum punya baris dibuatkan dengan upsert atomik
+    (aman untuk beberapa tab bersamaan); akun guru/admin tidak pernah
+    dibuatkan baris students.
     """
-    student = Student.query.filter_by(id_user=user.id).first()
-    if not student:
-        # Coba buat data student dari data user
-        # Pastikan user punya nisn & nama (karena di tabel students wajib/NOT NULL)
-        if user.nisn and user.nama:
-            try:
-                student = Student(
-                    id_user=user.id,
-                    nisn=user.nisn,
-                    nama=user.nama,
-                    kelas=user.kelas
-                )
-                db.session.add(student)
-                db.session.commit()
-            except Exception as e:
-                db.session.rollback()
-                print(f"Gagal auto-create student: {e}")
-                return None
-    return student
+    if getattr(user, 'student', None) is not None:
+        return user.student
+    if getattr(user, 'role', None) != 'siswa':
+        return None
+    try:
+        student_id = identity.ensure_student(user.id, user.nama or user.username, user.nisn, user.kelas)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        current_app.logger.exception("Gagal membuat data student untuk user %s", user.id)
+        return None
+    identity.invalidate(user.id)
+    signals.kirim_student_changed(student_id, user.id, 'student')
+    return identity.load(user.id).student
 
 @siswa_bp.route('/siswa')
 @login_required
@@ -48,63 +46,144 @@ def dashboard_siswa():
         return redirect(url_for('auth.login'))
 
     # cari record student (relasi ke user), auto-create jika perlu
-    student = get_or_create_student(current_user)
+    get_or_create_student(current_user)
 
-    # Ambil nama siswa jika ada, fallback ke username
-    if student and getattr(student, 'nama', None):
-        student_name = student.nama
-    else:
-        # fallback: user punya username (models.User punya field username)
-        student_name = getattr(current_user, 'nama', None) or getattr(current_user, 'username', None) or 'Nama Siswa'
-
-    # cek keberadaan hasil untuk setiap langkah
-    riasec_done = False
-    rapor_done = False
-    rekom_done = False
-
-    if student:
-        riasec_done = RiasecResult.query.filter_by(id_student=student.id).first() is not None
-        rapor_done = ReportScore.query.filter_by(id_student=student.id).first() is not None
-        rekom_done = Recommendation.query.filter_by(id_student=student.id).first() is not None
-
-    completed = sum([riasec_done, rapor_done, rekom_done])
-    percent = int((completed / 3) * 100) if completed >= 0 else 0
-
-    # status teks singkat (opsional untuk ditampilkan)
-    if percent == 100:
-        status = "Selesai"
-    elif percent == 0:
-        status = "Belum mengerjakan"
-    else:
-        status = "Sedang mengerjakan"
+    # Nama tampilan + status ketiga langkah dalam satu query (ter-cache)
+    p = progress.for_user(current_user.id)
 
     return render_template(
         'dashboard_siswa.html',
-        student_name=student_name,
-        percent=percent,
-        status=status,
-        riasec_done=riasec_done,
-        rapor_done=rapor_done,
-        rekom_done=rekom_done
+        student_name=p.display_name,
+        percent=p.percent,
+        status=p.status,
+        riasec_done=p.riasec_done,
+        rapor_done=p.rapor_done,
+        rekom_done=p.rekom_done
     )
 
 # LOGOUT route
 @siswa_bp.route('/logout')
 @login_required
 def logout():
+    identity.invalidate(current_user.id)
     logout_user()
     # redirect ke halaman login (publik) supaya tidak memicu login_required
     return redirect(url_for('auth.login'))
     # jika ingin redirect ke landing/public page, gunakan:
     # return redirect(url_for('siswa.landing_page'))
 
+def _simpan_jawaban(student, pertanyaan_ids):
+    """Upsert jawaban satu halaman dari form. Return True jika ada jawaban lama yang ditimpa."""
+    ada_jawaban_lama = False
+    for qid in pertanyaan_ids:
+        val = request.form.get(f"jawaban_{qid}")
+        if val is not None:
+            existing = RiasecAnswer.query.filter_by(id_student=student.id, id_question=int(qid)).first()
+            if existing:
+                ada_jawaban_lama = True
+                existing.skor = 1 if val == "YA" else 0
+            else:
+                db.session.add(RiasecAnswer(id_student=student.id, id_question=int(qid), skor=1 if val == "YA" else 0))
+    db.session.commit()
+    return ada_jawaban_lama
+
+def _simpan_hasil(student, skor, top3, adaptif=False):
+    """Tulis riasec_results siswa lalu arahkan ke halaman hasil."""
+    result = RiasecResult.query.filter_by(id_student=student.id).first()
+    if result:
+        result.skor_R = skor['R']
+        result.skor_I = skor['I']
+        result.skor_A = skor['A']
+        result.skor_S = skor['S']
+        result.skor_E = skor['E']
+        result.skor_C = skor['C']
+        result.top3 = top3
+        result.adaptif = adaptif
+    else:
+        result = RiasecResult(
+            id_student=student.id,
+            skor_R=skor['R'],
+            skor_I=skor['I'],
+            skor_A=skor['A'],
+            skor_S=skor['S'],
+            skor_E=skor['E'],
+            skor_C=skor['C'],
+            top3=top3,
+            adaptif=adaptif
+        )
+        db.session.add(result)
+    db.session.commit()
+    signals.kirim_student_changed(student.id, current_user.id, 'riasec')
+    live.publish('hasil', current_user, top3=top3)
+    rekom_latar.jadwalkan_jika_lengkap(student.id, current_user._get_current_object())
+    return redirect(url_for('siswa.hasil_riasec'))
+
+def _tes_adaptif(student):
+    """
+    Tes RIASEC mode adaptif (lihat app/utils/tes_adaptif.py). Soal yang sudah
+    ditanya pada percobaan ini disimpan di session; halaman berikutnya dipilih
+    dari skor berjalan dan tes berhenti begitu kode top-3 pasti.
+    """
+    soal = db.session.query(RiasecQuestion.id, RiasecQuestion.dimensi).order_by(RiasecQuestion.id).all()
+    total_page = (len(soal) + SOAL_PER_HALAMAN - 1) // SOAL_PER_HALAMAN
+    state = session.get('riasec_adaptif')
+    if not state or state.get('student') != student.id:
+        # Percobaan baru: jawaban lama ditimpa begitu soalnya ditanya lagi
+        state = {'student': student.id, 'ditanya': []}
+
+    if request.method == 'POST':
+        pertanyaan_ids = request.form.getlist("pertanyaan_ids")
+        _simpan_jawaban(student, pertanyaan_ids)
+        page = len(state['ditanya']) // SOAL_PER_HALAMAN + 1
+        if not state['ditanya']:
+            live.publish('mulai', current_user, total_page=total_page)
+        live.publish('halaman', current_user, page=page, total_page=total_page)
+        terjawab = [int(q) for q in pertanyaan_ids if request.form.get(f"jawaban_{q}") is not None]
+        state['ditanya'] = list(dict.fromkeys(state['ditanya'] + terjawab))
+        session['riasec_adaptif'] = state
+
+    sesi = tes_adaptif.SesiAdaptif(soal)
+    if state['ditanya']:
+        skor_ditanya = dict(db.session.query(RiasecAnswer.id_question, RiasecAnswer.skor).filter(
+            RiasecAnswer.id_student == student.id, RiasecAnswer.id_question.in_(state['ditanya'])))
+        for qid in state['ditanya']:
+            if qid in skor_ditanya:
+                sesi.jawab(qid, skor_ditanya[qid])
+
+    if state['ditanya'] and sesi.selesai():
+        # Jawaban dari percobaan lama untuk soal yang tidak ditanya dibuang
+        RiasecAnswer.query.filter(RiasecAnswer.id_student == student.id,
+                                  RiasecAnswer.id_question.notin_(sesi.ditanya))\
+            .delete(synchronize_session=False)
+        session.pop('riasec_adaptif', None)
+        return _simpan_hasil(student, sesi.skor_estimasi(), sesi.status()[0], adaptif=True)
+
+    session['riasec_adaptif'] = state
+    ids = sesi.halaman_berikutnya(SOAL_PER_HALAMAN)
+    teks = dict(db.session.query(RiasecQuestion.id, RiasecQuestion.pertanyaan).filter(RiasecQuestion.id.in_(ids)))
+    pertanyaan_list = [{"id": qid, "text": teks[qid]} for qid in ids]
+    page = len(sesi.ditanya) // SOAL_PER_HALAMAN + 1
+    return render_template(
+        'tes_riasec.html',
+        pertanyaan_list=pertanyaan_list,
+        page=page,
+        total_page=total_page,
+        # Tes bisa selesai lebih awal; total_page adalah batas atas
+        progress=len(sesi.ditanya) / len(soal) if soal else 0,
+        jawaban={},
+        adaptif=True
+    )
+
 @siswa_bp.route('/tes_riasec', methods=['GET', 'POST'])
 @login_required
+@sqlite_mode.retry_on_locked
 def tes_riasec():
     student = get_or_create_student(current_user)
     if not student:
         flash("Data siswa tidak ditemukan.")
         return redirect(url_for('siswa.dashboard_siswa'))
+    if current_app.config.get('RIASEC_ADAPTIF'):
+        return _tes_adaptif(student)
 
     total_soal = RiasecQuestion.query.count()
     SOAL_PER_HALAMAN = 7
@@ -114,50 +193,16 @@ def tes_riasec():
         page = int(request.form.get("page", 1))
         nav = request.form.get("nav", "next")
         pertanyaan_ids = request.form.getlist("pertanyaan_ids")
-        # Simpan jawaban
-        for qid in pertanyaan_ids:
-            val = request.form.get(f"jawaban_{qid}")
-            if val is not None:
-                existing = RiasecAnswer.query.filter_by(id_student=student.id, id_question=int(qid)).first()
-                if existing:
-                    existing.skor = 1 if val == "YA" else 0
-                else:
-                    db.session.add(RiasecAnswer(id_student=student.id, id_question=int(qid), skor=1 if val == "YA" else 0))
-        db.session.commit()
+        ada_jawaban_lama = _simpan_jawaban(student, pertanyaan_ids)
+        # Pemantauan langsung guru (/guru/live)
+        if page == 1 and not ada_jawaban_lama:
+            live.publish('mulai', current_user, total_page=total_page)
+        live.publish('halaman', current_user, page=page, total_page=total_page)
 
         # Jika di halaman terakhir dan klik "Selanjutnya", proses hasil dan redirect
         if nav == "next" and page == total_page:
-            answers = RiasecAnswer.query.filter_by(id_student=student.id).all()
-            skor = {'R':0, 'I':0, 'A':0, 'S':0, 'E':0, 'C':0}
-            for a in answers:
-                q = RiasecQuestion.query.get(a.id_question)
-                if q and q.dimensi in skor:
-                    skor[q.dimensi] += a.skor
-            sorted_dimensi = sorted(skor, key=lambda k: skor[k], reverse=True)
-            top3 = ''.join(sorted_dimensi[:3])
-            result = RiasecResult.query.filter_by(id_student=student.id).first()
-            if result:
-                result.skor_R = skor['R']
-                result.skor_I = skor['I']
-                result.skor_A = skor['A']
-                result.skor_S = skor['S']
-                result.skor_E = skor['E']
-                result.skor_C = skor['C']
-                result.top3 = top3
-            else:
-                result = RiasecResult(
-                    id_student=student.id,
-                    skor_R=skor['R'],
-                    skor_I=skor['I'],
-                    skor_A=skor['A'],
-                    skor_S=skor['S'],
-                    skor_E=skor['E'],
-                    skor_C=skor['C'],
-                    top3=top3
-                )
-                db.session.add(result)
-            db.session.commit()
-            return redirect(url_for('siswa.hasil_riasec'))
+            skor, top3 = riasec_scoring.skor_siswa(student.id)
+            return _simpan_hasil(student, skor, top3)
 
         # Navigasi halaman
         if nav == "next" and page < total_page:
@@ -202,13 +247,21 @@ def hasil_riasec():
     else:
         skor_list = [0,0,0,0,0,0]
         top3 = "-"
-    return render_template('hasil_riasec.html', skor_list=skor_list, top3=top3)
+    # Halaman hanya bergantung pada hasil tes tersimpan: balas 304 jika tidak berubah
+    return http_cache.conditional(
+        ['hasil_riasec', current_user.id, current_user.nama, skor_list, top3],
+        lambda: render_template('hasil_riasec.html', skor_list=skor_list, top3=top3)
+    )
 
 @siswa_bp.route('/input_nilai', methods=['GET', 'POST'])
 @login_required
+@sqlite_mode.retry_on_locked
 def input_nilai():
     student = get_or_create_student(current_user)
     if request.method == 'POST':
+        if not student:
+            flash("Data siswa tidak ditemukan.")
+            return redirect(url_for('siswa.dashboard_siswa'))
         # Ambil nilai dari form
         biologi = request.form.get('biologi')
         fisika = request.form.get('fisika')
@@ -237,6 +290,10 @@ def input_nilai():
             )
             db.session.add(rapor)
         db.session.commit()
+        signals.kirim_student_changed(student.id, current_user.id, 'rapor')
+        live.publish('rapor', current_user)
+        # Prediksi dimulai sekarang, sebelum halaman hasil dibuka
+        rekom_latar.jadwalkan_jika_lengkap(student.id, current_user._get_current_object())
         return redirect(url_for('siswa.hasil_rekomendasi'))
     return render_template('input_nilai.html')
 
@@ -273,7 +330,8 @@ def hasil_rekomendasi():
             'sosiologi': 0
         }
 
-    # Siapkan input fitur untuk model (urutkan sesuai training!)
+    # Skor RIASEC untuk ditampilkan; input fitur model (urutan sesuai training)
+    # disusun oleh rekom_latar.model_input
     riasec_scores = [
         hasil_riasec.skor_R if hasil_riasec else 0,
         hasil_riasec.skor_I if hasil_riasec else 0,
@@ -282,191 +340,83 @@ def hasil_rekomendasi():
         hasil_riasec.skor_E if hasil_riasec else 0,
         hasil_riasec.skor_C if hasil_riasec else 0
     ]
-    rapor_scores = [
-        nilai_rapor['biologi'],
-        nilai_rapor['fisika'],
-        nilai_rapor['kimia'],
-        nilai_rapor['matematika'],
-        nilai_rapor['ekonomi'],
-        nilai_rapor['sosiologi']
-    ]
-    model_input = riasec_scores + rapor_scores
-
-    xgb_path = os.path.join(current_app.root_path, 'utils', 'model_rekomendasi_xgb.pkl')
-    rf_path = os.path.join(current_app.root_path, 'utils', 'model_rekomendasi_rf.pkl')
-    model_obj = None
-    label_encoder = None
-    if os.path.exists(xgb_path):
-        artifact = joblib.load(xgb_path)
-        if isinstance(artifact, dict) and 'model' in artifact:
-            model_obj = artifact.get('model')
-            label_encoder = artifact.get('label_encoder')
-        else:
-            model_obj = artifact
-    elif os.path.exists(rf_path):
-        model_obj = joblib.load(rf_path)
-    else:
+    model_input = rekom_latar.model_input(hasil_riasec, rapor)
+
+    nama_model = model_registry.serving_nama(student.id)
+    if nama_model is None:
         flash("Model rekomendasi tidak ditemukan.")
         return redirect(url_for('siswa.dashboard_siswa'))
 
-    paket_pred_raw = model_obj.predict([model_input])
-    if label_encoder is not None:
-        paket_label = label_encoder.inverse_transform(paket_pred_raw)[0]
-    else:
-        v = paket_pred_raw[0]
-        s = str(v).strip()
-        if s in {"Paket 1", "Paket 2", "Paket 3"}:
-            paket_label = s
-        elif s in {"0", "1", "2"}:
-            i = int(s)
-            paket_label = f"Paket {i+1}"
-        else:
-            paket_label = "Paket 1"
-
-    paket_proba_items = []
-    if hasattr(model_obj, 'predict_proba'):
-        try:
-            proba = model_obj.predict_proba([model_input])[0]
-            classes = getattr(model_obj, 'classes_', None)
-            labels = []
-            if classes is not None and label_encoder is not None:
-                for c in classes:
-                    labels.append(label_encoder.inverse_transform([c])[0])
-            elif classes is not None:
-                labels = [str(c) for c in classes]
-            else:
-                labels = ["Paket 1", "Paket 2", "Paket 3"]
-            paket_proba_items = list(zip(labels, proba))
-            paket_proba_items.sort(key=lambda x: x[1], reverse=True)
-        except Exception:
-            paket_proba_items = []
-
-    paket_dict = {
-        'Paket 1': ["Biologi", "Fisika", "Kimia", "Matematika"],
-        'Paket 2': ["Biologi", "Matematika", "Ekonomi", "Sosiologi"],
-        'Paket 3': ["Kimia", "Fisika", "Ekonomi", "Sosiologi"]
-    }
-    alasan_dict = {
-        'Paket 1': "Paket 1 cocok berdasarkan hasil tes dan nilai rapor Anda.",
-        'Paket 2': "Paket 2 cocok berdasarkan hasil tes dan nilai rapor Anda.",
-        'Paket 3': "Paket 3 cocok berdasarkan hasil tes dan nilai rapor Anda."
-    }
-    semua_paket = paket_dict
+    # Prediksi dihitung di latar belakang (lihat app/utils/rekom_latar.py);
+    # halaman ini hanya membaca hasil tersimpan yang masih sesuai input & model
+    rekom = Recommendation.query.filter_by(id_student=student.id).first()
+    if not rekom_latar.segar(rekom, model_input, nama_model):
+        pesan = rekom_latar.ambil_gagal(student.id)
+        if pesan:
+            flash(f"Rekomendasi gagal dihitung: {pesan}")
+            return redirect(url_for('siswa.dashboard_siswa'))
+        rekom_latar.jadwalkan(student.id, current_user._get_current_object())
+        db.session.expire_all()
+        rekom = Recommendation.query.filter_by(id_student=student.id).first()
+        if not rekom_latar.segar(rekom, model_input, nama_model):
+            pesan = rekom_latar.ambil_gagal(student.id)
+            if pesan:
+                flash(f"Rekomendasi gagal dihitung: {pesan}")
+                return redirect(url_for('siswa.dashboard_siswa'))
+            return render_template('rekomendasi_diproses.html'), 202
+
+    paket_label = rekom.paket_prediksi
+    paket_proba_items = rekom_latar.proba_items(rekom)
+    paket_confidence = rekom.probabilitas
+
+    semua_paket = karir.semua_paket()
 
     top3 = hasil_riasec.top3 if hasil_riasec else "-"
     paket = paket_label
-    paket_mapel = paket_dict.get(paket_label, [])
-    alasan = alasan_dict.get(paket_label, "Paket pilihan sesuai data Anda.")
-    paket_confidence = None
-    for l, p in paket_proba_items:
-        if l == paket_label:
-            paket_confidence = p
-            break
-
-    career_map_combo = {
-        'RIA': [
-            {'title': 'Arsitek', 'riasec': 'RIA', 'desc': 'Merancang bangunan dan ruang, memadukan kreativitas dan analisis.'},
-            {'title': 'UI/UX Designer', 'riasec': 'RIA', 'desc': 'Mendesain pengalaman pengguna dengan riset dan estetika.'},
-            {'title': 'Engineer Produk', 'riasec': 'RIA', 'desc': 'Mengembangkan produk dengan pendekatan teknis dan kreatif.'}
-        ],
-        'RIS': [
-            {'title': 'Insinyur Sipil', 'riasec': 'RIS', 'desc': 'Mendesain dan membangun infrastruktur dengan orientasi teknis.'},
-            {'title': 'Teknisi Konstruksi', 'riasec': 'RIS', 'desc': 'Implementasi teknis di lapangan untuk proyek konstruksi.'}
-        ],
-        'SEC': [
-            {'title': 'Manajer Operasional', 'riasec': 'SEC', 'desc': 'Mengelola proses, tim, dan efisiensi organisasi.'},
-            {'title': 'Konsultan Bisnis', 'riasec': 'SEC', 'desc': 'Memberi saran strategis berbasis data dan proses.'}
-        ],
-        'IEC': [
-            {'title': 'Data Analyst', 'riasec': 'IEC', 'desc': 'Menganalisis data untuk insight dan pengambilan keputusan.'},
-            {'title': 'Quality Assurance', 'riasec': 'IEC', 'desc': 'Menjaga mutu proses dan produk dengan analisis sistematis.'}
-        ],
-        'ASI': [
-            {'title': 'Animator', 'riasec': 'ASI', 'desc': 'Menciptakan animasi dengan kreativitas dan ketelitian.'},
-            {'title': 'Desainer Grafis', 'riasec': 'ASI', 'desc': 'Mengkomunikasikan ide visual secara efektif.'}
-        ]
-    }
-    career_map_single = {
-        'R': [
-            {'title': 'Teknisi Mesin', 'riasec': 'R', 'desc': 'Perawatan dan perakitan mesin dan perangkat.'},
-            {'title': 'Mekanik Otomotif', 'riasec': 'R', 'desc': 'Diagnosa dan perbaikan kendaraan.'},
-            {'title': 'Ahli Konstruksi', 'riasec': 'R', 'desc': 'Pelaksanaan teknis struktur bangunan.'}
-        ],
-        'I': [
-            {'title': 'Peneliti', 'riasec': 'I', 'desc': 'Eksplorasi ilmiah dan eksperimen.'},
-            {'title': 'Data Scientist', 'riasec': 'I', 'desc': 'Model dan analisis data kompleks.'},
-            {'title': 'Analis Laboratorium', 'riasec': 'I', 'desc': 'Pengujian dan validasi sampel.'}
-        ],
-        'A': [
-            {'title': 'Arsitek', 'riasec': 'A', 'desc': 'Perancangan bangunan estetis dan fungsional.'},
-            {'title': 'Animator', 'riasec': 'A', 'desc': 'Pembuatan animasi dan visual kreatif.'},
-            {'title': 'UI/UX Designer', 'riasec': 'A', 'desc': 'Desain antarmuka dan pengalaman pengguna.'}
-        ],
-        'S': [
-            {'title': 'Guru', 'riasec': 'S', 'desc': 'Mendidik dan membimbing peserta didik.'},
-            {'title': 'Konselor', 'riasec': 'S', 'desc': 'Membantu pemecahan masalah personal.'},
-            {'title': 'Perawat', 'riasec': 'S', 'desc': 'Merawat pasien dengan empati dan ketelatenan.'}
-        ],
-        'E': [
-            {'title': 'Pengusaha', 'riasec': 'E', 'desc': 'Membangun dan mengembangkan bisnis.'},
-            {'title': 'Marketing Strategist', 'riasec': 'E', 'desc': 'Menyusun strategi pemasaran dan pertumbuhan.'},
-            {'title': 'Product Manager', 'riasec': 'E', 'desc': 'Mengelola siklus hidup produk dan tim lintas fungsi.'}
-        ],
-        'C': [
-            {'title': 'Akuntan', 'riasec': 'C', 'desc': 'Pengelolaan laporan keuangan dan kepatuhan.'},
-            {'title': 'Auditor', 'riasec': 'C', 'desc': 'Pemeriksaan prosedur dan keuangan organisasi.'},
-            {'title': 'Administrasi', 'riasec': 'C', 'desc': 'Pengelolaan dokumen dan proses rutin.'}
-        ]
-    }
-    def suggest_careers(code):
-        code = (code or '').upper()
-        seen = set()
-        result = []
-        if code in career_map_combo:
-            for item in career_map_combo[code]:
-                key = item['title']
-                if key not in seen:
-                    result.append(item)
-                    seen.add(key)
-        for ch in code:
-            if ch in career_map_single:
-                for item in career_map_single[ch]:
-                    key = item['title']
-                    if key not in seen:
-                        result.append(item)
-                        seen.add(key)
-        return result[:8]
-    careers = suggest_careers(top3)
-
-    # --- SIMPAN REKOMENDASI KE DATABASE TANPA ALASAN ---
-    if student:
-        rekom = Recommendation.query.filter_by(id_student=student.id).first()
-        if rekom:
-            rekom.paket_prediksi = paket_label
-            rekom.probabilitas = paket_confidence
-            # rekom.timestamp = datetime.now() # jika punya kolom timestamp
-        else:
-            rekom = Recommendation(
-                id_student=student.id,
-                paket_prediksi=paket_label,
-                probabilitas=paket_confidence
-                # timestamp=datetime.now() # jika punya kolom timestamp
-            )
-            db.session.add(rekom)
-        db.session.commit()
-    # --- END SIMPAN ---
+    paket_mapel = karir.paket_mapel(paket_label)
+    alasan = karir.alasan(paket_label)
+
+    # Saran karir sudah dihitung saat start untuk semua kode top-3
+    careers = karir.careers_for(top3)
+
+    # Kontribusi fitur dari batch `flask rekomendasi jelaskan` (tanpa memanggil model lagi)
+    expl = RecommendationExplanation.query.filter_by(id_student=student.id).first()
+    faktor = penjelasan.top_fitur(expl, model_input, rekom.model_version, paket_label)
+
+    return http_cache.conditional(
+        ['hasil_rekomendasi', current_user.id, student.nama, student.nisn, student.kelas, model_input, top3,
+         rekom.model_version, rekom.created_at, expl.created_at if faktor else None, karir.versi()],
+        lambda: render_template(
+            'hasil_rekomendasi.html',
+            student=student,
+            riasec_scores=riasec_scores,
+            nilai_rapor=nilai_rapor,
+            top3=top3,
+            paket=paket,
+            paket_mapel=paket_mapel,
+            alasan=alasan,
+            semua_paket=semua_paket,
+            paket_confidence=paket_confidence,
+            paket_proba_items=paket_proba_items,
+            faktor=faktor,
+            careers=careers
+        )
+    )
 
-    return render_template(
-        'hasil_rekomendasi.html',
-        student=student,
-        riasec_scores=riasec_scores,
-        nilai_rapor=nilai_rapor,
-        top3=top3,
-        paket=paket,
-        paket_mapel=paket_mapel,
-        alasan=alasan,
-        semua_paket=semua_paket,
-        paket_confidence=paket_confidence,
-        paket_proba_items=paket_proba_items,
-        careers=careers
+@siswa_bp.route('/laporan.pdf')
+@login_required
+def laporan_pdf():
+    student = get_or_create_student(current_user)
+    data = laporan.data_siswa(student.id) if student else None
+    if data is None:
+        flash("Laporan tersedia setelah Tes RIASEC, nilai rapor, dan rekomendasi selesai.")
+        return redirect(url_for('siswa.dashboard_siswa'))
+    if not laporan.REPORTLAB_AVAILABLE:
+        # Cadangan: laporan dibuat di browser (html2pdf)
+        return redirect(url_for('siswa.hasil_rekomendasi', print='true'))
+    return send_file(
+        io.BytesIO(laporan.pdf_siswa(data)),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=laporan.nama_file(data)
     )
@@ -0,0 +1,120 @@
+"""
+Reset password akun siswa secara massal (satu kelas atau daftar id).
+
+Versi per siswa (`reset_password_default`, `generate_temp_password`) meng-hash
+dan commit satu per satu. Di awal semester admin perlu melakukannya untuk
+satu kelas sekaligus, jadi di sini:
+
+- target dipilih dengan satu query langsung atas users/students (tidak
+  bergantung pada tabel ringkasan yang mungkin belum dibangun): kelas persis
+  sama (pilihan dari `analitik.daftar_kelas`) atau id user terpilih, hanya
+  akun ber-role siswa;
+- semua password baru di-hash paralel lewat `passwords.hash_many`;
+- update `users.password` dikirim sebagai satu executemany dalam satu
+  transaksi (semua berhasil atau tidak sama sekali);
+- lembar kredensial CSV dibuat baris demi baris (`lembar_csv`) dan
+  di-stream ke browser tanpa file sementara.
+
+Mode 'nisn' mereset ke NISN (siswa tanpa NISN dilewati dan ditandai di
+lembar), mode 'sementara' membuat password acak 10 karakter.
+"""
+import csv
+import io
+import secrets
+import string
+import time
+
+import click
+from sqlalchemy import func, update
+
+from app import db
+from app.models import Student, User
+from app.utils import identity, passwords, ringkasan
+from app.utils.passwords import password_cli
+
+MODE = ('nisn', 'sementara')
+KOLOM = ['Nama', 'Kelas', 'Username', 'NISN', 'Password', 'Keterangan']
+_ALFABET = string.ascii_letters + string.digits
+
+
+class AkunMassalError(Exception):
+    pass
+
+
+def password_sementara(panjang=10):
+    return ''.join(secrets.choice(_ALFABET) for _ in range(panjang))
+
+
+def target(kelas=None, ids=None):
+    """Akun siswa sasaran: list dict id, nama, kelas, username, nisn (urut kelas, nama)."""
+    if not kelas and not ids:
+        raise AkunMassalError("Pilih kelas atau centang siswa terlebih dahulu.")
+    # Identitas gabungan seperti tabel ringkasan: nilai di users diutamakan
+    kolom_kelas = ringkasan.kelas_siswa()
+    nama = func.coalesce(func.nullif(User.nama, ''), Student.nama, User.username)
+    nisn = func.coalesce(func.nullif(User.nisn, ''), Student.nisn)
+    query = db.session.query(User.id, nama, kolom_kelas, User.username, nisn)\
+        .outerjoin(Student, Student.id_user == User.id).filter(User.role == 'siswa')
+    query = query.filter(User.id.in_(ids)) if ids else query.filter(kolom_kelas == kelas)
+    return [dict(id=uid, nama=n, kelas=k, username=username, nisn=no)
+            for uid, n, k, username, no in query.order_by(kolom_kelas, nama)]
+
+
+def reset(akun, mode):
+    """
+    Set password baru semua `akun` dalam satu transaksi. Return list dict akun
+    yang sama dengan tambahan 'password' dan 'keterangan' untuk lembar kredensial.
+    """
+    if mode not in MODE:
+        raise AkunMassalError(f"Mode tidak dikenal: {mode}")
+    hasil, baru = [], []
+    for a in akun:
+        if mode == 'nisn' and not a['nisn']:
+            hasil.append(dict(a, password='', keterangan='NISN kosong, tidak direset'))
+            continue
+        a = dict(a, password=a['nisn'] if mode == 'nisn' else password_sementara(),
+                 keterangan='Reset ke NISN' if mode == 'nisn' else 'Password sementara')
+        hasil.append(a)
+        baru.append(a)
+    if not baru:
+        return hasil
+
+    hashes = passwords.hash_many([a['password'] for a in baru])
+    # Bulk UPDATE by primary key -> satu executemany
+    db.session.execute(update(User), [{'id': a['id'], 'password': h} for a, h in zip(baru, hashes)])
+    db.session.commit()
+    for a in baru:
+        identity.invalidate(a['id'])
+    return hasil
+
+
+def lembar_csv(hasil):
+    """Generator potongan teks CSV lembar kredensial (satu potongan per baris)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(KOLOM)
+    for a in hasil:
+        writer.writerow([a['nama'], a['kelas'] or '-', a['username'], a['nisn'] or '-', a['password'], a['keterangan']])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+@password_cli.command('massal')
+@click.option('--kelas', required=True, help='Kelas sasaran (nama kelas persis).')
+@click.option('--mode', type=click.Choice(MODE), default='sementara', show_default=True)
+@click.option('--out', required=True, type=click.Path(dir_okay=False), help='File CSV lembar kredensial.')
+def massal_cmd(kelas, mode, out):
+    """Reset password satu kelas sekaligus dan tulis lembar kredensial."""
+    akun = target(kelas=kelas)
+    if not akun:
+        raise click.ClickException(f"Tidak ada akun siswa di kelas {kelas}.")
+    t0 = time.perf_counter()
+    hasil = reset(akun, mode)
+    dt = time.perf_counter() - t0
+    with open(out, 'w', newline='', encoding='utf-8') as f:
+        f.writelines(lembar_csv(hasil))
+    direset = sum(1 for a in hasil if a['password'])
+    click.echo(f"{direset} dari {len(hasil)} akun kelas {kelas} direset dalam {dt:.2f} detik; lembar: {out}")
@@ -0,0 +1,150 @@
+"""
+Analitik tingkat kelas untuk guru BK (/guru/analytics).
+
+Seluruh data siswa (skor RIASEC, kode top-3, nilai rapor, paket) diambil
+dengan satu query ke DataFrame, lalu diringkas secara vektor dengan pandas:
+rata-rata & sebaran tiap dimensi/mapel, frekuensi kode top-3, komposisi
+paket, dan perbandingan antar kelas. Filter kelas sama dengan dashboard guru
+(bagian nama kelas, lihat `ringkasan.filter_kelas`), dengan kelas gabungan
+users/students seperti di tabel ringkasan. Hasil di-cache per filter kelas dan
+dibuang saat signal `student_changed` menandakan data siswa di kelas yang
+cocok dengan filter itu berubah.
+"""
+import numpy as np
+import pandas as pd
+
+from app import db
+from app.models import User, Student, RiasecResult, ReportScore, Recommendation
+from app.utils import ringkasan, signals
+from app.utils.rekomendasi import PAKET_LABELS
+from app.utils.ttl_cache import TTLCache
+
+DIMENSI = ('R', 'I', 'A', 'S', 'E', 'C')
+KOLOM_RIASEC = [f'skor_{d}' for d in DIMENSI]
+MAPEL = ['matematika', 'fisika', 'kimia', 'biologi', 'ekonomi', 'sosiologi']
+SEMUA = ''  # kunci cache untuk seluruh kelas
+
+_cache = TTLCache('ANALYTICS_CACHE_TTL', 300)  # kelas -> dict hasil
+_kelas_user = {}  # user_id -> kelas, untuk invalidasi per kelas
+
+
+def _frame(kelas=None):
+    query = db.session.query(
+        User.id.label('user_id'), ringkasan.kelas_siswa().label('kelas'), Student.id.label('student_id'),
+        *[getattr(RiasecResult, k).label(k) for k in KOLOM_RIASEC], RiasecResult.top3.label('top3'),
+        *[getattr(ReportScore, m).label(m) for m in MAPEL],
+        Recommendation.paket_prediksi.label('paket')
+    ).outerjoin(Student, Student.id_user == User.id)\
+        .outerjoin(RiasecResult, RiasecResult.id_student == Student.id)\
+        .outerjoin(ReportScore, ReportScore.id_student == Student.id)\
+        .outerjoin(Recommendation, Recommendation.id_student == Student.id)\
+        .filter(User.role == 'siswa')
+    if kelas:
+        query = query.filter(ringkasan.filter_kelas(ringkasan.kelas_siswa(), kelas))
+    df = pd.read_sql(query.statement, db.session.connection())
+    # Satu baris per user (baris student dengan id terkecil)
+    df = df.sort_values('student_id', na_position='last').drop_duplicates('user_id', keep='first')
+    df['kelas'] = df['kelas'].fillna('-')
+    num_cols = KOLOM_RIASEC + MAPEL
+    df[num_cols] = df[num_cols].apply(pd.to_numeric, errors='coerce')
+    return df
+
+
+def _bersih(value):
+    """Ubah NaN/np.* menjadi tipe Python biasa supaya aman untuk template & JSON."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+        return None if isinstance(value, float) and np.isnan(value) else value
+    return value
+
+
+def _statistik(df, cols, labels):
+    agg = df[cols].agg(['count', 'mean', 'std', 'min', 'median', 'max']).T.round(2).astype(object)
+    agg['count'] = agg['count'].astype(int)
+    return [
+        {'nama': label, **{k: _bersih(v) for k, v in row.items()}}
+        for label, (_, row) in zip(labels, agg.iterrows())
+    ]
+
+
+def _frekuensi(series, urutan=None, top=None):
+    counts = series.dropna().value_counts()
+    if urutan is not None:
+        counts = counts.reindex(list(urutan) + [k for k in counts.index if k not in urutan], fill_value=0)
+    if top:
+        counts = counts.head(top)
+    total = int(counts.sum())
+    return [
+        {'label': str(k), 'jumlah': int(v), 'persen': round(v / total * 100, 1) if total else 0.0}
+        for k, v in counts.items()
+    ]
+
+
+def hitung(kelas=None):
+    """Ringkasan analitik satu kelas (atau semua kelas jika kelas kosong)."""
+    df = _frame(kelas)
+    tes = df[df['top3'].notna()]
+    hasil = {
+        'kelas': kelas or None,
+        'jumlah_siswa': int(len(df)),
+        'sudah_tes': int(df['top3'].notna().sum()),
+        'sudah_rapor': int(df[MAPEL].notna().any(axis=1).sum()),
+        'sudah_rekomendasi': int(df['paket'].notna().sum()),
+        'riasec': _statistik(tes, KOLOM_RIASEC, DIMENSI),
+        'rapor': _statistik(df, MAPEL, [m.capitalize() for m in MAPEL]),
+        'top3': _frekuensi(df['top3'], top=10),
+        'dominan': _frekuensi(df['top3'].str[0], urutan=DIMENSI),
+        'paket': _frekuensi(df['paket'], urutan=PAKET_LABELS),
+        'per_kelas': [],
+    }
+
+    if df['kelas'].nunique() > 1:
+        # Perbandingan antar kelas (semua kelas, atau filter yang mencakup beberapa kelas): rata-rata RIASEC/rapor dan komposisi paket per kelas
+        grup = df.groupby('kelas')
+        rata = grup[KOLOM_RIASEC + MAPEL].mean().round(1)
+        jumlah = grup['user_id'].count()
+        paket = pd.crosstab(df['kelas'], df['paket']).reindex(columns=PAKET_LABELS, fill_value=0)
+        paket = paket.reindex(rata.index, fill_value=0)
+        for k in rata.index:
+            hasil['per_kelas'].append({
+                'kelas': k,
+                'jumlah': int(jumlah[k]),
+                'riasec': [_bersih(rata.at[k, c]) for c in KOLOM_RIASEC],
+                'rapor': [_bersih(rata.at[k, m]) for m in MAPEL],
+                'paket': [int(paket.at[k, p]) for p in PAKET_LABELS],
+            })
+
+    for uid, k in zip(df['user_id'].tolist(), df['kelas'].tolist()):
+        _kelas_user[uid] = k
+    return hasil
+
+
+def get(kelas=None):
+    key = kelas or SEMUA
+    hasil = _cache.get(key)
+    if hasil is None:
+        hasil = _cache.set(key, hitung(kelas))
+    return hasil
+
+
+def daftar_kelas():
+    kelas = ringkasan.kelas_siswa()
+    rows = db.session.query(kelas).select_from(User).outerjoin(Student, Student.id_user == User.id)\
+        .filter(User.role == 'siswa', kelas.isnot(None)).distinct().order_by(kelas.asc()).all()
+    return [k for (k,) in rows if k]
+
+
+def invalidate(user_id=None):
+    kelas = _kelas_user.get(user_id) if user_id is not None else None
+    if kelas is None:
+        _cache.clear()
+        return
+    # Semua filter yang mencakup kelas ini (termasuk SEMUA = '')
+    _cache.pop_if(lambda key: key.lower() in kelas.lower())
+
+
+@signals.student_changed.connect
+def _on_student_changed(sender, user_id=None, **kwargs):
+    invalidate(user_id)
@@ -0,0 +1,216 @@
+"""
+Arsip kohort (tahun ajaran) yang sudah lulus.
+
+Semua data siswa satu tahun ajaran dipindah dari tabel aktif ke database
+arsip terpisah (ARSIP_DATABASE_URI, default file SQLite
+instance/arsip.sqlite3) dengan skema tabel yang sama, per potongan
+ARSIP_BATCH_SIZE siswa. Dengan begitu dashboard, ringkasan, dan analitik
+hanya memindai kohort yang masih aktif.
+
+Setiap potongan disalin dulu ke arsip (hapus + insert per primary key, jadi
+aman diulang) dan di-commit, baru kemudian dihapus dari database aktif.
+Jika proses terhenti di tengah, jalankan ulang perintah yang sama.
+
+Data arsip tetap bisa dipakai untuk melatih model: `dataset()` /
+`flask arsip dataset` menggabungkan fitur data aktif dan arsip dalam format
+kolom skrip pelatihan (R..C, BIOLOGI..SOSIOLOGI) plus NISN. Kolom label
+Paket 1..3 sengaja tidak diisi dari `recommendations.paket_prediksi`, karena
+itu keluaran model sendiri, bukan paket yang benar-benar diambil siswa;
+gabungkan paket sebenarnya (data penjurusan sekolah) lewat NISN sebelum
+melatih.
+"""
+import os
+
+import click
+import pandas as pd
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import MetaData, create_engine, delete, func, insert, select
+
+from app import db
+from app.models import Student, User
+from app.utils import kohort, signals
+
+# Urutan induk -> anak (insert arsip); penghapusan di database aktif memakai urutan terbalik
+TABEL_SISWA = ('students', 'riasec_answers', 'riasec_results', 'report_scores', 'recommendations',
+               'recommendation_explanations', 'recommendation_logs', 'shadow_evaluations')
+TABEL_REFERENSI = ('riasec_questions',)
+
+_engine = None
+_engine_uri = None
+
+
+class ArsipError(Exception):
+    pass
+
+
+def database_uri():
+    return current_app.config.get('ARSIP_DATABASE_URI') or \
+        'sqlite:///' + os.path.join(current_app.instance_path, 'arsip.sqlite3')
+
+
+def _tabel(nama):
+    return db.metadata.tables[nama]
+
+
+def engine():
+    """Engine database arsip; tabel dibuat jika belum ada."""
+    global _engine, _engine_uri
+    uri = database_uri()
+    # Bandingkan dengan URI asal, bukan str(_engine.url) yang menyamarkan password
+    if _engine is None or _engine_uri != uri:
+        _engine, _engine_uri = create_engine(uri), uri
+        meta = MetaData()
+        for nama in ('users',) + TABEL_REFERENSI + TABEL_SISWA:
+            _tabel(nama).to_metadata(meta)
+        meta.create_all(_engine)
+    return _engine
+
+
+def _kunci(tabel):
+    return tabel.c.id_student if 'id_student' in tabel.c else tabel.c.id
+
+
+def _salin(conn, tabel, kolom, nilai):
+    """Ganti baris arsip yang kuncinya `nilai` dengan baris dari database aktif."""
+    rows = [dict(r) for r in db.session.execute(select(tabel).where(kolom.in_(nilai))).mappings()]
+    conn.execute(delete(tabel).where(tabel.c[kolom.name].in_(nilai)))
+    if rows:
+        conn.execute(insert(tabel), rows)
+    return len(rows)
+
+
+def _salin_referensi(conn):
+    for nama in TABEL_REFERENSI:
+        tabel = _tabel(nama)
+        rows = [dict(r) for r in db.session.execute(select(tabel)).mappings()]
+        conn.execute(delete(tabel).where(tabel.c.id.in_([r['id'] for r in rows])))
+        if rows:
+            conn.execute(insert(tabel), rows)
+
+
+def pindah(tahun, batch_size=None, echo=None):
+    """
+    Pindahkan seluruh siswa kohort `tahun` ke arsip. Return jumlah siswa.
+    Raise ArsipError untuk tahun yang tidak valid atau masih aktif.
+    """
+    if not kohort.valid(tahun):
+        raise ArsipError(f"Format tahun ajaran salah: {tahun} (contoh: 2024/2025).")
+    if tahun == kohort.aktif():
+        raise ArsipError(f"{tahun} adalah tahun ajaran aktif.")
+    batch_size = batch_size or current_app.config.get('ARSIP_BATCH_SIZE', 500)
+    arsip = engine()
+    with arsip.begin() as conn:
+        _salin_referensi(conn)
+
+    total = 0
+    while True:
+        rows = db.session.query(Student.id, Student.id_user).filter(Student.tahun_ajaran == tahun)\
+            .order_by(Student.id).limit(batch_size).all()
+        if not rows:
+            break
+        ids = [sid for sid, _ in rows]
+        # Hanya akun siswa yang ikut dipindah
+        user_ids = [uid for (uid,) in db.session.query(User.id).filter(
+            User.id.in_([uid for _, uid in rows]), User.role == 'siswa')]
+
+        with arsip.begin() as conn:
+            _salin(conn, _tabel('users'), _tabel('users').c.id, user_ids)
+            for nama in TABEL_SISWA:
+                tabel = _tabel(nama)
+                _salin(conn, tabel, _kunci(tabel), ids)
+
+        for nama in reversed(TABEL_SISWA):
+            tabel = _tabel(nama)
+            db.session.execute(delete(tabel).where(_kunci(tabel).in_(ids)))
+        summary = _tabel('student_summary')
+        db.session.execute(delete(summary).where(summary.c.id_user.in_(user_ids)))
+        db.session.execute(delete(_tabel('users')).where(_tabel('users').c.id.in_(user_ids)))
+        db.session.commit()
+        total += len(ids)
+        if echo:
+            echo(f"{total} siswa {tahun} dipindah ke arsip...")
+
+    if total:
+        # Cache identitas/profil/analitik dan indeks siswa serupa ikut dibuang
+        signals.kirim_student_changed(step='arsip')
+    return total
+
+
+def jumlah_per_tahun():
+    """{'aktif': {tahun: n}, 'arsip': {tahun: n}}"""
+    hasil = {'aktif': dict(db.session.query(Student.tahun_ajaran, func.count(Student.id))
+                           .group_by(Student.tahun_ajaran).all()), 'arsip': {}}
+    students = _tabel('students')
+    with engine().connect() as conn:
+        hasil['arsip'] = dict(conn.execute(select(students.c.tahun_ajaran, func.count())
+                                           .group_by(students.c.tahun_ajaran)).all())
+    return hasil
+
+
+def _query_dataset():
+    s, res, rapor = (_tabel(n) for n in ('students', 'riasec_results', 'report_scores'))
+    kolom = [s.c.tahun_ajaran, s.c.nisn.label('NISN')] + [res.c[f'skor_{d}'].label(d) for d in 'RIASEC'] + \
+        [rapor.c[m].label(m.upper()) for m in ('biologi', 'fisika', 'kimia', 'matematika', 'ekonomi', 'sosiologi')]
+    return select(*kolom).join(res, res.c.id_student == s.c.id)\
+        .join(rapor, rapor.c.id_student == s.c.id)
+
+
+def dataset(sertakan_aktif=True):
+    """DataFrame fitur pelatihan dari arsip (dan database aktif), tanpa label paket."""
+    frames = []
+    with engine().connect() as conn:
+        frames.append(pd.read_sql(_query_dataset(), conn))
+    if sertakan_aktif:
+        frames.append(pd.read_sql(_query_dataset(), db.session.connection()))
+    return pd.concat(frames, ignore_index=True)
+
+
+arsip_cli = AppGroup('arsip', help='Arsip kohort per tahun ajaran.')
+
+
+@arsip_cli.command('status')
+def status_cmd():
+    """Jumlah siswa per tahun ajaran di database aktif dan arsip."""
+    jumlah = jumlah_per_tahun()
+    click.echo(f"Tahun ajaran aktif: {kohort.aktif()} | arsip: {database_uri()}")
+    for tahun in sorted(set(jumlah['aktif']) | set(jumlah['arsip'])):
+        click.echo(f"{tahun}: {jumlah['aktif'].get(tahun, 0)} aktif, {jumlah['arsip'].get(tahun, 0)} arsip")
+
+
+@arsip_cli.command('tandai')
+@click.argument('tahun')
+@click.option('--kelas', multiple=True, required=True, help='Kelas angkatan ini (boleh diulang).')
+def tandai_cmd(tahun, kelas):
+    """Set tahun ajaran siswa di kelas tertentu (mis. angkatan lama sebelum diarsip)."""
+    if not kohort.valid(tahun):
+        raise click.ClickException(f"Format tahun ajaran salah: {tahun} (contoh: 2024/2025).")
+    n = Student.query.filter(Student.kelas.in_(kelas)).update({'tahun_ajaran': tahun}, synchronize_session=False)
+    db.session.commit()
+    click.echo(f"{n} siswa ditandai {tahun}.")
+
+
+@arsip_cli.command('pindah')
+@click.argument('tahun')
+@click.option('--batch-size', default=None, type=int, help='Siswa per transaksi (default ARSIP_BATCH_SIZE).')
+def pindah_cmd(tahun, batch_size):
+    """Pindahkan kohort yang sudah lulus ke database arsip (aman diulang jika terhenti)."""
+    try:
+        n = pindah(tahun, batch_size, echo=click.echo)
+    except ArsipError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Selesai: {n} siswa {tahun} ada di arsip {database_uri()}.")
+
+
+@arsip_cli.command('dataset')
+@click.option('--out', required=True, type=click.Path(dir_okay=False), help='File CSV tujuan.')
+@click.option('--tanpa-aktif', is_flag=True, help='Hanya data arsip.')
+def dataset_cmd(out, tanpa_aktif):
+    """
+    Ekspor fitur pelatihan (arsip + aktif) untuk app/utils/model_rekomendasi_rf.py.
+    Tambahkan kolom Paket 1..3 dari paket sebenarnya (per NISN) sebelum melatih.
+    """
+    df = dataset(sertakan_aktif=not tanpa_aktif)
+    df.to_csv(out, index=False)
+    click.echo(f"{len(df)} baris ditulis ke {out} ({df['tahun_ajaran'].nunique()} tahun ajaran). "
+               "Kolom Paket 1..3 belum ada: isi dari paket yang benar-benar diambil siswa, bukan hasil prediksi.")
@@ -0,0 +1,320 @@
+"""
+Aset statis yang di-build sendiri (pengganti Tailwind CDN runtime).
+
+`flask assets build` menyusun CSS Tailwind yang sudah di-purge & minify dari
+template, mengunduh JS vendor (Chart.js, html2pdf) versi terkunci, lalu
+menyalin semuanya ke app/static/dist dengan nama ber-hash isi file dan
+menulis dist/manifest.json. File di dist/ dikirim dengan Cache-Control satu
+tahun + immutable karena namanya berubah setiap isinya berubah.
+
+`flask assets images` membuat varian AVIF/WebP/PNG beberapa lebar dari
+gambar di app/static/img (dist/images.json). Template memakai
+`responsive_img('img/logo.png', sizes='32px', ...)` yang menghasilkan
+<picture> + srcset, atau `image_url('img/logo.png', 160)` untuk satu URL.
+
+Di template pakai `asset_url('js/chart.js')` atau `asset_tag(...)`. Selama
+build belum dijalankan, helper kembali ke URL CDN lama / PNG asli supaya
+tampilan tetap jalan di lingkungan pengembangan.
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import urllib.request
+
+import click
+from flask import current_app, request, url_for
+from flask.cli import AppGroup
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, features
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+TAILWIND_VERSION = 'v3.4.17'
+
+# nama logis -> sumber vendor (versi dikunci) dan URL CDN cadangan
+VENDOR_JS = {
+    'js/chart.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js',
+    'js/html2pdf.js': 'https://cdnjs.cloudflare.com/ajax/libs/html2pdf.js/0.10.1/html2pdf.bundle.min.js',
+}
+CDN_FALLBACK = {
+    'css/app.css': 'https://cdn.tailwindcss.com',
+    'js/chart.js': 'https://cdn.jsdelivr.net/npm/chart.js',
+    'js/html2pdf.js': VENDOR_JS['js/html2pdf.js'],
+}
+
+DIST_DIR = 'dist'
+CACHE_MAX_AGE = 365 * 24 * 3600
+
+# Lebar varian gambar (px). Logo tampil 32-80px, ilustrasi hero sampai ~512px.
+IMAGE_WIDTHS = (48, 96, 192, 384, 768, 1024)
+# format -> (tipe MIME, opsi simpan Pillow); urutan = prioritas di <picture>
+IMAGE_FORMATS = {
+    'avif': ('image/avif', {'quality': 50, 'speed': 6}),
+    'webp': ('image/webp', {'quality': 80, 'method': 6}),
+    'png': ('image/png', {'optimize': True}),
+}
+
+_manifest = {}
+_images = {}
+
+
+def _static_path(app, *parts):
+    return os.path.join(app.static_folder, *parts)
+
+
+def load_manifest(app):
+    global _manifest
+    path = _static_path(app, DIST_DIR, 'manifest.json')
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as fh:
+            _manifest = json.load(fh)
+    else:
+        _manifest = {}
+    return _manifest
+
+
+def load_images(app):
+    global _images
+    path = _static_path(app, DIST_DIR, 'images.json')
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as fh:
+            _images = json.load(fh)
+    else:
+        _images = {}
+    return _images
+
+
+def asset_url(name):
+    """url_for untuk aset ber-hash; None jika belum di-build dan tidak ada cadangan CDN."""
+    hashed = _manifest.get(name)
+    if hashed:
+        return url_for('static', filename=hashed)
+    return CDN_FALLBACK.get(name)
+
+
+def asset_tag(name):
+    """Tag <link>/<script> lengkap untuk sebuah aset."""
+    if name.endswith('.css'):
+        if name in _manifest:
+            return Markup(f'<link rel="stylesheet" href="{asset_url(name)}" />')
+        # Tailwind CDN adalah compiler JIT berbentuk script
+        return Markup(f'<script src="{CDN_FALLBACK[name]}"></script>')
+    return Markup(f'<script src="{asset_url(name)}"></script>')
+
+
+def image_url(name, width=None, fmt='png'):
+    """URL varian terkecil yang lebarnya >= width (default: varian terbesar); PNG asli jika belum di-build."""
+    variants = _images.get(name, {}).get('variants', {}).get(fmt)
+    if not variants:
+        return url_for('static', filename=name)
+    pilih = variants[-1]
+    if width:
+        pilih = next((v for v in variants if v[0] >= width), pilih)
+    return url_for('static', filename=pilih[1])
+
+
+def _srcset(variants):
+    return ', '.join(f"{url_for('static', filename=rel)} {w}w" for w, rel, _ in variants)
+
+
+def responsive_img(name, alt='', sizes='100vw', **attrs):
+    """
+    <picture> dengan sumber AVIF/WebP dan <img> PNG ber-srcset. Atribut
+    tambahan (class, loading, dst.) dipasang di <img>.
+    """
+    attr_html = ''.join(f' {k.rstrip("_")}="{escape(v)}"' for k, v in attrs.items())
+    info = _images.get(name)
+    if not info:
+        return Markup(f'<img src="{url_for("static", filename=name)}" alt="{escape(alt)}"{attr_html} />')
+    variants = info['variants']
+    sources = ''.join(
+        f'<source type="{IMAGE_FORMATS[fmt][0]}" srcset="{_srcset(variants[fmt])}" sizes="{escape(sizes)}" />'
+        for fmt in IMAGE_FORMATS if fmt != 'png' and variants.get(fmt)
+    )
+    png = variants['png']
+    return Markup(
+        f'<picture>{sources}<img src="{url_for("static", filename=png[-1][1])}" '
+        f'srcset="{_srcset(png)}" sizes="{escape(sizes)}" alt="{escape(alt)}"{attr_html} /></picture>'
+    )
+
+
+def _cache_forever(response):
+    if request.endpoint == 'static' and (request.view_args or {}).get('filename', '').startswith(f'{DIST_DIR}/'):
+        response.cache_control.public = True
+        response.cache_control.max_age = CACHE_MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    return response
+
+
+def init_app(app):
+    load_manifest(app)
+    load_images(app)
+    app.jinja_env.globals.update(asset_url=asset_url, asset_tag=asset_tag,
+                                 image_url=image_url, responsive_img=responsive_img)
+    app.after_request(_cache_forever)
+
+
+def _hashed_rel(name, content):
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    folder, filename = os.path.split(name)
+    stem, ext = os.path.splitext(filename)
+    return '/'.join(p for p in (DIST_DIR, folder, f'{stem}.{digest}{ext}') if p)
+
+
+def _write_dist(app, rel, content):
+    target = _static_path(app, *rel.split('/'))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as fh:
+        fh.write(content)
+
+
+def _remove_stale(app, old, new):
+    for stale in set(old) - set(new):
+        path = _static_path(app, *stale.split('/'))
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def fingerprint(app, source, name):
+    """Salin `source` ke dist/ dengan hash isi di nama file. Return path relatif static."""
+    with open(source, 'rb') as fh:
+        content = fh.read()
+    rel = _hashed_rel(name, content)
+    _write_dist(app, rel, content)
+    return rel
+
+
+def build_css(app, output):
+    root = os.path.dirname(app.root_path)
+    cmd = app.config.get('TAILWIND_BIN') or 'tailwindcss'
+    env = dict(os.environ)
+    env.setdefault('TAILWINDCSS_VERSION', TAILWIND_VERSION)  # dipakai pytailwindcss
+    subprocess.run(
+        cmd.split() + ['-c', os.path.join(root, 'tailwind.config.js'),
+                       '-i', _static_path(app, 'src', 'app.css'),
+                       '-o', output, '--minify'],
+        check=True, cwd=root, env=env
+    )
+
+
+def fetch_vendor(app, name, url):
+    """Unduh JS vendor sekali ke app/static/vendor (tidak ikut di-commit)."""
+    path = _static_path(app, 'vendor', os.path.basename(name))
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=60) as resp, open(path, 'wb') as fh:
+            shutil.copyfileobj(resp, fh)
+    return path
+
+
+assets_cli = AppGroup('assets', help='Build aset statis.')
+
+
+@assets_cli.command('build')
+@click.option('--skip-css', is_flag=True, help='Lewati kompilasi Tailwind (pakai CSS di manifest lama).')
+def build_cmd(skip_css):
+    """Build CSS Tailwind + JS vendor ke app/static/dist dengan nama ber-hash."""
+    app = current_app._get_current_object()
+    old = dict(load_manifest(app))
+    manifest = {}
+
+    if skip_css and 'css/app.css' in old:
+        manifest['css/app.css'] = old['css/app.css']
+    elif not skip_css:
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, 'app.css')
+            build_css(app, out)
+            manifest['css/app.css'] = fingerprint(app, out, 'css/app.css')
+
+    for name, url in VENDOR_JS.items():
+        manifest[name] = fingerprint(app, fetch_vendor(app, name, url), name)
+
+    # Hapus file ber-hash lama yang tidak dirujuk manifest baru
+    _remove_stale(app, old.values(), manifest.values())
+
+    with open(_static_path(app, DIST_DIR, 'manifest.json'), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    load_manifest(app)
+    for name, rel in sorted(manifest.items()):
+        size = os.path.getsize(_static_path(app, *rel.split('/')))
+        click.echo(f"{name:<16} -> {rel} ({size / 1024:.1f} KB)")
+
+
+def _encode(img, fmt, options):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt.upper(), **options)
+    return buf.getvalue()
+
+
+def build_image(app, name, widths=IMAGE_WIDTHS, formats=None):
+    """Buat varian satu gambar. Return entri images.json: ukuran asli + daftar (lebar, path) per format."""
+    formats = formats or list(IMAGE_FORMATS)
+    source = _static_path(app, *name.split('/'))
+    with Image.open(source) as im:
+        im.load()
+        orig_w, orig_h = im.size
+        targets = sorted({min(w, orig_w) for w in widths})
+        entry = {'width': orig_w, 'height': orig_h, 'bytes': os.path.getsize(source),
+                 'variants': {fmt: [] for fmt in formats}}
+        for w in targets:
+            h = max(1, round(orig_h * w / orig_w))
+            resized = im if w == orig_w else im.resize((w, h), Image.LANCZOS)
+            stem, _ = os.path.splitext(name)
+            for fmt in formats:
+                content = _encode(resized, fmt, IMAGE_FORMATS[fmt][1])
+                rel = _hashed_rel(f'{stem}.{w}.{fmt}', content)
+                _write_dist(app, rel, content)
+                entry['variants'][fmt].append([w, rel, len(content)])
+    return entry
+
+
+@assets_cli.command('images')
+@click.option('--widths', default=None, help='Daftar lebar dipisah koma, mis. 96,192,384.')
+def images_cmd(widths):
+    """Buat varian AVIF/WebP/PNG beberapa lebar untuk gambar di app/static/img dan tampilkan penghematan."""
+    if not PIL_AVAILABLE:
+        raise click.ClickException("Pillow belum terpasang: pip install Pillow")
+    app = current_app._get_current_object()
+    widths = tuple(int(w) for w in widths.split(',')) if widths else IMAGE_WIDTHS
+    formats = [fmt for fmt in IMAGE_FORMATS if fmt == 'png' or features.check(fmt)]
+    for fmt in set(IMAGE_FORMATS) - set(formats):
+        click.echo(f"Peringatan: Pillow tanpa dukungan {fmt.upper()}, format ini dilewati.")
+
+    old = load_images(app)
+    images = {}
+    img_dir = _static_path(app, 'img')
+    for filename in sorted(os.listdir(img_dir)):
+        if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+            images[f'img/{filename}'] = build_image(app, f'img/{filename}', widths, formats)
+
+    def _paths(data):
+        return [v[1] for e in data.values() for vs in e['variants'].values() for v in vs]
+    _remove_stale(app, _paths(old), _paths(images))
+    with open(_static_path(app, DIST_DIR, 'images.json'), 'w', encoding='utf-8') as fh:
+        json.dump(images, fh, indent=2, sort_keys=True)
+    load_images(app)
+
+    # Laporan: ukuran asli vs varian terbesar & varian terkecil tiap format
+    click.echo(f"{'Gambar':<28}{'Asli':>10}" + ''.join(f"{fmt.upper() + ' maks':>12}{fmt.upper() + ' min':>11}" for fmt in formats))
+    total_asli = 0
+    total_maks = {fmt: 0 for fmt in formats}
+    for name, entry in images.items():
+        total_asli += entry['bytes']
+        row = f"{name:<28}{entry['bytes'] / 1024:>8.0f}KB"
+        for fmt in formats:
+            vs = entry['variants'][fmt]
+            total_maks[fmt] += vs[-1][2]
+            row += f"{vs[-1][2] / 1024:>10.1f}KB{vs[0][2] / 1024:>9.1f}KB"
+        click.echo(row)
+    for fmt in formats:
+        hemat = total_asli - total_maks[fmt]
+        click.echo(f"{fmt.upper()}: {total_asli / 1048576:.2f} MB -> {total_maks[fmt] / 1048576:.2f} MB pada lebar maksimum "
+                   f"(hemat {hemat / 1048576:.2f} MB, {hemat / total_asli * 100 if total_asli else 0:.0f}%)")
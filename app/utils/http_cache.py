@@ -0,0 +1,150 @@
+"""
+Kompresi respons dan conditional GET.
+
+`init_app` memasang after_request yang mengompres respons teks (HTML, JSON,
+CSS, JS, CSV) dengan brotli jika paket `brotli` terpasang dan diterima
+browser, selain itu gzip. Respons streaming (ZIP laporan kelas, SSE, ekspor
+bertahap) tidak disentuh. File statis yang dikompres di-cache di memori
+berdasarkan ETag-nya supaya tidak dikompres ulang setiap request.
+
+`conditional(parts, render)` dipakai view yang isinya hanya bergantung pada
+data tersimpan milik user: ETag lemah dihitung dari `parts`, dan jika cocok
+dengan If-None-Match browser, view membalas 304 tanpa me-render template.
+Data yang bisa berubah saat aplikasi berjalan tanpa deploy (mis. katalog
+karir yang diubah admin, lihat `karir.versi()`) harus ikut masuk `parts`;
+build token hanya mencakup template dan manifest aset.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app, make_response, request, session
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESSIBLE = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+}
+STATIC_CACHE_SIZE = 64
+
+_static_cache = OrderedDict()
+_static_lock = threading.Lock()
+_build_token = ''
+
+
+def _pilih_encoding():
+    accept = request.accept_encodings
+    if BROTLI_AVAILABLE and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=current_app.config.get('COMPRESS_BROTLI_QUALITY', 5))
+    return gzip.compress(data, compresslevel=current_app.config.get('COMPRESS_LEVEL', 6), mtime=0)
+
+
+def _static_body(response, encoding):
+    """Isi file statis terkompresi, di-cache per (ETag, encoding)."""
+    etag, _ = response.get_etag()
+    key = (request.path, etag, encoding)
+    with _static_lock:
+        body = _static_cache.get(key)
+        if body is not None:
+            _static_cache.move_to_end(key)
+    # File dibaca dulu (walau cache hit) supaya handle file dari send_file tertutup
+    response.direct_passthrough = False
+    raw = response.get_data()
+    if body is None:
+        body = _compress(raw, encoding)
+        with _static_lock:
+            _static_cache[key] = body
+            while len(_static_cache) > STATIC_CACHE_SIZE:
+                _static_cache.popitem(last=False)
+    return raw, body
+
+
+def compress_response(response):
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    if response.mimetype not in COMPRESSIBLE:
+        return response
+    is_static = response.direct_passthrough and request.endpoint == 'static'
+    if response.is_streamed and not is_static:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _pilih_encoding()
+    if encoding is None:
+        return response
+
+    if is_static:
+        raw, body = _static_body(response, encoding)
+    else:
+        raw = response.get_data()
+        body = None
+    if len(raw) < current_app.config.get('COMPRESS_MIN_SIZE', 500):
+        return response
+    if body is None:
+        body = _compress(raw, encoding)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    # Representasi terkompres berbeda byte-nya: ETag kuat diturunkan jadi lemah
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _hitung_build_token(app):
+    """Token per deploy: berubah jika template atau manifest aset berubah, sama di semua worker."""
+    h = hashlib.sha256()
+    folders = [os.path.join(app.root_path, app.template_folder), os.path.join(app.static_folder, 'dist')]
+    for folder in folders:
+        for root, _, files in os.walk(folder):
+            for name in sorted(files):
+                if name.endswith(('.html', '.json')):
+                    path = os.path.join(root, name)
+                    h.update(f"{path}:{os.path.getmtime(path)}".encode())
+    return h.hexdigest()[:16]
+
+
+def make_etag(parts):
+    payload = json.dumps([_build_token, parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def conditional(parts, render):
+    """
+    Balas 304 jika ETag dari `parts` cocok dengan If-None-Match; selain itu
+    panggil `render()` dan pasang ETag. Tidak membalas 304 selama masih ada
+    pesan flash yang belum ditampilkan.
+    """
+    etag = make_etag(parts)
+    if request.if_none_match.contains_weak(etag) and not session.get('_flashes'):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag, weak=True)
+    # Halaman milik satu user: boleh disimpan browser tapi wajib divalidasi ulang
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def init_app(app):
+    global _build_token
+    _build_token = _hitung_build_token(app)
+    app.after_request(compress_response)
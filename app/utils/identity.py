@@ -0,0 +1,195 @@
+"""
+Cache identitas user yang login.
+
+`load_user` Flask-Login dan `get_or_create_student` dipanggil di hampir
+setiap request. Modul ini menyimpan snapshot ringan (id, role, username,
+nama, nisn, kelas, dan data student) per user di memori proses selama
+IDENTITY_CACHE_TTL detik, sehingga jalur umum tidak perlu query identitas.
+
+Snapshot dihapus lewat `invalidate(user_id)` setiap kali user diedit,
+dihapus, atau password-nya diganti. Cache bersifat per proses: worker lain
+baru melihat perubahan setelah TTL habis, karena itu TTL dibuat pendek.
+
+Satu user punya tepat satu baris students (constraint unik id_user).
+`ensure_student` membuatnya dengan upsert dialek dalam satu round-trip,
+aman walau dipanggil bersamaan dari beberapa tab/worker.
+"""
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask_login import UserMixin
+from sqlalchemy import func, insert
+
+from app import db
+from app.models import User, Student
+from app.utils import signals
+from app.utils.ttl_cache import TTLCache
+
+_cache = TTLCache('IDENTITY_CACHE_TTL', 60)  # user_id -> CachedUser
+
+
+@dataclass(frozen=True)
+class CachedStudent:
+    """Pengganti baris Student untuk view yang hanya membaca id/nama/nisn/kelas."""
+    id: int
+    nama: str
+    nisn: Optional[str]
+    kelas: Optional[str]
+
+
+@dataclass(frozen=True)
+class CachedUser(UserMixin):
+    """Snapshot read-only dari users (+ students) untuk current_user."""
+    id: int
+    username: str
+    role: str
+    nama: Optional[str]
+    nisn: Optional[str]
+    kelas: Optional[str]
+    student: Optional[CachedStudent] = None
+
+    @property
+    def student_id(self):
+        return self.student.id if self.student else None
+
+
+def _query(user_id):
+    row = db.session.query(User, Student)\
+        .outerjoin(Student, Student.id_user == User.id)\
+        .filter(User.id == user_id)\
+        .order_by(Student.id.asc())\
+        .first()
+    if row is None:
+        return None
+    u, s = row
+    student = CachedStudent(id=s.id, nama=s.nama, nisn=s.nisn, kelas=s.kelas) if s else None
+    return CachedUser(id=u.id, username=u.username, role=u.role,
+                      nama=u.nama, nisn=u.nisn, kelas=u.kelas, student=student)
+
+
+def load(user_id):
+    """Snapshot user dari cache, atau satu query join jika belum ada/kedaluwarsa."""
+    user = _cache.get(user_id)
+    if user is None:
+        user = _query(user_id)
+        if user is None:
+            return None
+        _cache.set(user_id, user)
+    return user
+
+
+def ensure_student(user_id, nama, nisn=None, kelas=None):
+    """
+    Insert-or-fetch baris student milik user secara atomik. Return id student
+    (baris baru atau yang sudah ada). Belum di-commit.
+    """
+    values = dict(id_user=user_id, nama=nama, nisn=nisn, kelas=kelas)
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(Student).values(**values)
+        # Baris sudah ada: LAST_INSERT_ID(id) membuat lastrowid = id baris lama
+        stmt = stmt.on_duplicate_key_update(id=func.last_insert_id(Student.id))
+        return db.session.execute(stmt).lastrowid
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(Student).values(**values)
+        # DO UPDATE (tanpa perubahan) supaya RETURNING juga mengembalikan baris lama
+        stmt = stmt.on_conflict_do_update(index_elements=['id_user'], set_={'id_user': stmt.excluded.id_user})
+        return db.session.execute(stmt.returning(Student.id)).scalar_one()
+    # Dialek lain: insert biasa di savepoint, fallback baca jika sudah ada
+    try:
+        with db.session.begin_nested():
+            return db.session.execute(insert(Student).values(**values)).inserted_primary_key[0]
+    except Exception:
+        return db.session.query(Student.id).filter_by(id_user=user_id).scalar()
+
+
+def invalidate(user_id):
+    _cache.pop(int(user_id))
+
+
+def clear():
+    _cache.clear()
+
+
+@signals.student_changed.connect
+def _on_student_changed(sender, user_id=None, step=None, **kwargs):
+    # Baris student baru dibuat: snapshot lama masih tanpa data student
+    if step == 'student' and user_id is not None:
+        invalidate(user_id)
+
+
+student_cli = AppGroup('student', help='Utilitas baris students.')
+
+
+@student_cli.command('hammer')
+@click.option('--threads', default=32, show_default=True)
+@click.option('--users', 'jumlah_user', default=10, show_default=True)
+@click.option('--putaran', default=5, show_default=True)
+def hammer_cmd(threads, jumlah_user, putaran):
+    """
+    Uji konkurensi ensure_student: banyak thread membuat student untuk user
+    yang sama sekaligus; harus tetap tepat satu baris per user. User uji
+    dihapus lagi setelahnya.
+    """
+    app = current_app._get_current_object()
+    tag = uuid.uuid4().hex[:8]
+    users = [User(username=f'hammer-{tag}-{i}', password='!', role='siswa', nama=f'Hammer {i}')
+             for i in range(jumlah_user)]
+    db.session.add_all(users)
+    db.session.commit()
+    user_ids = [u.id for u in users]
+
+    hasil, errors, lock = {uid: set() for uid in user_ids}, [], threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def kerja():
+        barrier.wait()
+        for _ in range(putaran):
+            for uid in user_ids:
+                with app.app_context():
+                    try:
+                        sid = ensure_student(uid, f'Hammer {uid}')
+                        db.session.commit()
+                        with lock:
+                            hasil[uid].add(sid)
+                    except Exception as e:
+                        db.session.rollback()
+                        with lock:
+                            errors.append(repr(e))
+
+    workers = [threading.Thread(target=kerja) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    dt = time.perf_counter() - t0
+
+    try:
+        per_user = dict(db.session.query(Student.id_user, func.count(Student.id))
+                        .filter(Student.id_user.in_(user_ids)).group_by(Student.id_user).all())
+        ganda = {uid: n for uid, n in per_user.items() if n != 1}
+        beda_id = {uid: ids for uid, ids in hasil.items() if len(ids) != 1}
+        panggilan = threads * putaran * jumlah_user
+        click.echo(f"{panggilan} panggilan dari {threads} thread dalam {dt:.2f} detik "
+                   f"({panggilan / dt:.0f}/detik), {len(errors)} error")
+        for e in errors[:5]:
+            click.echo(f"  {e}")
+        if ganda or beda_id or len(per_user) != jumlah_user:
+            raise click.ClickException(f"GAGAL: baris ganda {ganda}, id berbeda {beda_id}")
+        click.echo(f"OK: tepat satu baris student untuk setiap {jumlah_user} user.")
+    finally:
+        db.session.query(Student).filter(Student.id_user.in_(user_ids)).delete(synchronize_session=False)
+        db.session.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.session.commit()
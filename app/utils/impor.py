@@ -0,0 +1,342 @@
+"""
+Import data siswa bertahap (chunked) dengan checkpoint.
+
+File unggahan disimpan ke IMPORT_UPLOAD_DIR (nama = sha256 isinya) lalu
+dibaca per potongan: CSV lewat `pd.read_csv(chunksize=...)`, XLSX lewat
+iterasi openpyxl read-only. Validasi, cek duplikat, dan insert berjalan per
+potongan IMPORT_CHUNK_SIZE baris; checkpoint `ImportJob.rows_done` ikut
+di-commit dalam transaksi yang sama dengan datanya, jadi potongan tersimpan
+utuh atau tidak sama sekali. Baris yang melebihi panjang kolom database
+dihitung gagal saat validasi; jika insert satu potongan tetap ditolak
+database, potongan itu diulang per baris (savepoint) sehingga hanya baris
+bermasalah yang dihitung gagal dan checkpoint tetap maju.
+
+Job yang terhenti di tengah (worker mati, timeout, error) bisa dilanjutkan
+dari checkpoint: unggah ulang file yang sama, klik "Lanjutkan" di halaman
+import, atau `flask impor lanjut <id>`.
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+import click
+import pandas as pd
+from flask import current_app
+from flask.cli import AppGroup
+from openpyxl import load_workbook
+from sqlalchemy import or_, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import User, Student, ImportJob
+from app.utils import passwords, signals
+
+REQUIRED_COLS = ['nama', 'nisn', 'kelas']
+EKSTENSI = ('.csv', '.xlsx', '.xls')
+
+
+def _panjang_maks(kolom):
+    # Nilai yang sama ditulis ke users dan students: pakai batas yang lebih pendek
+    return min(t.c[kolom].type.length for t in (User.__table__, Student.__table__) if kolom in t.c)
+
+
+PANJANG_MAKS = {k: _panjang_maks(k) for k in ('nama', 'nisn', 'kelas', 'username', 'role')}
+
+
+class ImportJobError(Exception):
+    """Kesalahan format file yang pesannya aman ditampilkan ke admin."""
+
+
+def upload_dir():
+    path = current_app.config.get('IMPORT_UPLOAD_DIR') or os.path.join(current_app.instance_path, 'imports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _ext(filename):
+    return os.path.splitext(filename.lower())[1]
+
+
+def simpan_upload(stream, filename):
+    """Salin file ke IMPORT_UPLOAD_DIR per blok sambil menghitung sha256. Return (hash, path)."""
+    h = hashlib.sha256()
+    tmp = os.path.join(upload_dir(), f'.upload-{os.getpid()}-{id(stream)}')
+    with open(tmp, 'wb') as out:
+        for block in iter(lambda: stream.read(1 << 20), b''):
+            h.update(block)
+            out.write(block)
+    digest = h.hexdigest()
+    path = os.path.join(upload_dir(), digest + _ext(filename))
+    os.replace(tmp, path)
+    return digest, path
+
+
+def buat_job(stream, filename, user_id=None):
+    """
+    Simpan file dan kembalikan ImportJob-nya. File yang sama dengan job yang
+    belum selesai memakai job itu (dilanjutkan dari checkpoint).
+    """
+    digest, path = simpan_upload(stream, filename)
+    job = ImportJob.query.filter(ImportJob.file_hash == digest, ImportJob.status != 'selesai')\
+        .order_by(ImportJob.id.desc()).first()
+    if job is None:
+        job = ImportJob(filename=filename, file_hash=digest, file_path=path,
+                        status='menunggu', created_by=user_id)
+        db.session.add(job)
+        db.session.commit()
+    return job
+
+
+def _hapus(job):
+    """Hapus salinan file job (sudah selesai atau formatnya ditolak)."""
+    if os.path.exists(job.file_path):
+        os.remove(job.file_path)
+
+
+# ---------- pembaca file per potongan ----------
+
+def _teks(value):
+    """Nilai sel -> string bersih ('' untuk kosong); angka bulat Excel tanpa '.0'."""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ''
+        if value.is_integer():
+            value = int(value)
+    return str(value).strip()
+
+
+def _header(cols):
+    header = [_teks(c).lower() for c in cols]
+    missing = [c for c in REQUIRED_COLS if c not in header]
+    if missing:
+        raise ImportJobError(f'Format file salah. Kolom wajib: {", ".join(missing)} tidak ditemukan.')
+    return header
+
+
+def _chunks_csv(path, skip, size):
+    with open(path, 'rb') as f:
+        header = _header(pd.read_csv(f, dtype=str, nrows=0).columns)
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=size,
+                         skiprows=range(1, skip + 1))
+    with reader:
+        for df in reader:
+            df.columns = header
+            yield df.to_dict('records')
+
+
+def _chunks_xlsx(path, skip, size):
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        header = _header(next(ws.iter_rows(max_row=1, values_only=True), ()))
+        batch = []
+        for values in ws.iter_rows(min_row=skip + 2, values_only=True):
+            batch.append(dict(zip(header, values)))
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        wb.close()
+
+
+def _chunks_xls(path, skip, size):
+    # Format .xls lama tidak didukung openpyxl; dibaca utuh lalu dipotong
+    df = pd.read_excel(path, dtype=str)
+    df.columns = _header(df.columns)
+    rows = df.iloc[skip:].to_dict('records')
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def baca_chunks(path, skip=0, size=500):
+    """Potongan baris (list of dict, kolom huruf kecil) mulai dari baris data ke-`skip`."""
+    ext = _ext(path)
+    if ext == '.csv':
+        return _chunks_csv(path, skip, size)
+    if ext == '.xlsx':
+        return _chunks_xlsx(path, skip, size)
+    return _chunks_xls(path, skip, size)
+
+
+# ---------- validasi & insert ----------
+
+def _parse(row):
+    """Baris file -> dict user baru, atau None jika nama/NISN kosong."""
+    nama = _teks(row.get('nama'))
+    nisn = _teks(row.get('nisn'))
+    if not nisn or not nama:
+        return None
+    return {
+        'nama': nama,
+        'nisn': nisn,
+        'kelas': _teks(row.get('kelas')),
+        # Username & password default = NISN, bisa di-override kolom file
+        'username': _teks(row.get('username')) or nisn,
+        'password': _teks(row.get('password')) or nisn,
+        'role': _teks(row.get('role')).lower() or 'siswa',
+    }
+
+
+def _valid(d):
+    return all(len(d[k] or '') <= n for k, n in PANJANG_MAKS.items())
+
+
+def _insert(data):
+    """Insert user (+ baris students untuk siswa) dari dict yang sudah di-hash. Return list User."""
+    users = [User(username=d['username'], password=d['hash'], role=d['role'],
+                  nama=d['nama'], nisn=d['nisn'], kelas=d['kelas'])
+             for d in data]
+    db.session.add_all(users)
+    db.session.flush()  # dapat ID user
+    db.session.add_all([Student(id_user=u.id, nama=u.nama, nisn=u.nisn, kelas=u.kelas)
+                        for u in users if u.role == 'siswa'])
+    db.session.flush()
+    return users
+
+
+def _proses_chunk(job, rows):
+    """Validasi + insert satu potongan dan majukan checkpoint, dalam satu transaksi."""
+    parsed = [d for d in map(_parse, rows) if d]
+    data = [d for d in parsed if _valid(d)]
+    gagal = len(parsed) - len(data)
+    nisns = {d['nisn'] for d in data}
+    usernames = {d['username'] for d in data}
+    # Cek duplikat ke database cukup satu query per potongan
+    existing = db.session.query(User.nisn, User.username)\
+        .filter(or_(User.nisn.in_(nisns), User.username.in_(usernames))).all() if data else []
+    seen_nisn = {n for n, _ in existing if n}
+    seen_username = {u for _, u in existing}
+
+    baru = []
+    for d in data:
+        if d['nisn'] in seen_nisn or d['username'] in seen_username:
+            gagal += 1
+            continue
+        seen_nisn.add(d['nisn'])
+        seen_username.add(d['username'])
+        baru.append(d)
+
+    for d, h in zip(baru, passwords.hash_many([d['password'] for d in baru])):
+        d['hash'] = h
+    try:
+        with db.session.begin_nested():
+            users = _insert(baru)
+    except SQLAlchemyError:
+        # Ada baris yang ditolak database: ulang per baris supaya potongan tetap bisa di-commit
+        users = []
+        for d in baru:
+            try:
+                with db.session.begin_nested():
+                    users += _insert([d])
+            except SQLAlchemyError as e:
+                gagal += 1
+                current_app.logger.warning("Import #%s: baris NISN %s ditolak: %s", job.id, d['nisn'], e)
+
+    job.rows_done += len(rows)
+    job.success_count += len(users)
+    job.error_count += gagal
+    job.updated_at = datetime.now()
+    db.session.commit()
+
+
+def _klaim(job):
+    """
+    Tandai job 'berjalan' secara atomik. Gagal jika job sudah selesai atau
+    sedang dijalankan proses lain yang masih hidup (updated_at belum basi).
+    """
+    basi = datetime.now() - timedelta(seconds=current_app.config.get('IMPORT_STALE_SECONDS', 300))
+    result = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job.id, ImportJob.status != 'selesai',
+               or_(ImportJob.status != 'berjalan', ImportJob.updated_at < basi))
+        .values(status='berjalan', updated_at=datetime.now(), last_error=None)
+    )
+    db.session.commit()
+    db.session.refresh(job)
+    return result.rowcount == 1
+
+
+def jalankan(job):
+    """
+    Proses job dari checkpoint sampai habis. Return job (status 'selesai' atau
+    'gagal' dengan last_error). Raise ImportJobError jika job tidak bisa diklaim.
+    """
+    if not _klaim(job):
+        raise ImportJobError('Import ini sudah selesai atau sedang berjalan.')
+    size = current_app.config.get('IMPORT_CHUNK_SIZE', 500)
+    awal = job.success_count
+    try:
+        for rows in baca_chunks(job.file_path, skip=job.rows_done, size=size):
+            _proses_chunk(job, rows)
+        job.status = 'selesai'
+    except ImportJobError:
+        # Format file salah (mis. kolom wajib hilang): tidak ada yang bisa dilanjutkan
+        db.session.rollback()
+        _hapus(job)
+        db.session.delete(job)
+        db.session.commit()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        job.status = 'gagal'
+        job.last_error = str(e)[:1000]
+        current_app.logger.warning("Import #%s terhenti di baris %s: %s", job.id, job.rows_done, e)
+    job.updated_at = datetime.now()
+    db.session.commit()
+
+    if job.status == 'selesai':
+        _hapus(job)
+    if job.success_count > awal:
+        # Siswa baru: buang cache progres/analitik dan bangun ulang ringkasan
+        signals.kirim_student_changed(step='import')
+    return job
+
+
+def belum_selesai():
+    return ImportJob.query.filter(ImportJob.status != 'selesai').order_by(ImportJob.id.desc()).all()
+
+
+impor_cli = AppGroup('impor', help='Import data siswa bertahap.')
+
+
+@impor_cli.command('file')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def file_cmd(path):
+    """Import file CSV/XLSX langsung dari disk server (file asli tidak diubah)."""
+    with open(path, 'rb') as f:
+        job = buat_job(f, os.path.basename(path))
+    _jalankan_cli(job)
+
+
+@impor_cli.command('lanjut')
+@click.argument('job_id', type=int)
+def lanjut_cmd(job_id):
+    """Lanjutkan job import dari checkpoint-nya."""
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        raise click.ClickException(f'Job #{job_id} tidak ditemukan.')
+    _jalankan_cli(job)
+
+
+@impor_cli.command('daftar')
+def daftar_cmd():
+    """Job import yang belum selesai."""
+    for job in belum_selesai():
+        click.echo(f"#{job.id} {job.filename} [{job.status}] baris {job.rows_done}, "
+                   f"berhasil {job.success_count}, gagal {job.error_count}"
+                   + (f" - {job.last_error}" if job.last_error else ''))
+
+
+def _jalankan_cli(job):
+    try:
+        job = jalankan(job)
+    except ImportJobError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Job #{job.id} {job.status}: {job.rows_done} baris diproses, "
+               f"{job.success_count} berhasil, {job.error_count} gagal/duplikat.")
+    if job.last_error:
+        click.echo(f"Error: {job.last_error}")
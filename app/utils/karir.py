@@ -0,0 +1,166 @@
+"""
+Katalog karir & paket (Jelajah Karir).
+
+Katalog disimpan di file JSON (default app/data/career_catalog.json) yang
+bisa diubah admin lewat halaman /admin/karir. Saat aplikasi start, saran karir
+untuk ke-120 kode top-3 RIASEC (permutasi 3 dari 6 dimensi) dihitung sekali
+ke lookup beku, sehingga view cukup melakukan satu akses dict.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from itertools import permutations
+from types import MappingProxyType
+
+from flask import current_app
+
+DIMENSI = 'RIASEC'
+MAKS_KARIR = 8
+
+_lock = threading.Lock()
+_state = None  # dict: path, mtime, versi, checked_at, lookup, paket, alasan
+
+
+def catalog_path(app=None):
+    app = app or current_app
+    return app.config.get('CAREER_CATALOG_PATH') or os.path.join(app.root_path, 'data', 'career_catalog.json')
+
+
+def validate_catalog(data):
+    """Periksa struktur katalog. Raise ValueError dengan pesan yang bisa ditampilkan ke admin."""
+    if not isinstance(data, dict):
+        raise ValueError("Katalog harus berupa objek JSON.")
+    for key in ('paket', 'alasan', 'kombinasi', 'dimensi'):
+        if not isinstance(data.get(key), dict):
+            raise ValueError(f"Bagian '{key}' wajib ada dan berupa objek.")
+    for label, mapel in data['paket'].items():
+        if not isinstance(mapel, list) or not all(isinstance(m, str) for m in mapel):
+            raise ValueError(f"Daftar mapel untuk '{label}' harus berupa list teks.")
+    for key in ('kombinasi', 'dimensi'):
+        for code, items in data[key].items():
+            code_u = code.upper()
+            if not code_u or any(ch not in DIMENSI for ch in code_u):
+                raise ValueError(f"Kode RIASEC tidak valid di '{key}': {code}")
+            if key == 'dimensi' and len(code_u) != 1:
+                raise ValueError(f"Kode di 'dimensi' harus satu huruf: {code}")
+            if not isinstance(items, list):
+                raise ValueError(f"Karir untuk '{code}' harus berupa list.")
+            for item in items:
+                if not isinstance(item, dict) or not item.get('title'):
+                    raise ValueError(f"Setiap karir di '{code}' wajib punya 'title'.")
+    return data
+
+
+def _suggest(code, kombinasi, dimensi):
+    seen = set()
+    result = []
+    for ch_code, items in [(code, kombinasi.get(code, []))] + [(ch, dimensi.get(ch, [])) for ch in code]:
+        for item in items:
+            if item['title'] not in seen:
+                result.append(MappingProxyType({
+                    'title': item['title'],
+                    'riasec': ch_code,
+                    'desc': item.get('desc', '')
+                }))
+                seen.add(item['title'])
+    return tuple(result[:MAKS_KARIR])
+
+
+def build_state(catalog):
+    kombinasi = {k.upper(): v for k, v in catalog['kombinasi'].items()}
+    dimensi = {k.upper(): v for k, v in catalog['dimensi'].items()}
+    lookup = {''.join(p): _suggest(''.join(p), kombinasi, dimensi) for p in permutations(DIMENSI, 3)}
+    return {
+        'lookup': MappingProxyType(lookup),
+        'kombinasi': kombinasi,
+        'dimensi': dimensi,
+        'paket': MappingProxyType({k: tuple(v) for k, v in catalog['paket'].items()}),
+        'alasan': MappingProxyType(dict(catalog['alasan'])),
+    }
+
+
+def _load(path):
+    with open(path, 'rb') as fh:
+        raw = fh.read()
+    catalog = validate_catalog(json.loads(raw.decode('utf-8')))
+    state = build_state(catalog)
+    state['path'] = path
+    state['mtime'] = os.path.getmtime(path)
+    state['versi'] = hashlib.sha256(raw).hexdigest()[:16]
+    state['checked_at'] = time.monotonic()
+    return state
+
+
+def init_app(app):
+    """Bangun lookup saat start supaya request pertama tidak menanggung biayanya."""
+    global _state
+    with _lock:
+        _state = _load(catalog_path(app))
+
+
+def _get_state():
+    """
+    Ambil lookup aktif. Proses worker lain mendeteksi perubahan katalog dari
+    mtime file, dicek paling sering tiap CAREER_CATALOG_CHECK_SECONDS.
+    """
+    global _state
+    state = _state
+    now = time.monotonic()
+    interval = current_app.config.get('CAREER_CATALOG_CHECK_SECONDS', 10)
+    if state is None or now - state['checked_at'] > interval:
+        with _lock:
+            state = _state
+            path = catalog_path()
+            if state is None or state['path'] != path or os.path.getmtime(path) != state['mtime']:
+                _state = _load(path)
+            else:
+                state['checked_at'] = now
+            state = _state
+    return state
+
+
+def careers_for(code):
+    code = (code or '').upper()
+    state = _get_state()
+    careers = state['lookup'].get(code)
+    if careers is None:
+        # Kode di luar 120 kombinasi (mis. '-' atau hasil lama) dihitung langsung
+        careers = _suggest(code, state['kombinasi'], state['dimensi'])
+    return careers
+
+
+def versi():
+    """Hash isi katalog yang sedang dipakai (untuk ETag/kunci cache halaman yang menampilkannya)."""
+    return _get_state()['versi']
+
+
+def paket_mapel(label):
+    return list(_get_state()['paket'].get(label, ()))
+
+
+def semua_paket():
+    return {k: list(v) for k, v in _get_state()['paket'].items()}
+
+
+def alasan(label):
+    return _get_state()['alasan'].get(label, "Paket pilihan sesuai data Anda.")
+
+
+def read_catalog_text():
+    with open(catalog_path(), encoding='utf-8') as fh:
+        return fh.read()
+
+
+def save_catalog(data):
+    """Validasi, tulis atomik ke file katalog, lalu bangun ulang lookup."""
+    global _state
+    validate_catalog(data)
+    path = catalog_path()
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    with _lock:
+        _state = _load(path)
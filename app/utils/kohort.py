@@ -0,0 +1,31 @@
+"""
+Tahun ajaran (kohort) siswa.
+
+Tahun ajaran dimulai bulan Juli: 15 Agustus 2025 -> '2025/2026',
+10 Maret 2026 -> '2025/2026'. TAHUN_AJARAN_AKTIF di konfigurasi
+mengesampingkan perhitungan dari tanggal (mis. saat masa transisi).
+"""
+import re
+from datetime import date
+
+from flask import current_app, has_app_context
+
+BULAN_MULAI = 7
+_POLA = re.compile(r'^(\d{4})/(\d{4})$')
+
+
+def dari_tanggal(tanggal):
+    tahun = tanggal.year if tanggal.month >= BULAN_MULAI else tanggal.year - 1
+    return f'{tahun}/{tahun + 1}'
+
+
+def aktif():
+    """Tahun ajaran berjalan; dipakai sebagai default students.tahun_ajaran."""
+    if has_app_context() and current_app.config.get('TAHUN_AJARAN_AKTIF'):
+        return current_app.config['TAHUN_AJARAN_AKTIF']
+    return dari_tanggal(date.today())
+
+
+def valid(tahun):
+    m = _POLA.match(tahun or '')
+    return bool(m) and int(m.group(2)) == int(m.group(1)) + 1
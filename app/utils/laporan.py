@@ -0,0 +1,286 @@
+"""
+Laporan PDF hasil rekomendasi yang dibuat di server.
+
+Data siswa diambil di thread request (satu query join), sedangkan rendering
+PDF dijalankan di worker pool. Setiap PDF di-cache di disk dengan kunci hash
+dari semua isi yang dicetak (identitas, hasil RIASEC, nilai rapor, versi
+rekomendasi, teks katalog karir/paket, dan tanggal cetak), sehingga laporan
+hanya dibuat ulang jika salah satunya berubah. Nama file diawali id siswa;
+saat PDF baru ditulis, PDF lama siswa yang sama dihapus.
+
+Membutuhkan paket `reportlab`; jika tidak terpasang, REPORTLAB_AVAILABLE False
+dan route memakai laporan versi browser sebagai cadangan.
+"""
+import glob
+import hashlib
+import io
+import json
+import os
+import threading
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from xml.sax.saxutils import escape
+
+from flask import current_app
+
+from app import db
+from app.models import User, Student, RiasecResult, ReportScore, Recommendation
+from app.utils import karir, ringkasan
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+# Naikkan jika tata letak PDF berubah supaya cache lama tidak dipakai lagi
+LAYOUT_VERSION = 1
+
+DIMENSI_LABEL = [('R', 'Realistic'), ('I', 'Investigative'), ('A', 'Artistic'),
+                 ('S', 'Social'), ('E', 'Enterprising'), ('C', 'Conventional')]
+MAPEL = ['matematika', 'fisika', 'kimia', 'biologi', 'ekonomi', 'sosiologi']
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = current_app.config.get('REPORT_WORKERS', 2)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='laporan')
+    return _executor
+
+
+def cache_dir():
+    path = current_app.config.get('REPORT_CACHE_DIR') or os.path.join(current_app.instance_path, 'report_cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _query():
+    return db.session.query(User, Student, RiasecResult, ReportScore, Recommendation)\
+        .join(Student, User.id == Student.id_user)\
+        .outerjoin(RiasecResult, Student.id == RiasecResult.id_student)\
+        .outerjoin(ReportScore, Student.id == ReportScore.id_student)\
+        .outerjoin(Recommendation, Student.id == Recommendation.id_student)\
+        .filter(User.role == 'siswa')
+
+
+def _to_data(u, s, res, rapor, rec):
+    """Ubah baris join menjadi dict sederhana (aman dipakai di thread lain)."""
+    if res is None or rapor is None or rec is None:
+        return None
+    top3 = res.top3 or '-'
+    return {
+        'id_student': s.id,
+        'nama': u.nama or s.nama or u.username,
+        'nisn': u.nisn or s.nisn or '-',
+        'kelas': u.kelas or s.kelas or '-',
+        'top3': top3,
+        'skor': {d: getattr(res, f'skor_{d}') or 0 for d, _ in DIMENSI_LABEL},
+        'rapor': {m: int(getattr(rapor, m)) if getattr(rapor, m) else 0 for m in MAPEL},
+        'paket': rec.paket_prediksi,
+        'probabilitas': rec.probabilitas,
+        'model_version': rec.model_version,
+        'rekom_at': rec.created_at.isoformat() if rec.created_at else None,
+        'paket_mapel': karir.paket_mapel(rec.paket_prediksi),
+        'alasan': karir.alasan(rec.paket_prediksi),
+        'careers': [(c['title'], c['desc']) for c in karir.careers_for(top3)[:6]],
+        'tanggal_cetak': date.today().strftime('%d-%m-%Y'),
+    }
+
+
+def data_siswa(student_id):
+    """Data laporan satu siswa, atau None jika tes/rapor/rekomendasi belum lengkap."""
+    row = _query().filter(Student.id == student_id).first()
+    return _to_data(*row) if row else None
+
+
+def data_kelas(kelas):
+    """
+    Data laporan siswa yang sudah lengkap, dengan filter kelas yang sama
+    dengan dashboard guru (bagian nama kelas), urut kelas lalu nama.
+    """
+    kolom_kelas = ringkasan.kelas_siswa()
+    rows = _query().filter(ringkasan.filter_kelas(kolom_kelas, kelas))\
+        .order_by(kolom_kelas.asc(), User.nama.asc()).all()
+    return [d for d in (_to_data(*row) for row in rows) if d is not None]
+
+
+def cache_key(data):
+    payload = json.dumps({
+        'v': LAYOUT_VERSION,
+        'id': data['id_student'],
+        'identitas': [data['nama'], data['nisn'], data['kelas']],
+        'skor': data['skor'], 'top3': data['top3'],
+        'rapor': data['rapor'],
+        'rekom': [data['paket'], data['probabilitas'], data['model_version'], data['rekom_at']],
+        'karir': [data['paket_mapel'], data['alasan'], data['careers']],
+        'tanggal': data['tanggal_cetak'],
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def nama_file(data):
+    return f"Laporan_Rekomendasi_{data['nama'].replace(' ', '_')}.pdf"
+
+
+def render_pdf(data):
+    """Susun PDF A4 satu halaman. Tidak menyentuh database."""
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=A4, leftMargin=15 * mm, rightMargin=15 * mm,
+                            topMargin=12 * mm, bottomMargin=12 * mm,
+                            title=f"Laporan Rekomendasi {data['nama']}")
+    styles = getSampleStyleSheet()
+    h1 = ParagraphStyle('h1', parent=styles['Title'], fontName='Times-Bold', fontSize=15, spaceAfter=2)
+    h2 = ParagraphStyle('h2', parent=styles['Heading3'], fontName='Times-Bold', fontSize=11, spaceBefore=8, spaceAfter=4)
+    body = ParagraphStyle('body', parent=styles['Normal'], fontName='Times-Roman', fontSize=9.5, leading=12)
+    small = ParagraphStyle('small', parent=body, fontSize=7.5, textColor=colors.grey, alignment=1)
+    grid = TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#F3F4F6')),
+        ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+    ])
+
+    story = [
+        Paragraph("SMA Negeri Contoh Indonesia", h1),
+        Paragraph("Laporan Hasil Penelusuran Minat &amp; Bakat", ParagraphStyle('sub', parent=body, alignment=1, fontSize=11)),
+        Spacer(1, 6),
+    ]
+    info = Table([
+        ['Nama Siswa', ':', data['nama'].upper(), 'Tanggal Cetak', ':', data['tanggal_cetak']],
+        ['NISN', ':', data['nisn'], 'Kelas', ':', data['kelas']],
+    ], colWidths=[25 * mm, 4 * mm, 60 * mm, 28 * mm, 4 * mm, 55 * mm])
+    info.setStyle(TableStyle([('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'), ('FONTSIZE', (0, 0), (-1, -1), 9.5),
+                              ('FONTNAME', (0, 0), (0, -1), 'Times-Bold'), ('FONTNAME', (3, 0), (3, -1), 'Times-Bold')]))
+    story.append(info)
+
+    story.append(Paragraph(f"I. Hasil Tes Minat (RIASEC) &mdash; Kode Dominan: <b>{data['top3']}</b>", h2))
+    t = Table([['Dimensi', 'Skor']] + [[label, str(data['skor'][d])] for d, label in DIMENSI_LABEL],
+              colWidths=[60 * mm, 25 * mm], hAlign='LEFT')
+    t.setStyle(grid)
+    story.append(t)
+
+    story.append(Paragraph("II. Data Akademik (Nilai Rapor)", h2))
+    t = Table([['Mata Pelajaran', 'Nilai']] + [[m.capitalize(), str(data['rapor'][m])] for m in MAPEL],
+              colWidths=[60 * mm, 25 * mm], hAlign='LEFT')
+    t.setStyle(grid)
+    story.append(t)
+
+    story.append(Paragraph("III. Hasil Rekomendasi", h2))
+    keyakinan = f"{data['probabilitas'] * 100:.1f}%" if data['probabilitas'] is not None else '-'
+    story.append(Paragraph(f"Paket direkomendasikan: <b>{data['paket']}</b> (tingkat keyakinan {keyakinan})", body))
+    story.append(Paragraph(f"Mata pelajaran pilihan: {escape(', '.join(data['paket_mapel'])) or '-'}", body))
+    story.append(Paragraph(f"<i>\"{escape(data['alasan'])}\"</i>", body))
+
+    story.append(Paragraph("IV. Rekomendasi Karir", h2))
+    if data['careers']:
+        for title, desc in data['careers']:
+            story.append(Paragraph(f"&bull; <b>{escape(title)}</b> &mdash; {escape(desc)}", body))
+    else:
+        story.append(Paragraph("Tidak ada rekomendasi karir.", body))
+
+    story.append(Spacer(1, 18))
+    ttd = Table([['Mengetahui,'], ['Guru Bimbingan Konseling'], [''], [''], ['_______________________'], ['NIP. ..........................']],
+                colWidths=[60 * mm], hAlign='RIGHT')
+    ttd.setStyle(TableStyle([('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'), ('FONTSIZE', (0, 0), (-1, -1), 9.5),
+                             ('ALIGN', (0, 0), (-1, -1), 'CENTER')]))
+    story.append(ttd)
+    story.append(Spacer(1, 12))
+    story.append(Paragraph(
+        "Dokumen ini dihasilkan secara otomatis oleh Sistem Rekomendasi Pemilihan Mata Pelajaran Pilihan. "
+        "Hasil rekomendasi didasarkan pada data input siswa (Tes RIASEC &amp; Nilai Rapor) dan dapat digunakan "
+        "sebagai bahan pertimbangan lanjut dengan Guru BK.", small))
+
+    doc.build(story)
+    return buf.getvalue()
+
+
+def _path(data):
+    return os.path.join(cache_dir(), f"{data['id_student']}_{cache_key(data)}.pdf")
+
+
+def _render_cached(path, data):
+    pdf = render_pdf(data)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as fh:
+        fh.write(pdf)
+    os.replace(tmp, path)
+    # Versi lama laporan siswa ini tidak akan dipakai lagi
+    for lama in glob.glob(os.path.join(os.path.dirname(path), f"{data['id_student']}_*.pdf")):
+        if lama != path:
+            try:
+                os.remove(lama)
+            except FileNotFoundError:
+                pass
+    return pdf
+
+
+def submit(data):
+    """
+    Kembalikan Future berisi bytes PDF. Jika sudah ada di cache, Future
+    langsung selesai tanpa melewati worker pool.
+    """
+    path = _path(data)
+    try:
+        with open(path, 'rb') as fh:
+            pdf = fh.read()
+    except FileNotFoundError:
+        return _get_executor().submit(_render_cached, path, data)
+    fut = Future()
+    fut.set_result(pdf)
+    return fut
+
+
+def pdf_siswa(data):
+    return submit(data).result()
+
+
+class _ZipStream(io.RawIOBase):
+    """Buffer tulis-saja; isinya diambil per potong untuk di-stream ke klien."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._buf += b
+        return len(b)
+
+    def take(self):
+        chunk = bytes(self._buf)
+        self._buf.clear()
+        return chunk
+
+
+def zip_kelas(items):
+    """
+    Generator ZIP berisi PDF seluruh siswa. Semua render dijadwalkan di depan
+    ke worker pool, lalu setiap PDF ditulis ke ZIP sesuai urutan dan langsung
+    dikirim ke klien tanpa menunggu satu kelas selesai.
+    """
+    futures = [(d, submit(d)) for d in items]
+    stream = _ZipStream()
+    dipakai = set()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for data, fut in futures:
+            nama = nama_file(data)
+            if nama in dipakai:
+                nama = nama.replace('.pdf', f"_{data['nisn']}.pdf")
+            dipakai.add(nama)
+            zf.writestr(nama, fut.result())
+            yield stream.take()
+    yield stream.take()
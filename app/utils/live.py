@@ -0,0 +1,146 @@
+"""
+Pemantauan tes secara langsung untuk guru (server-sent events).
+
+Jalur tulis di siswa.py memanggil `publish(...)` saat siswa mulai tes,
+menyimpan halaman, mendapat hasil RIASEC, dan mendapat rekomendasi. Event
+dibagikan lewat pub/sub di memori proses ke semua stream `/guru/live` yang
+filter kelasnya cocok, dengan aturan yang sama dengan filter dashboard guru
+(bagian nama kelas, tanpa beda huruf besar/kecil; kosong = semua kelas),
+sehingga satu koneksi menggantikan refresh dashboard berulang.
+
+Setiap kelas menyimpan LIVE_BACKLOG event terakhir dengan id naik; klien
+yang tersambung ulang (header Last-Event-ID) menerima event yang terlewat.
+Pub/sub ini per proses: jalankan dengan satu proses ber-thread (mis.
+gunicorn --workers 1 --threads N) supaya guru melihat semua event. Setiap
+stream menahan satu thread selama terbuka, jadi LIVE_MAX_STREAMS (default
+separuh WEB_THREADS) harus lebih kecil dari N supaya request siswa tetap
+dilayani; slot stream dipesan atomik saat `stream()` dipanggil.
+"""
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+
+SEMUA = ''  # filter seluruh kelas
+
+TIPE = ('mulai', 'halaman', 'hasil', 'rapor', 'rekomendasi')
+
+_lock = threading.Lock()
+# Id diawali waktu (ms) supaya tetap naik walau proses di-restart (Last-Event-ID klien)
+_ids = itertools.count(int(time.time() * 1000))
+_subscribers = {}  # queue.Queue -> filter kelas (huruf kecil)
+_backlog = {}  # kelas -> deque[(id, event)]
+
+
+class TooManyStreams(Exception):
+    pass
+
+
+def cocok(filter_kelas, kelas):
+    """Aturan filter kelas dashboard (lihat `ringkasan.filter_kelas`)."""
+    return filter_kelas.lower() in (kelas or '').lower()
+
+
+def publish(tipe, user, **data):
+    """Kirim event milik `user` (current_user) ke semua stream yang filter kelasnya cocok."""
+    kelas = getattr(user, 'kelas', None) or ''
+    event = {
+        'tipe': tipe,
+        'user_id': user.id,
+        'nama': getattr(user, 'nama', None) or getattr(user, 'username', ''),
+        'kelas': kelas,
+        'waktu': time.strftime('%H:%M:%S'),
+        **data,
+    }
+    maxlen = current_app.config.get('LIVE_BACKLOG', 200)
+    with _lock:
+        event_id = next(_ids)
+        _backlog.setdefault(kelas, deque(maxlen=maxlen)).append((event_id, event))
+        targets = [q for q, filter_kelas in _subscribers.items() if cocok(filter_kelas, kelas)]
+    for q in targets:
+        try:
+            q.put_nowait((event_id, event))
+        except queue.Full:
+            # Klien lambat: buang event terlama, jangan tahan jalur tulis siswa
+            try:
+                q.get_nowait()
+                q.put_nowait((event_id, event))
+            except (queue.Empty, queue.Full):
+                pass
+
+
+def _terlewat(filter_kelas, last_id):
+    with _lock:
+        items = [x for k, d in _backlog.items() if cocok(filter_kelas, k) for x in d]
+    return sorted((i, e) for i, e in items if i > last_id)
+
+
+def _format(event_id, event):
+    return f"id: {event_id}\nevent: {event['tipe']}\ndata: {json.dumps(event)}\n\n"
+
+
+def max_streams():
+    config = current_app.config
+    return config.get('LIVE_MAX_STREAMS') or max(config.get('WEB_THREADS', 64) // 2, 1)
+
+
+def _lepas(q):
+    with _lock:
+        _subscribers.pop(q, None)
+
+
+class _Stream:
+    """Iterable SSE; close() (dipanggil server WSGI) selalu melepas slot, walau belum pernah dibaca."""
+
+    def __init__(self, q, generator):
+        self.q = q
+        self.generator = generator
+
+    def __iter__(self):
+        return self.generator
+
+    def close(self):
+        self.generator.close()
+        _lepas(self.q)
+
+
+def stream(kelas='', last_id=0):
+    """
+    Iterable teks SSE untuk filter kelas `kelas` ('' = semua). Slot dipesan
+    di sini; raise TooManyStreams jika sudah ada max_streams() koneksi terbuka.
+    """
+    config = current_app.config
+    heartbeat = config.get('LIVE_HEARTBEAT_SECONDS', 15)
+    retry_ms = config.get('LIVE_RETRY_MS', 3000)
+    q = queue.Queue(maxsize=config.get('LIVE_QUEUE_SIZE', 500))
+    batas = max_streams()
+    with _lock:
+        if len(_subscribers) >= batas:
+            raise TooManyStreams()
+        _subscribers[q] = kelas.lower()
+
+    def generate():
+        try:
+            # Jeda reconnect klien dan event yang terlewat
+            yield f"retry: {retry_ms}\n\n"
+            terakhir = last_id
+            for event_id, event in _terlewat(kelas, last_id):
+                terakhir = event_id
+                yield _format(event_id, event)
+            while True:
+                try:
+                    event_id, event = q.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if event_id > terakhir:
+                    terakhir = event_id
+                    yield _format(event_id, event)
+        finally:
+            _lepas(q)
+
+    return _Stream(q, generate())
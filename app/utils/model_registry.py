@@ -0,0 +1,372 @@
+"""
+Registry versi model rekomendasi.
+
+File model disimpan di satu direktori lokal (default: instance/models) dan
+diindeks di tabel `model_versions`. Satu versi berstatus 'active' melayani
+siswa, satu versi 'shadow' ikut memprediksi input yang sama di thread
+terpisah (hasilnya hanya dicatat di `shadow_evaluations`), dan versi lain
+dapat diberi `traffic_pct` untuk A/B serving.
+
+Jika registry masih kosong, loader kembali ke perilaku lama: file XGB di
+app/utils jika ada, selain itu RF.
+"""
+import hashlib
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import ModelVersion, ShadowEvaluation
+from app.utils.rekomendasi import load_artifact, prediksi
+
+STATUS = ('active', 'shadow', 'standby', 'retired')
+
+_models = {}
+_models_lock = threading.Lock()
+
+_routing = None
+_routing_loaded_at = 0.0
+_routing_lock = threading.Lock()
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending_shadow = 0
+
+
+class LoadedModel:
+    """Model yang sudah dimuat ke memori beserta label encoder-nya."""
+
+    def __init__(self, nama, model, label_encoder):
+        self.nama = nama
+        self.model = model
+        self.label_encoder = label_encoder
+
+    def predict(self, model_input):
+        return prediksi(self.model, self.label_encoder, model_input)
+
+
+def registry_dir():
+    return current_app.config.get('MODEL_REGISTRY_DIR') or os.path.join(current_app.instance_path, 'models')
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _load(nama, path, sha256=None):
+    key = (path, sha256)
+    loaded = _models.get(key)
+    if loaded is None:
+        with _models_lock:
+            loaded = _models.get(key)
+            if loaded is None:
+                model, le = load_artifact(path)
+                loaded = LoadedModel(nama, model, le)
+                _models[key] = loaded
+    return loaded
+
+
+def _legacy_routing():
+    utils_dir = os.path.join(current_app.root_path, 'utils')
+    xgb_path = os.path.join(utils_dir, 'model_rekomendasi_xgb.pkl')
+    rf_path = os.path.join(utils_dir, 'model_rekomendasi_rf.pkl')
+    if os.path.exists(xgb_path):
+        active = {'nama': 'legacy-xgb', 'path': xgb_path, 'sha256': None}
+    elif os.path.exists(rf_path):
+        active = {'nama': 'legacy-rf', 'path': rf_path, 'sha256': None}
+    else:
+        active = None
+    return {'active': active, 'shadow': None, 'ab': []}
+
+
+def _load_routing():
+    try:
+        versions = ModelVersion.query.filter(ModelVersion.status != 'retired').all()
+    except SQLAlchemyError:
+        # Tabel registry belum dimigrasi
+        db.session.rollback()
+        versions = []
+    if not versions:
+        return _legacy_routing()
+
+    base = registry_dir()
+    routing = {'active': None, 'shadow': None, 'ab': []}
+    for v in versions:
+        entry = {'nama': v.nama, 'path': os.path.join(base, v.path), 'sha256': v.sha256, 'traffic_pct': v.traffic_pct or 0}
+        if v.status == 'active':
+            routing['active'] = entry
+        elif v.status == 'shadow':
+            routing['shadow'] = entry
+        if v.status != 'active' and entry['traffic_pct'] > 0:
+            routing['ab'].append(entry)
+    routing['ab'].sort(key=lambda e: e['nama'])
+    if routing['active'] is None:
+        return _legacy_routing() | {'shadow': routing['shadow']}
+    return routing
+
+
+def get_routing():
+    """Tabel routing (active/shadow/A-B) di-cache per proses selama MODEL_REGISTRY_TTL detik."""
+    global _routing, _routing_loaded_at
+    ttl = current_app.config.get('MODEL_REGISTRY_TTL', 30)
+    now = time.monotonic()
+    if _routing is None or now - _routing_loaded_at > ttl:
+        with _routing_lock:
+            if _routing is None or now - _routing_loaded_at > ttl:
+                _routing = _load_routing()
+                _routing_loaded_at = now
+    return _routing
+
+
+def reset_routing():
+    global _routing
+    _routing = None
+
+
+def _serving_entry(student_id=None):
+    """
+    Entry routing yang melayani siswa ini. Pembagian A/B deterministik per
+    siswa (id_student % 100) supaya satu siswa selalu mendapat versi yang sama.
+    """
+    routing = get_routing()
+    entry = routing['active']
+    if student_id is not None and routing['ab']:
+        bucket = student_id % 100
+        batas = 0
+        for cand in routing['ab']:
+            batas += cand['traffic_pct']
+            if bucket < batas:
+                entry = cand
+                break
+    return entry
+
+
+def serving_nama(student_id=None):
+    """Nama versi yang melayani siswa ini, tanpa memuat file modelnya."""
+    entry = _serving_entry(student_id)
+    return entry['nama'] if entry else None
+
+
+def get_serving_model(student_id=None):
+    """Model (sudah dimuat) yang melayani siswa ini; lihat `_serving_entry`."""
+    entry = _serving_entry(student_id)
+    if entry is None:
+        return None
+    return _load(entry['nama'], entry['path'], entry['sha256'])
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        workers = current_app.config.get('MODEL_SHADOW_WORKERS', 1)
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='model-shadow')
+    return _executor
+
+
+def _run_shadow(app, entry, student_id, model_input, serving_nama, paket_serving, latency_serving_ms):
+    global _pending_shadow
+    try:
+        with app.app_context():
+            shadow = _load(entry['nama'], entry['path'], entry['sha256'])
+            t0 = time.perf_counter()
+            paket_shadow, _ = shadow.predict(model_input)
+            latency_shadow_ms = (time.perf_counter() - t0) * 1000
+            db.session.add(ShadowEvaluation(
+                id_student=student_id,
+                versi_serving=serving_nama,
+                versi_shadow=shadow.nama,
+                paket_serving=paket_serving,
+                paket_shadow=paket_shadow,
+                setuju=paket_serving == paket_shadow,
+                latency_serving_ms=latency_serving_ms,
+                latency_shadow_ms=latency_shadow_ms
+            ))
+            try:
+                db.session.commit()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                app.logger.warning("Gagal menyimpan evaluasi shadow: %s", e)
+    except Exception:
+        app.logger.exception("Evaluasi shadow gagal")
+    finally:
+        with _executor_lock:
+            _pending_shadow -= 1
+
+
+def submit_shadow(student_id, model_input, served, paket_serving, latency_serving_ms):
+    """
+    Jadwalkan prediksi versi shadow di luar thread request. Dilewati jika
+    tidak ada versi shadow, versi shadow sendiri yang sedang melayani, atau
+    antrean sudah penuh (MODEL_SHADOW_MAX_PENDING).
+    """
+    global _pending_shadow
+    entry = get_routing()['shadow']
+    if entry is None or entry['nama'] == served.nama:
+        return False
+    with _executor_lock:
+        if _pending_shadow >= current_app.config.get('MODEL_SHADOW_MAX_PENDING', 100):
+            return False
+        _pending_shadow += 1
+        executor = _get_executor()
+    app = current_app._get_current_object()
+    executor.submit(_run_shadow, app, entry, student_id, list(model_input),
+                    served.nama, paket_serving, latency_serving_ms)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# CLI: flask model ...
+# ---------------------------------------------------------------------------
+model_cli = AppGroup('model', help='Kelola registry versi model rekomendasi.')
+
+
+def _get_version_or_fail(nama):
+    v = ModelVersion.query.filter_by(nama=nama).first()
+    if v is None:
+        raise click.ClickException(f"Versi '{nama}' tidak ditemukan.")
+    return v
+
+
+def register_version(path, nama, algoritma=None, status='standby'):
+    if ModelVersion.query.filter_by(nama=nama).first():
+        raise click.ClickException(f"Versi '{nama}' sudah terdaftar.")
+    base = registry_dir()
+    os.makedirs(base, exist_ok=True)
+    filename = f"{nama}.pkl"
+    shutil.copyfile(path, os.path.join(base, filename))
+    if status == 'active':
+        ModelVersion.query.filter_by(status='active').update({'status': 'standby'})
+    elif status == 'shadow':
+        ModelVersion.query.filter_by(status='shadow').update({'status': 'standby'})
+    v = ModelVersion(nama=nama, algoritma=algoritma, path=filename,
+                     sha256=_sha256(os.path.join(base, filename)), status=status)
+    db.session.add(v)
+    db.session.commit()
+    reset_routing()
+    return v
+
+
+@model_cli.command('register')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--nama', required=True, help='Nama versi unik, mis. xgb-2025-01.')
+@click.option('--algoritma', default=None, help='xgb / rf / lainnya.')
+@click.option('--status', type=click.Choice(STATUS), default='standby')
+def register_cmd(path, nama, algoritma, status):
+    """Salin file .pkl ke direktori registry dan daftarkan sebagai versi baru."""
+    v = register_version(path, nama, algoritma, status)
+    click.echo(f"Terdaftar: {v.nama} ({v.status}) sha256={v.sha256[:12]}")
+
+
+@model_cli.command('bootstrap')
+def bootstrap_cmd():
+    """Daftarkan artefak bawaan: XGB sebagai active, RF sebagai shadow."""
+    utils_dir = os.path.join(current_app.root_path, 'utils')
+    bawaan = [
+        ('model_rekomendasi_xgb.pkl', 'xgb-bawaan', 'xgb', 'active'),
+        ('model_rekomendasi_rf.pkl', 'rf-bawaan', 'rf', 'shadow'),
+    ]
+    for filename, nama, algoritma, status in bawaan:
+        path = os.path.join(utils_dir, filename)
+        if not os.path.exists(path) or ModelVersion.query.filter_by(nama=nama).first():
+            continue
+        register_version(path, nama, algoritma, status)
+        click.echo(f"Terdaftar: {nama} ({status})")
+
+
+@model_cli.command('list')
+def list_cmd():
+    """Tampilkan semua versi di registry."""
+    for v in ModelVersion.query.order_by(ModelVersion.id).all():
+        click.echo(f"{v.nama:<24} {v.algoritma or '-':<6} {v.status:<8} traffic={v.traffic_pct:>3}%  {v.path}")
+
+
+@model_cli.command('activate')
+@click.argument('nama')
+def activate_cmd(nama):
+    """Jadikan versi ini model yang melayani siswa."""
+    v = _get_version_or_fail(nama)
+    ModelVersion.query.filter(ModelVersion.status == 'active', ModelVersion.id != v.id).update({'status': 'standby'})
+    v.status = 'active'
+    v.traffic_pct = 0
+    db.session.commit()
+    reset_routing()
+    click.echo(f"{nama} sekarang active.")
+
+
+@model_cli.command('shadow')
+@click.argument('nama')
+def shadow_cmd(nama):
+    """Jalankan versi ini dalam mode shadow."""
+    v = _get_version_or_fail(nama)
+    if v.status == 'active':
+        raise click.ClickException("Versi active tidak bisa sekaligus menjadi shadow.")
+    ModelVersion.query.filter(ModelVersion.status == 'shadow', ModelVersion.id != v.id).update({'status': 'standby'})
+    v.status = 'shadow'
+    db.session.commit()
+    reset_routing()
+    click.echo(f"{nama} sekarang shadow.")
+
+
+@model_cli.command('traffic')
+@click.argument('nama')
+@click.argument('pct', type=click.IntRange(0, 100))
+def traffic_cmd(nama, pct):
+    """Atur porsi trafik A/B (persen siswa) untuk versi kandidat."""
+    v = _get_version_or_fail(nama)
+    if v.status in ('active', 'retired'):
+        raise click.ClickException("Porsi trafik hanya untuk versi shadow/standby.")
+    lain = db.session.query(func.coalesce(func.sum(ModelVersion.traffic_pct), 0))\
+        .filter(ModelVersion.id != v.id, ModelVersion.status.in_(['shadow', 'standby'])).scalar()
+    if lain + pct > 100:
+        raise click.ClickException(f"Total porsi trafik melebihi 100% (versi lain: {lain}%).")
+    v.traffic_pct = pct
+    db.session.commit()
+    reset_routing()
+    click.echo(f"{nama} melayani {pct}% siswa.")
+
+
+@model_cli.command('retire')
+@click.argument('nama')
+def retire_cmd(nama):
+    """Nonaktifkan versi (file tetap disimpan di registry)."""
+    v = _get_version_or_fail(nama)
+    if v.status == 'active':
+        raise click.ClickException("Aktifkan versi lain terlebih dahulu.")
+    v.status = 'retired'
+    v.traffic_pct = 0
+    db.session.commit()
+    reset_routing()
+    click.echo(f"{nama} dipensiunkan.")
+
+
+@model_cli.command('stats')
+def stats_cmd():
+    """Tingkat kesepakatan dan latensi versi shadow terhadap versi serving."""
+    rows = db.session.query(
+        ShadowEvaluation.versi_serving,
+        ShadowEvaluation.versi_shadow,
+        func.count(ShadowEvaluation.id),
+        func.sum(db.case((ShadowEvaluation.setuju, 1), else_=0)),
+        func.avg(ShadowEvaluation.latency_serving_ms),
+        func.avg(ShadowEvaluation.latency_shadow_ms)
+    ).group_by(ShadowEvaluation.versi_serving, ShadowEvaluation.versi_shadow).all()
+    if not rows:
+        click.echo("Belum ada data evaluasi shadow.")
+        return
+    for serving, shadow, n, setuju, lat_serving, lat_shadow in rows:
+        click.echo(
+            f"{serving} vs {shadow}: n={n} setuju={(setuju or 0) / n:.1%} "
+            f"latensi serving={lat_serving or 0:.2f}ms shadow={lat_shadow or 0:.2f}ms"
+        )
@@ -0,0 +1,211 @@
+"""
+Hash & verifikasi password untuk login.
+
+- `verify(stored, password)` mengembalikan (cocok, perlu_rehash). Password
+  lama yang masih plain text, atau hash dengan metode/parameter selain
+  PASSWORD_HASH_METHOD, ditandai perlu_rehash dan di-hash ulang saat login
+  berhasil (`upgrade`). Plain text hanya dibandingkan jika isi kolom memang
+  bukan hash, jadi string hash itu sendiri tidak bisa dipakai sebagai password.
+- `verify_bounded` menjalankan verifikasi di pool thread berukuran
+  PASSWORD_WORKERS (hashlib melepas GIL selama scrypt/pbkdf2). Jika antrean
+  sudah PASSWORD_MAX_PENDING, langsung raise `Overloaded` supaya route bisa
+  menjawab 503 + Retry-After alih-alih membuat semua worker web menunggu.
+- `hash_many` meng-hash banyak password sekaligus (reset massal per kelas)
+  di pool terpisah berukuran PASSWORD_BULK_WORKERS, supaya antrean login
+  tidak ikut menunggu.
+
+`flask password tune` mengukur biaya beberapa parameter di mesin ini;
+`flask password bench` mengukur throughput login per core.
+"""
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+_HASH_PREFIXES = ('scrypt', 'pbkdf2')
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_bulk_executor = None
+
+
+class Overloaded(Exception):
+    """Antrean verifikasi password penuh; klien diminta mencoba lagi."""
+
+
+def method():
+    return current_app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_METHOD
+
+
+def hash_password(password, hash_method=None):
+    return generate_password_hash(password, method=hash_method or method())
+
+
+def is_hash(stored):
+    return bool(stored) and stored.count('$') >= 2 and stored.startswith(_HASH_PREFIXES)
+
+
+def _normalisasi(hash_method):
+    """'pbkdf2' / 'pbkdf2:sha256' -> bentuk lengkap dengan parameter default werkzeug."""
+    parts = hash_method.split(':')
+    if parts[0] == 'scrypt':
+        defaults = ['scrypt', '32768', '8', '1']
+    elif parts[0] == 'pbkdf2':
+        defaults = ['pbkdf2', 'sha256', '1000000']
+    else:
+        return hash_method
+    return ':'.join(parts + defaults[len(parts):])
+
+
+def verify(stored, password, target_method=None):
+    """(cocok, perlu_rehash) untuk isi kolom users.password."""
+    if not stored:
+        return False, False
+    if not is_hash(stored):
+        # Data lama plain text
+        ok = hmac.compare_digest(stored.encode(), (password or '').encode())
+        return ok, ok
+    try:
+        ok = check_password_hash(stored, password)
+    except ValueError:
+        return False, False
+    target = _normalisasi(target_method or method())
+    return ok, ok and _normalisasi(stored.split('$', 1)[0]) != target
+
+
+def upgrade(user, password):
+    """Hash ulang password user dengan metode saat ini (belum di-commit)."""
+    user.password = hash_password(password)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        workers = current_app.config.get('PASSWORD_WORKERS') or os.cpu_count() or 1
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password')
+    return _executor
+
+
+def _selesai(_future):
+    global _pending
+    with _executor_lock:
+        _pending -= 1
+
+
+def verify_bounded(stored, password):
+    """
+    `verify` lewat pool terbatas. Raise Overloaded jika antrean penuh atau
+    hasil tidak keluar dalam PASSWORD_TIMEOUT detik.
+    """
+    global _pending
+    with _executor_lock:
+        if _pending >= current_app.config.get('PASSWORD_MAX_PENDING', 64):
+            raise Overloaded()
+        _pending += 1
+        executor = _get_executor()
+    target = method()
+    future = executor.submit(verify, stored, password, target)
+    future.add_done_callback(_selesai)
+    try:
+        return future.result(timeout=current_app.config.get('PASSWORD_TIMEOUT', 10))
+    except FutureTimeout:
+        future.cancel()
+        raise Overloaded()
+
+
+def _get_bulk_executor():
+    global _bulk_executor
+    with _executor_lock:
+        if _bulk_executor is None:
+            workers = current_app.config.get('PASSWORD_BULK_WORKERS') or max((os.cpu_count() or 1) // 2, 1)
+            _bulk_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-massal')
+    return _bulk_executor
+
+
+def hash_many(daftar_password):
+    """List hash untuk list password (urutan sama), dihitung paralel."""
+    hash_method = method()
+    return list(_get_bulk_executor().map(lambda p: hash_password(p, hash_method), daftar_password))
+
+
+# ---------------------------------------------------------------------------
+# CLI: flask password ...
+# ---------------------------------------------------------------------------
+password_cli = AppGroup('password', help='Parameter hash password & benchmark login.')
+
+TUNE_CANDIDATES = ['scrypt:16384:8:1', 'scrypt:32768:8:1', 'scrypt:65536:8:1',
+                   'pbkdf2:sha256:600000', 'pbkdf2:sha256:1000000']
+
+
+def _biaya_ms(hash_method, ulang):
+    hashed = generate_password_hash('password-contoh', method=hash_method)
+    t0 = time.perf_counter()
+    for _ in range(ulang):
+        check_password_hash(hashed, 'password-contoh')
+    return (time.perf_counter() - t0) * 1000 / ulang
+
+
+@password_cli.command('tune')
+@click.option('--target-ms', default=100, show_default=True, help='Target waktu satu verifikasi.')
+@click.option('--ulang', default=5, show_default=True)
+def tune_cmd(target_ms, ulang):
+    """Ukur biaya beberapa metode hash di mesin ini dan sarankan PASSWORD_HASH_METHOD."""
+    hasil = [(m, _biaya_ms(m, ulang)) for m in TUNE_CANDIDATES]
+    for m, ms in hasil:
+        click.echo(f"{m:<24} {ms:8.1f} ms/verifikasi")
+    cocok = [m for m, ms in hasil if ms <= target_ms]
+    # Pilih parameter terberat yang masih di bawah target
+    saran = max(cocok, key=lambda m: dict(hasil)[m]) if cocok else min(hasil, key=lambda x: x[1])[0]
+    click.echo(f"Saran: PASSWORD_HASH_METHOD={saran} (saat ini {method()})")
+
+
+@password_cli.command('bench')
+@click.option('--threads', default=None, type=int, help='Jumlah login paralel (default: PASSWORD_WORKERS x 4).')
+@click.option('--jumlah', default=200, show_default=True, help='Total login yang disimulasikan.')
+@click.option('--endpoint', is_flag=True, help='Lewat POST /login (test client) alih-alih verify_bounded saja.')
+@click.option('--username', default=None, help='User untuk --endpoint.')
+@click.option('--password', default=None, help='Password user untuk --endpoint.')
+def bench_cmd(threads, jumlah, endpoint, username, password):
+    """Throughput login (login/detik dan per core) dengan metode hash saat ini."""
+    app = current_app._get_current_object()
+    workers = app.config.get('PASSWORD_WORKERS') or os.cpu_count() or 1
+    threads = threads or workers * 4
+    if endpoint and not (username and password):
+        raise click.ClickException('--endpoint butuh --username dan --password.')
+    hashed = hash_password('password-contoh')
+    hasil = {'ok': 0, 'ditolak': 0}
+    lock = threading.Lock()
+
+    def satu():
+        if endpoint:
+            with app.test_client() as c:
+                r = c.post('/login', data={'username': username, 'password': password})
+                status = 'ok' if r.status_code in (302, 303) else 'ditolak'
+        else:
+            with app.app_context():
+                try:
+                    verify_bounded(hashed, 'password-contoh')
+                    status = 'ok'
+                except Overloaded:
+                    status = 'ditolak'
+        with lock:
+            hasil[status] += 1
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in range(jumlah):
+            pool.submit(satu)
+    dt = time.perf_counter() - t0
+    cores = os.cpu_count() or 1
+    per_detik = hasil['ok'] / dt if dt else 0
+    click.echo(f"{method()}: {hasil['ok']} login sukses, {hasil['ditolak']} ditolak (503) "
+               f"dalam {dt:.2f} detik dengan {threads} thread, pool {workers}")
+    click.echo(f"{per_detik:.1f} login/detik, {per_detik / cores:.1f} login/detik per core ({cores} core)")
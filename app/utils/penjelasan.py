@@ -0,0 +1,182 @@
+"""
+Penjelasan prediksi paket per siswa, dihitung batch.
+
+Menghitung kontribusi fitur saat request terlalu lambat, jadi
+`flask rekomendasi jelaskan` memprosesnya untuk seluruh siswa yang sudah
+punya hasil RIASEC dan nilai rapor, per potongan:
+
+- XGBoost: `Booster.predict(pred_contribs=True)` (nilai SHAP, skala log-odds);
+- Random Forest: kontribusi jalur pohon (perubahan probabilitas kelas di
+  setiap split, dijumlahkan ke fitur split-nya, dirata-rata antar pohon).
+
+Yang disimpan hanya kontribusi ke paket hasil prediksi (12 angka) di
+`recommendation_explanations`, bersama versi model dan hash pendek input.
+Halaman hasil rekomendasi dan detail siswa menampilkan fitur paling
+berpengaruh tanpa memanggil model lagi; jika model atau input siswa sudah
+berubah sejak batch terakhir, penjelasan disembunyikan sampai batch berikutnya.
+"""
+import hashlib
+import json
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import click
+import numpy as np
+from sqlalchemy import delete, insert
+
+from app import db
+from app.models import ReportScore, RecommendationExplanation, RiasecResult, Student
+from app.utils import model_registry
+from app.utils.rekom_log import rekom_cli
+from app.utils.rekomendasi import label_paket
+
+# Urutan fitur model (sama dengan model_input di hasil_rekomendasi)
+FITUR = ('R', 'I', 'A', 'S', 'E', 'C', 'Biologi', 'Fisika', 'Kimia', 'Matematika', 'Ekonomi', 'Sosiologi')
+_KOLOM_RAPOR = ('biologi', 'fisika', 'kimia', 'matematika', 'ekonomi', 'sosiologi')
+
+
+def input_key(model_input):
+    """Hash pendek 12 nilai input untuk mendeteksi penjelasan yang basi."""
+    teks = ','.join(f'{float(v or 0):g}' for v in model_input)
+    return hashlib.sha1(teks.encode()).hexdigest()[:16]
+
+
+# ---------- kontribusi fitur ----------
+
+def _kontribusi_xgb(model, X):
+    import xgboost as xgb
+
+    booster = model.get_booster()
+    contribs = booster.predict(xgb.DMatrix(X, feature_names=booster.feature_names), pred_contribs=True)
+    if contribs.ndim == 2:
+        # Biner: satu kolom margin untuk kelas positif
+        contribs = np.stack([-contribs, contribs], axis=1)
+    return contribs[:, :, :-1]  # kolom terakhir = bias
+
+
+def _kontribusi_pohon(model, X):
+    trees = model.estimators_ if hasattr(model, 'estimators_') else [model]
+    n_kelas = len(model.classes_)
+    total = np.zeros((X.shape[0], X.shape[1], n_kelas))
+    for tree in trees:
+        t = tree.tree_
+        value = t.value[:, 0, :]
+        proba = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+        path = tree.decision_path(X)
+        # Id node di sklearn selalu lebih besar dari induknya, jadi indeks
+        # per baris CSR sudah berurutan akar -> daun
+        nodes = path.indices
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(path.indptr))
+        lanjut = rows[1:] == rows[:-1]
+        induk, anak = nodes[:-1][lanjut], nodes[1:][lanjut]
+        np.add.at(total, (rows[1:][lanjut], t.feature[induk]), proba[anak] - proba[induk])
+    return (total / len(trees)).transpose(0, 2, 1)
+
+
+def kontribusi(model, X):
+    """Array (n siswa, n kelas, n fitur), atau None jika jenis model tidak didukung."""
+    if hasattr(model, 'get_booster'):
+        return _kontribusi_xgb(model, X)
+    if hasattr(model, 'estimators_') or hasattr(model, 'tree_'):
+        return _kontribusi_pohon(model, X)
+    return None
+
+
+def _label(y_pred, le):
+    if le is not None:
+        return list(le.inverse_transform(y_pred))
+    return [label_paket([y], None) for y in y_pred]
+
+
+# ---------- batch ----------
+
+def _input_siswa(kelas=None):
+    """(id_student, 12 nilai input) siswa yang sudah punya hasil RIASEC dan nilai rapor."""
+    query = db.session.query(
+        Student.id,
+        *[getattr(RiasecResult, f'skor_{d}') for d in FITUR[:6]],
+        *[getattr(ReportScore, k) for k in _KOLOM_RAPOR],
+    ).join(RiasecResult, RiasecResult.id_student == Student.id)\
+        .join(ReportScore, ReportScore.id_student == Student.id)
+    if kelas:
+        query = query.filter(Student.kelas == kelas)
+    return [(row[0], [int(v or 0) for v in row[1:]]) for row in query.order_by(Student.id)]
+
+
+def _hitung(served, rows):
+    """Baris recommendation_explanations untuk satu model dan sekumpulan siswa."""
+    model = served.model
+    X = np.array([x for _, x in rows], dtype=float)
+    contribs = kontribusi(model, X)
+    if contribs is None:
+        return []
+    labels = _label(model.predict(X), served.label_encoder)
+    # Kelas hasil prediksi = argmax probabilitas (sama dengan predict)
+    idx = np.argmax(model.predict_proba(X), axis=1)
+    sekarang = datetime.now()
+    return [{
+        'id_student': sid,
+        'model_version': served.nama,
+        'input_key': input_key(x),
+        'paket': label,
+        'kontribusi': json.dumps([round(float(v), 4) for v in contribs[i, idx[i]]], separators=(',', ':')),
+        'created_at': sekarang,
+    } for i, ((sid, x), label) in enumerate(zip(rows, labels))]
+
+
+def jalankan(kelas=None, batch_size=1000):
+    """Hitung dan simpan penjelasan seluruh siswa. Return jumlah baris ditulis."""
+    data = _input_siswa(kelas)
+    ditulis = 0
+    for start in range(0, len(data), batch_size):
+        potongan = data[start:start + batch_size]
+        # Siswa A/B bisa dilayani versi berbeda: kelompokkan per model
+        per_model = defaultdict(list)
+        for sid, x in potongan:
+            served = model_registry.get_serving_model(sid)
+            if served is not None:
+                per_model[served.nama].append((served, sid, x))
+        baris = []
+        for entries in per_model.values():
+            baris += _hitung(entries[0][0], [(sid, x) for _, sid, x in entries])
+        ids = [sid for sid, _ in potongan]
+        db.session.execute(delete(RecommendationExplanation).where(RecommendationExplanation.id_student.in_(ids)))
+        if baris:
+            db.session.execute(insert(RecommendationExplanation), baris)
+        db.session.commit()
+        ditulis += len(baris)
+    from app.utils import profil  # profil mengimpor modul ini
+    profil.invalidate()
+    return ditulis
+
+
+# ---------- tampilan ----------
+
+def top_fitur(row, model_input, model_version, paket, n=3):
+    """
+    Fitur paling berpengaruh dari baris penjelasan tersimpan: list dict
+    {fitur, nilai, kontribusi, mendukung}. None jika belum ada atau sudah basi.
+    """
+    if row is None or row.model_version != model_version or row.paket != paket \
+            or row.input_key != input_key(model_input):
+        return None
+    nilai = json.loads(row.kontribusi)
+    urut = sorted(range(len(nilai)), key=lambda i: abs(nilai[i]), reverse=True)[:n]
+    return [{
+        'fitur': FITUR[i],
+        'nilai': model_input[i],
+        'kontribusi': nilai[i],
+        'mendukung': nilai[i] > 0,
+    } for i in urut if nilai[i] != 0]
+
+
+@rekom_cli.command('jelaskan')
+@click.option('--kelas', default=None, help='Batasi ke satu kelas.')
+@click.option('--batch-size', default=1000, show_default=True)
+def jelaskan_cmd(kelas, batch_size):
+    """Hitung ulang penjelasan prediksi (kontribusi fitur) seluruh siswa."""
+    t0 = time.perf_counter()
+    n = jalankan(kelas, batch_size)
+    dt = time.perf_counter() - t0
+    click.echo(f"{n} penjelasan disimpan dalam {dt:.2f} detik ({n / dt if dt else 0:.0f} siswa/detik).")
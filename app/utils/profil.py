@@ -0,0 +1,114 @@
+"""
+Profil lengkap siswa untuk halaman detail guru.
+
+Identitas, hasil RIASEC, nilai rapor, rekomendasi, dan penjelasan
+prediksinya (app/utils/penjelasan.py) diambil dengan satu
+query outer join lalu dibekukan menjadi DTO read-only `StudentProfile`.
+`get_profile` bisa sekaligus memuat profil siswa sebelum/sesudahnya di
+daftar guru (prefetch) dalam round-trip yang sama, sehingga klik
+"Berikutnya" saat konseling dilayani dari cache. Cache dibuang lewat
+signal `student_changed`.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app import db
+from app.models import User, Student, RiasecResult, ReportScore, Recommendation, RecommendationExplanation
+from app.utils import penjelasan, signals
+from app.utils.ttl_cache import TTLCache
+
+DIMENSI = ('R', 'I', 'A', 'S', 'E', 'C')
+MAPEL = (('Biologi', 'biologi'), ('Fisika', 'fisika'), ('Kimia', 'kimia'),
+         ('Matematika', 'matematika'), ('Ekonomi', 'ekonomi'), ('Sosiologi', 'sosiologi'))
+
+_cache = TTLCache('PROFILE_CACHE_TTL', 60)  # user_id -> StudentProfile
+
+
+@dataclass(frozen=True)
+class StudentProfile:
+    user_id: int
+    username: str
+    nama: Optional[str]
+    nisn: Optional[str]
+    kelas: Optional[str]
+    student_id: Optional[int]
+    top3: Optional[str]
+    skor: Optional[Tuple[Tuple[str, int], ...]]     # (dimensi, skor) urut RIASEC
+    rapor: Optional[Tuple[Tuple[str, object], ...]]  # (mapel, nilai)
+    paket: Optional[str]
+    probabilitas: Optional[float]
+    penjelasan: Optional[Tuple[dict, ...]]  # fitur paling berpengaruh, lihat penjelasan.top_fitur
+
+    @property
+    def riasec_done(self):
+        return self.skor is not None
+
+    @property
+    def rapor_done(self):
+        return self.rapor is not None
+
+    @property
+    def rekom_done(self):
+        return self.paket is not None
+
+
+def _penjelasan(res, rapor, rec, expl):
+    if not (res and rapor and rec):
+        return None
+    model_input = [int(getattr(res, f'skor_{d}') or 0) for d in DIMENSI] + \
+        [int(getattr(rapor, kolom) or 0) for _, kolom in MAPEL]
+    fitur = penjelasan.top_fitur(expl, model_input, rec.model_version, rec.paket_prediksi)
+    return tuple(fitur) if fitur else None
+
+
+def _to_profile(u, s, res, rapor, rec, expl):
+    return StudentProfile(
+        user_id=u.id, username=u.username, nama=u.nama, nisn=u.nisn, kelas=u.kelas,
+        student_id=s.id if s else None,
+        top3=res.top3 if res else None,
+        skor=tuple((d, getattr(res, f'skor_{d}')) for d in DIMENSI) if res else None,
+        rapor=tuple((label, getattr(rapor, kolom)) for label, kolom in MAPEL) if rapor else None,
+        paket=rec.paket_prediksi if rec else None,
+        probabilitas=rec.probabilitas if rec else None,
+        penjelasan=_penjelasan(res, rapor, rec, expl),
+    )
+
+
+def load_profiles(user_ids):
+    """Profil beberapa user sekaligus dalam satu query. Return dict user_id -> StudentProfile."""
+    rows = db.session.query(User, Student, RiasecResult, ReportScore, Recommendation, RecommendationExplanation)\
+        .outerjoin(Student, Student.id_user == User.id)\
+        .outerjoin(RiasecResult, RiasecResult.id_student == Student.id)\
+        .outerjoin(ReportScore, ReportScore.id_student == Student.id)\
+        .outerjoin(Recommendation, Recommendation.id_student == Student.id)\
+        .outerjoin(RecommendationExplanation, RecommendationExplanation.id_student == Student.id)\
+        .filter(User.id.in_(list(user_ids)))\
+        .order_by(Student.id.desc())\
+        .all()
+    # Jika satu user punya beberapa baris student, yang dipakai baris pertama (id terkecil)
+    return {row[0].id: _to_profile(*row) for row in rows}
+
+
+def get_profile(user_id, prefetch=()):
+    """
+    Profil satu user dari cache, atau dimuat bersama `prefetch` (mis. id siswa
+    sebelum/sesudahnya) yang belum ada di cache dalam satu query.
+    """
+    wanted = [uid for uid in (user_id, *prefetch) if uid is not None]
+    missing = [uid for uid in wanted if _cache.get(uid) is None]
+    if missing:
+        for uid, profile in load_profiles(missing).items():
+            _cache.set(uid, profile)
+    return _cache.get(user_id)
+
+
+def invalidate(user_id=None):
+    if user_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(user_id)
+
+
+@signals.student_changed.connect
+def _on_student_changed(sender, user_id=None, **kwargs):
+    invalidate(user_id)
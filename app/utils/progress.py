@@ -0,0 +1,106 @@
+"""
+Ringkasan progres siswa (tes RIASEC, nilai rapor, rekomendasi).
+
+Satu query mengambil data tampilan siswa sekaligus tiga flag langkah lewat
+subquery EXISTS berkorelasi. Hasilnya di-cache per user selama
+PROGRESS_CACHE_TTL detik dan dibuang setiap kali signal `student_changed`
+dikirim oleh jalur tulis langkah mana pun. Dipakai dashboard siswa.
+Halaman detail siswa guru tidak memakai modul ini: profilnya
+(app/utils/profil.py) sudah memuat hasil RIASEC, rapor, dan rekomendasi
+dalam satu join, dan flag langkah diturunkan dari sana (riasec_done,
+rapor_done, rekom_done) tanpa query tambahan.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import exists
+
+from app import db
+from app.models import User, Student, RiasecResult, ReportScore, Recommendation
+from app.utils import signals
+from app.utils.ttl_cache import TTLCache
+
+_cache = TTLCache('PROGRESS_CACHE_TTL', 30)  # user_id -> StudentProgress
+_student_user = {}  # student_id -> user_id, untuk invalidasi dari jalur tulis
+
+
+@dataclass(frozen=True)
+class StudentProgress:
+    user_id: int
+    student_id: Optional[int]
+    username: str
+    nama: Optional[str]
+    nisn: Optional[str]
+    kelas: Optional[str]
+    student_nama: Optional[str]
+    riasec_done: bool
+    rapor_done: bool
+    rekom_done: bool
+
+    @property
+    def display_name(self):
+        return self.student_nama or self.nama or self.username or 'Nama Siswa'
+
+    @property
+    def completed(self):
+        return sum([self.riasec_done, self.rapor_done, self.rekom_done])
+
+    @property
+    def percent(self):
+        return int((self.completed / 3) * 100)
+
+    @property
+    def status(self):
+        if self.percent == 100:
+            return "Selesai"
+        if self.percent == 0:
+            return "Belum mengerjakan"
+        return "Sedang mengerjakan"
+
+
+def _langkah(model):
+    return exists().where(model.id_student == Student.id)
+
+
+def _query(user_id):
+    return db.session.query(
+        User.id, Student.id, User.username, User.nama, User.nisn, User.kelas, Student.nama,
+        _langkah(RiasecResult), _langkah(ReportScore), _langkah(Recommendation)
+    ).outerjoin(Student, Student.id_user == User.id)\
+        .filter(User.id == user_id)\
+        .order_by(Student.id.asc())\
+        .first()
+
+
+def for_user(user_id):
+    """Progres seorang user (siswa), atau None jika user tidak ada."""
+    progress = _cache.get(user_id)
+    if progress is None:
+        row = _query(user_id)
+        if row is None:
+            return None
+        uid, sid, username, nama, nisn, kelas, s_nama, riasec, rapor, rekom = row
+        progress = StudentProgress(
+            user_id=uid, student_id=sid, username=username, nama=nama, nisn=nisn, kelas=kelas,
+            student_nama=s_nama, riasec_done=bool(riasec and sid), rapor_done=bool(rapor and sid),
+            rekom_done=bool(rekom and sid)
+        )
+        if sid is not None:
+            _student_user[sid] = uid
+        _cache.set(user_id, progress)
+    return progress
+
+
+def invalidate(student_id=None, user_id=None):
+    if student_id is None and user_id is None:
+        _cache.clear()
+        return
+    if user_id is None:
+        user_id = _student_user.get(student_id)
+    if user_id is not None:
+        _cache.pop(user_id)
+
+
+@signals.student_changed.connect
+def _on_student_changed(sender, student_id=None, user_id=None, **kwargs):
+    invalidate(student_id=student_id, user_id=user_id)
@@ -0,0 +1,158 @@
+"""
+Perhitungan rekomendasi paket di latar belakang.
+
+Begitu siswa punya hasil RIASEC dan nilai rapor (simpan rapor atau selesai
+tes), `jadwalkan` menjalankan prediksi di pool thread REKOM_WORKERS: muat
+model, prediksi, evaluasi shadow, simpan `recommendations` (termasuk
+probabilitas semua paket dan `input_key`), dan catat riwayat.
+
+Halaman hasil rekomendasi hanya membaca baris tersimpan. Baris dianggap
+masih berlaku (`segar`) jika `input_key` sama dengan input siswa saat ini dan
+`model_version` sama dengan versi yang melayani siswa; selain itu halaman
+menjadwalkan ulang dan menampilkan status "sedang diproses" sebentar.
+Dengan REKOM_ASYNC=0 perhitungan dijalankan langsung di request (mis. untuk
+debugging).
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+
+from app import db
+from app.models import RiasecResult, ReportScore, Recommendation
+from app.utils import live, model_registry, rekom_log, signals
+from app.utils.penjelasan import input_key
+
+DIMENSI = ('R', 'I', 'A', 'S', 'E', 'C')
+# Urutan fitur sesuai training model
+MAPEL = ('biologi', 'fisika', 'kimia', 'matematika', 'ekonomi', 'sosiologi')
+
+_executor = None
+_lock = threading.Lock()
+_berjalan = set()  # id_student yang sedang dihitung di proses ini
+_gagal = {}  # id_student -> pesan error terakhir
+
+
+class RekomendasiError(Exception):
+    """Rekomendasi tidak bisa dihitung (data belum lengkap atau model tidak ada)."""
+
+
+def model_input(hasil_riasec, rapor):
+    """12 nilai input model dari hasil RIASEC dan nilai rapor."""
+    return [int(getattr(hasil_riasec, f'skor_{d}') or 0) for d in DIMENSI] + \
+        [int(getattr(rapor, m) or 0) for m in MAPEL]
+
+
+def segar(rekom, model_input_siswa, nama_model):
+    """Baris rekomendasi tersimpan masih sesuai input dan model saat ini."""
+    return rekom is not None and rekom.model_version == nama_model \
+        and rekom.input_key == input_key(model_input_siswa)
+
+
+def proba_items(rekom):
+    """List (label, probabilitas) terurut menurun dari kolom `proba`."""
+    if not rekom or not rekom.proba:
+        return []
+    return sorted(json.loads(rekom.proba).items(), key=lambda x: x[1], reverse=True)
+
+
+def hitung(student_id, user=None):
+    """Prediksi dan simpan rekomendasi satu siswa (sinkron). Return Recommendation."""
+    hasil_riasec = RiasecResult.query.filter_by(id_student=student_id).first()
+    rapor = ReportScore.query.filter_by(id_student=student_id).first()
+    if not hasil_riasec or not rapor:
+        raise RekomendasiError("Hasil tes RIASEC dan nilai rapor belum lengkap.")
+    fitur = model_input(hasil_riasec, rapor)
+
+    served = model_registry.get_serving_model(student_id)
+    if served is None:
+        raise RekomendasiError("Model rekomendasi tidak ditemukan.")
+    t0 = time.perf_counter()
+    paket_label, paket_proba_items = served.predict(fitur)
+    latency_ms = (time.perf_counter() - t0) * 1000
+    # Versi shadow (jika ada) memprediksi input yang sama di thread terpisah
+    model_registry.submit_shadow(student_id, fitur, served, paket_label, latency_ms)
+    paket_confidence = next((p for l, p in paket_proba_items if l == paket_label), None)
+
+    values = dict(
+        paket_prediksi=paket_label,
+        probabilitas=paket_confidence,
+        model_version=served.nama,
+        input_key=input_key(fitur),
+        proba=json.dumps({l: round(float(p), 6) for l, p in paket_proba_items}) if paket_proba_items else None,
+        created_at=datetime.now(),
+    )
+    rekom = Recommendation.query.filter_by(id_student=student_id).first()
+    if rekom:
+        for key, value in values.items():
+            setattr(rekom, key, value)
+    else:
+        rekom = Recommendation(id_student=student_id, **values)
+        db.session.add(rekom)
+    db.session.commit()
+    signals.kirim_student_changed(student_id, user.id if user else None, 'rekomendasi')
+    if user is not None:
+        live.publish('rekomendasi', user, paket=paket_label, probabilitas=paket_confidence)
+    # Riwayat append-only, ditulis batch oleh thread latar
+    rekom_log.catat(student_id, served.nama, paket_label, paket_confidence, fitur, paket_proba_items)
+    return rekom
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        workers = current_app.config.get('REKOM_WORKERS', 2)
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rekomendasi')
+    return _executor
+
+
+def _jalankan(app, student_id, user):
+    try:
+        with app.app_context():
+            try:
+                hitung(student_id, user)
+            except Exception as e:
+                db.session.rollback()
+                _gagal[student_id] = str(e) if isinstance(e, RekomendasiError) else "Terjadi kesalahan sistem."
+                if not isinstance(e, RekomendasiError):
+                    app.logger.exception("Gagal menghitung rekomendasi siswa %s", student_id)
+    finally:
+        with _lock:
+            _berjalan.discard(student_id)
+
+
+def jadwalkan(student_id, user=None):
+    """
+    Mulai perhitungan rekomendasi siswa ini di latar belakang (sekali saja
+    jika sudah berjalan). `user` (snapshot current_user) untuk event pemantauan guru.
+    """
+    if not current_app.config.get('REKOM_ASYNC', True):
+        try:
+            hitung(student_id, user)
+        except RekomendasiError as e:
+            db.session.rollback()
+            _gagal[student_id] = str(e)
+        return
+    with _lock:
+        if student_id in _berjalan:
+            return
+        _berjalan.add(student_id)
+        _gagal.pop(student_id, None)
+        executor = _get_executor()
+    executor.submit(_jalankan, current_app._get_current_object(), student_id, user)
+
+
+def jadwalkan_jika_lengkap(student_id, user=None):
+    """Jadwalkan hanya jika hasil RIASEC dan nilai rapor sudah ada."""
+    lengkap = db.session.query(RiasecResult.id).filter_by(id_student=student_id).first() and \
+        db.session.query(ReportScore.id).filter_by(id_student=student_id).first()
+    if lengkap:
+        jadwalkan(student_id, user)
+
+
+def ambil_gagal(student_id):
+    """Pesan error perhitungan terakhir (sekali baca), atau None."""
+    return _gagal.pop(student_id, None)
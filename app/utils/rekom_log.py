@@ -0,0 +1,169 @@
+"""
+Penulis batch untuk tabel `recommendation_logs`.
+
+Request hanya memasukkan baris ke antrean di memori; satu thread latar
+menulis antrean ke database dengan satu INSERT multi-baris (executemany)
+setiap REKOM_LOG_BATCH_SIZE baris atau setiap REKOM_LOG_FLUSH_SECONDS detik,
+mana yang lebih dulu.
+
+Batch yang gagal ditulis tidak dibuang: gangguan database (OperationalError,
+mis. terkunci/koneksi putus) dicoba ulang dengan jeda bertambah
+REKOM_LOG_RETRIES kali lalu batch dikembalikan ke antrean untuk flush
+berikutnya; error data ditulis ulang per baris sehingga hanya baris yang
+memang tidak valid yang dilewati (dan dicatat di log).
+"""
+import atexit
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from app import db
+from app.models import RecommendationLog
+
+_queue = queue.Queue()
+_thread = None
+_thread_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_wake = threading.Event()
+_app = None
+
+
+def catat(student_id, model_version, paket_label, paket_confidence, model_input, paket_proba_items):
+    """Masukkan satu prediksi ke antrean log."""
+    _queue.put({
+        'id_student': student_id,
+        'model_version': model_version,
+        'paket_prediksi': paket_label,
+        'probabilitas': paket_confidence,
+        'fitur': json.dumps([float(v) for v in model_input]),
+        'proba': json.dumps({l: round(float(p), 6) for l, p in paket_proba_items}) if paket_proba_items else None,
+        'created_at': datetime.now()
+    })
+    _ensure_thread()
+    if _queue.qsize() >= current_app.config.get('REKOM_LOG_BATCH_SIZE', 200):
+        _wake.set()
+
+
+def _tulis(rows):
+    db.session.execute(insert(RecommendationLog), rows)
+    db.session.commit()
+
+
+def _kembalikan(rows, e):
+    db.session.rollback()
+    for row in rows:
+        _queue.put(row)
+    current_app.logger.error("Gagal menulis %d baris recommendation_logs, dikembalikan ke antrean: %s", len(rows), e)
+
+
+def _tulis_per_baris(rows):
+    """
+    Tulis baris satu per satu; baris yang ditolak database dilewati. Return
+    jumlah tertulis, atau None jika database gagal (sisa baris dikembalikan).
+    """
+    ditulis = 0
+    for i, row in enumerate(rows):
+        try:
+            _tulis([row])
+            ditulis += 1
+        except OperationalError as e:
+            _kembalikan(rows[i:], e)
+            return None
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error("Baris recommendation_logs dilewati (id_student=%s): %s", row.get('id_student'), e)
+    return ditulis
+
+
+def _tulis_batch(rows):
+    """
+    Tulis satu batch dengan retry. Return jumlah tertulis, atau None jika
+    database masih gagal (baris yang belum tertulis dikembalikan ke antrean).
+    """
+    percobaan = current_app.config.get('REKOM_LOG_RETRIES', 3)
+    for i in range(percobaan + 1):
+        try:
+            _tulis(rows)
+            return len(rows)
+        except OperationalError as e:
+            if i == percobaan:
+                _kembalikan(rows, e)
+                return None
+            db.session.rollback()
+            time.sleep(0.2 * 2 ** i)
+        except SQLAlchemyError:
+            # Error data: cari baris yang bermasalah
+            db.session.rollback()
+            return _tulis_per_baris(rows)
+
+
+def flush(max_rows=None):
+    """Tulis isi antrean ke database. Harus dipanggil di dalam app context."""
+    max_rows = max_rows or current_app.config.get('REKOM_LOG_BATCH_SIZE', 200)
+    total = 0
+    with _flush_lock:
+        while True:
+            rows = []
+            while len(rows) < max_rows:
+                try:
+                    rows.append(_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not rows:
+                break
+            ditulis = _tulis_batch(rows)
+            if ditulis is None:
+                break
+            total += ditulis
+    return total
+
+
+def _worker():
+    with _app.app_context():
+        interval = _app.config.get('REKOM_LOG_FLUSH_SECONDS', 2)
+        while True:
+            # Bangun saat batch penuh (lihat catat) atau setelah interval habis
+            _wake.wait(interval)
+            _wake.clear()
+            if not _queue.empty():
+                flush()
+                db.session.remove()
+
+
+def _ensure_thread():
+    global _thread, _app
+    if _thread is None:
+        with _thread_lock:
+            if _thread is None:
+                _app = current_app._get_current_object()
+                _thread = threading.Thread(target=_worker, name='rekom-log', daemon=True)
+                _thread.start()
+
+
+@atexit.register
+def _flush_on_exit():
+    if _app is not None and not _queue.empty():
+        with _app.app_context():
+            flush()
+
+
+rekom_cli = AppGroup('rekomendasi', help='Utilitas data rekomendasi.')
+
+
+@rekom_cli.command('riwayat')
+@click.argument('id_student', type=int)
+@click.option('--limit', default=20, show_default=True)
+def riwayat_cmd(id_student, limit):
+    """Tampilkan riwayat prediksi seorang siswa (terbaru dulu)."""
+    rows = RecommendationLog.query.filter_by(id_student=id_student)\
+        .order_by(RecommendationLog.created_at.desc()).limit(limit).all()
+    for r in rows:
+        click.echo(f"{r.created_at:%Y-%m-%d %H:%M:%S}  {r.model_version or '-':<20} {r.paket_prediksi}  p={r.probabilitas}  fitur={r.fitur}")
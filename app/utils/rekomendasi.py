@@ -6,31 +6,76 @@ _DIR = os.path.dirname(__file__)
 _XGB = os.path.join(_DIR, 'model_rekomendasi_xgb.pkl')
 _RF = os.path.join(_DIR, 'model_rekomendasi_rf.pkl')
 
-_artifact = None
+PAKET_LABELS = ["Paket 1", "Paket 2", "Paket 3"]
+
 _model = None
 _le = None
-if os.path.exists(_XGB):
-    _artifact = joblib.load(_XGB)
-elif os.path.exists(_RF):
-    _artifact = joblib.load(_RF)
-if isinstance(_artifact, dict) and 'model' in _artifact:
-    _model = _artifact.get('model')
-    _le = _artifact.get('label_encoder')
-else:
-    _model = _artifact
+
+
+def load_artifact(path):
+    """
+    Muat file .pkl model. Artefak XGB berupa dict {"model", "label_encoder", ...},
+    sedangkan artefak RF langsung berupa estimator.
+    Return tuple (model, label_encoder atau None).
+    """
+    artifact = joblib.load(path)
+    if isinstance(artifact, dict) and 'model' in artifact:
+        return artifact.get('model'), artifact.get('label_encoder')
+    return artifact, None
+
+
+def label_paket(y_pred, le):
+    """Petakan output mentah model ke label 'Paket N'."""
+    if le is not None:
+        return le.inverse_transform(y_pred)[0]
+    s = str(y_pred[0]).strip()
+    if s in PAKET_LABELS:
+        return s
+    if s in {"0", "1", "2"}:
+        return f"Paket {int(s)+1}"
+    return "Paket 1"
+
+
+def prediksi(model, le, model_input):
+    """
+    Jalankan prediksi untuk satu baris fitur.
+    Return (paket_label, paket_proba_items) dengan paket_proba_items berupa
+    list (label, probabilitas) terurut menurun; kosong jika model tidak
+    mendukung predict_proba.
+    """
+    X_input = np.array(model_input).reshape(1, -1)
+    paket_label = label_paket(model.predict(X_input), le)
+
+    paket_proba_items = []
+    if hasattr(model, 'predict_proba'):
+        try:
+            proba = model.predict_proba(X_input)[0]
+            classes = getattr(model, 'classes_', None)
+            if classes is not None and le is not None:
+                labels = [le.inverse_transform([c])[0] for c in classes]
+            elif classes is not None:
+                labels = [str(c) for c in classes]
+            else:
+                labels = list(PAKET_LABELS)
+            paket_proba_items = [(l, float(p)) for l, p in zip(labels, proba)]
+            paket_proba_items.sort(key=lambda x: x[1], reverse=True)
+        except Exception:
+            paket_proba_items = []
+    return paket_label, paket_proba_items
+
+
+def _ensure_loaded():
+    global _model, _le
+    if _model is None:
+        if os.path.exists(_XGB):
+            _model, _le = load_artifact(_XGB)
+        elif os.path.exists(_RF):
+            _model, _le = load_artifact(_RF)
+
 
 def prediksi_paket(X_input):
+    _ensure_loaded()
     X_input = np.array(X_input).reshape(1, -1)
-    y_pred = _model.predict(X_input)
-    if _le is not None:
-        y_label = _le.inverse_transform(y_pred)[0]
-    else:
-        s = str(y_pred[0]).strip()
-        if s in {"Paket 1", "Paket 2", "Paket 3"}:
-            y_label = s
-        elif s in {"0", "1", "2"}:
-            y_label = f"Paket {int(s)+1}"
-        else:
-            y_label = "Paket 1"
+    y_label = label_paket(_model.predict(X_input), _le)
     y_proba = _model.predict_proba(X_input) if hasattr(_model, 'predict_proba') else None
     return y_label, (y_proba[0] if y_proba is not None else None)
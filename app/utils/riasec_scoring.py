@@ -0,0 +1,221 @@
+"""
+Skoring RIASEC berbasis matriks.
+
+Jawaban dipivot menjadi matriks siswa x soal (0/1), lalu dikalikan dengan
+matriks one-hot soal x dimensi sehingga keenam skor dimensi seluruh siswa
+didapat dari satu perkalian matriks. Urutan top-3 deterministik: skor lebih
+tinggi dulu, skor sama diurutkan menurut urutan baku R, I, A, S, E, C
+(sama dengan perilaku sorted() lama atas dict berurutan RIASEC).
+
+Hasil tes mode adaptif (`riasec_results.adaptif`) menyimpan estimasi skor
+tes penuh dari soal yang ditanya saja; `rescore` menghitung ulang estimasi
+yang sama untuk siswa tersebut.
+"""
+import time
+
+import click
+import numpy as np
+from flask.cli import AppGroup
+from sqlalchemy import func, insert, update
+
+from app import db
+from app.models import RiasecAnswer, RiasecQuestion, RiasecResult, Student
+from app.utils import signals
+
+DIMENSI = ('R', 'I', 'A', 'S', 'E', 'C')
+_DIM_INDEX = {d: i for i, d in enumerate(DIMENSI)}
+
+
+def one_hot_dimensi(dimensi_soal):
+    """Matriks (jumlah soal x 6): baris i bernilai 1 di kolom dimensi soal ke-i."""
+    onehot = np.zeros((len(dimensi_soal), len(DIMENSI)), dtype=np.int32)
+    for i, d in enumerate(dimensi_soal):
+        j = _DIM_INDEX.get(d)
+        if j is not None:
+            onehot[i, j] = 1
+    return onehot
+
+
+def top3_codes(scores):
+    """Kode top-3 per baris matriks skor (n x 6)."""
+    scores = np.atleast_2d(scores)
+    # argsort stabil atas skor negatif: seri dipecah menurut urutan kolom RIASEC
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :3]
+    huruf = np.array(DIMENSI)
+    return [''.join(row) for row in huruf[order]]
+
+
+def estimasi_penuh(skor, terjawab, total):
+    """
+    Estimasi skor tes penuh: skor x total soal dimensi / soal terjawab,
+    dibulatkan ke atas pada .5 (0 jika belum ada soal terjawab). Menerima
+    angka atau array NumPy.
+    """
+    skor, terjawab, total = (np.asarray(x, dtype=np.float64) for x in (skor, terjawab, total))
+    hasil = np.floor(skor * total / np.maximum(terjawab, 1) + 0.5)
+    return np.where(terjawab > 0, hasil, 0).astype(np.int64)
+
+
+def skor_siswa(student_id):
+    """Skor enam dimensi dan kode top-3 satu siswa dengan satu query agregat."""
+    rows = db.session.query(RiasecQuestion.dimensi, func.sum(RiasecAnswer.skor))\
+        .join(RiasecAnswer, RiasecAnswer.id_question == RiasecQuestion.id)\
+        .filter(RiasecAnswer.id_student == student_id)\
+        .group_by(RiasecQuestion.dimensi).all()
+    skor = {d: 0 for d in DIMENSI}
+    for dimensi, total in rows:
+        if dimensi in skor:
+            skor[dimensi] = int(total or 0)
+    top3 = top3_codes([skor[d] for d in DIMENSI])[0]
+    return skor, top3
+
+
+def skor_kohort(student_ids=None, adaptif_ids=()):
+    """
+    Hitung skor seluruh siswa (atau subset student_ids) sekaligus. Siswa di
+    `adaptif_ids` diberi estimasi tes penuh dari soal yang mereka jawab.
+    Return (array id_student, matriks skor n x 6, list top3).
+    """
+    questions = db.session.query(RiasecQuestion.id, RiasecQuestion.dimensi).order_by(RiasecQuestion.id).all()
+    q_index = {qid: i for i, (qid, _) in enumerate(questions)}
+    onehot = one_hot_dimensi([d for _, d in questions])
+
+    query = db.session.query(RiasecAnswer.id_student, RiasecAnswer.id_question, RiasecAnswer.skor)
+    if student_ids is not None:
+        query = query.filter(RiasecAnswer.id_student.in_(list(student_ids)))
+    rows = query.all()
+    if not rows:
+        return np.array([], dtype=np.int64), np.zeros((0, len(DIMENSI)), dtype=np.int32), []
+
+    data = np.array([(s, q_index.get(q, -1), k or 0) for s, q, k in rows], dtype=np.int64)
+    data = data[data[:, 1] >= 0]  # abaikan jawaban untuk soal yang sudah dihapus
+    ids, s_index = np.unique(data[:, 0], return_inverse=True)
+
+    jawaban = np.zeros((len(ids), len(questions)), dtype=np.int32)
+    jawaban[s_index, data[:, 1]] = data[:, 2]
+    scores = jawaban @ onehot
+
+    adaptif = np.isin(ids, list(adaptif_ids))
+    if adaptif.any():
+        ditanya = np.zeros((len(ids), len(questions)), dtype=np.int32)
+        ditanya[s_index, data[:, 1]] = 1
+        terjawab = ditanya[adaptif] @ onehot
+        scores[adaptif] = estimasi_penuh(scores[adaptif], terjawab, onehot.sum(axis=0))
+    return ids, scores, top3_codes(scores)
+
+
+def _siswa_lengkap(student_ids):
+    """Subset student_ids yang sudah menjawab seluruh soal di bank soal."""
+    jumlah_soal = db.session.query(func.count(RiasecQuestion.id)).scalar()
+    if not jumlah_soal:
+        return set()
+    rows = db.session.query(RiasecAnswer.id_student)\
+        .join(RiasecQuestion, RiasecQuestion.id == RiasecAnswer.id_question)\
+        .filter(RiasecAnswer.id_student.in_(student_ids))\
+        .group_by(RiasecAnswer.id_student)\
+        .having(func.count(func.distinct(RiasecAnswer.id_question)) >= jumlah_soal)
+    return {sid for (sid,) in rows}
+
+
+def rescore(student_ids=None, batch_size=1000):
+    """
+    Hitung ulang dan tulis `riasec_results` secara massal: UPDATE per primary
+    key untuk baris yang sudah ada, INSERT hanya untuk siswa tanpa hasil yang
+    sudah menjawab seluruh soal (tes yang baru setengah jalan tidak dianggap
+    selesai). Return jumlah siswa yang ditulis.
+    """
+    adaptif_query = db.session.query(RiasecResult.id_student).filter(RiasecResult.adaptif.is_(True))
+    if student_ids is not None:
+        adaptif_query = adaptif_query.filter(RiasecResult.id_student.in_(list(student_ids)))
+    ids, scores, codes = skor_kohort(student_ids, {sid for (sid,) in adaptif_query})
+    if len(ids) == 0:
+        return 0
+
+    existing_query = db.session.query(RiasecResult.id_student, RiasecResult.id)
+    if student_ids is not None:
+        existing_query = existing_query.filter(RiasecResult.id_student.in_(ids.tolist()))
+    existing = dict(existing_query.all())
+    baru = [sid for sid in ids.tolist() if sid not in existing]
+    lengkap = _siswa_lengkap(baru) if baru else set()
+
+    updates, inserts = [], []
+    for sid, row, code in zip(ids.tolist(), scores.tolist(), codes):
+        values = {f'skor_{d}': row[i] for i, d in enumerate(DIMENSI)}
+        values['top3'] = code
+        if sid in existing:
+            values['id'] = existing[sid]
+            updates.append(values)
+        elif sid in lengkap:
+            values['id_student'] = sid
+            inserts.append(values)
+    if not updates and not inserts:
+        return 0
+
+    for start in range(0, len(updates), batch_size):
+        db.session.execute(update(RiasecResult), updates[start:start + batch_size])
+    for start in range(0, len(inserts), batch_size):
+        db.session.execute(insert(RiasecResult), inserts[start:start + batch_size])
+    db.session.commit()
+    signals.kirim_student_changed(step='riasec')
+    return len(updates) + len(inserts)
+
+
+riasec_cli = AppGroup('riasec', help='Utilitas tes RIASEC.')
+
+
+@riasec_cli.command('rescore')
+@click.option('--kelas', default=None, help='Batasi ke satu kelas.')
+def rescore_cmd(kelas):
+    """Hitung ulang riasec_results dari riasec_answers (mis. setelah bank soal berubah)."""
+    student_ids = None
+    if kelas:
+        student_ids = [sid for (sid,) in db.session.query(Student.id).filter(Student.kelas == kelas)]
+    t0 = time.perf_counter()
+    n = rescore(student_ids)
+    dt = time.perf_counter() - t0
+    click.echo(f"{n} siswa dihitung ulang dalam {dt:.2f} detik ({n / dt if dt else 0:.0f} siswa/detik).")
+
+
+@riasec_cli.command('replay')
+@click.option('--kelas', default=None, help='Batasi ke satu kelas.')
+@click.option('--per-halaman', default=7, show_default=True, help='Soal per halaman tes.')
+def replay_cmd(kelas, per_halaman):
+    """Putar ulang riasec_answers dengan mode adaptif: soal dan tulis database yang dihemat."""
+    from app.utils import tes_adaptif
+
+    soal = db.session.query(RiasecQuestion.id, RiasecQuestion.dimensi).order_by(RiasecQuestion.id).all()
+    query = db.session.query(RiasecAnswer.id_student, RiasecAnswer.id_question, RiasecAnswer.skor)
+    if kelas:
+        query = query.join(Student, Student.id == RiasecAnswer.id_student).filter(Student.kelas == kelas)
+    jawaban = {}
+    for sid, qid, skor in query:
+        jawaban.setdefault(sid, {})[qid] = 1 if skor else 0
+
+    # Hanya siswa yang menjawab seluruh soal yang bisa diputar ulang
+    ids_soal = {qid for qid, _ in soal}
+    lengkap = {sid: j for sid, j in jawaban.items() if ids_soal <= j.keys()}
+    if not lengkap:
+        click.echo('Belum ada siswa yang menjawab seluruh soal.')
+        return
+
+    onehot = one_hot_dimensi([d for _, d in soal])
+    total_halaman = (len(soal) + per_halaman - 1) // per_halaman
+    ditanya, halaman, beda = [], [], 0
+    for sid, j in lengkap.items():
+        n, h, kode = tes_adaptif.replay(soal, j, per_halaman)
+        penuh = top3_codes(np.array([j[qid] for qid, _ in soal]) @ onehot)[0]
+        beda += kode != penuh
+        ditanya.append(n)
+        halaman.append(h)
+
+    n_siswa = len(lengkap)
+    rata_soal = sum(ditanya) / n_siswa
+    rata_halaman = sum(halaman) / n_siswa
+    hemat_soal = len(soal) - rata_soal
+    click.echo(f"{n_siswa} siswa diputar ulang ({len(soal)} soal, {total_halaman} halaman per tes penuh).")
+    click.echo(f"Rata-rata soal ditanya {rata_soal:.1f} (min {min(ditanya)}, maks {max(ditanya)}); "
+               f"hemat {hemat_soal:.1f} soal/siswa ({hemat_soal / len(soal):.0%}).")
+    # Satu baris riasec_answers per soal dan satu commit per halaman
+    click.echo(f"Tulis database dihemat per siswa: {hemat_soal:.1f} baris riasec_answers, "
+               f"{total_halaman - rata_halaman:.1f} commit halaman.")
+    click.echo(f"Kode top-3 berbeda dari tes penuh: {beda} siswa.")
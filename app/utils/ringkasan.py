@@ -0,0 +1,187 @@
+"""
+Tabel ringkasan siswa (`student_summary`) untuk daftar, filter, dan ekspor.
+
+Satu baris per user siswa berisi identitas gabungan users/students (nilai di
+users diutamakan), kode top-3 dan skor RIASEC, status rapor, paket beserta
+waktunya. Dashboard admin/guru dan ekspor cukup membaca satu tabel ber-index
+ini tanpa join.
+
+Baris diperbarui otomatis lewat signal `student_changed` yang dikirim setiap
+jalur tulis; signal tanpa user_id (import, rescore) membangun ulang semuanya.
+`flask summary rebuild` membangun ulang dari tabel sumber kapan saja.
+"""
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, delete, exists, func, insert, or_, select
+
+from app import db
+from app.models import User, Student, RiasecResult, ReportScore, Recommendation, StudentSummary
+from app.utils import signals
+from app.utils.rekomendasi import PAKET_LABELS
+
+DIMENSI = ('R', 'I', 'A', 'S', 'E', 'C')
+BATCH_SIZE = 1000
+FILTER_KEYS = ('riasec', 'kelas', 'paket', 'nama')
+
+# Urutan daftar siswa di dashboard; id_user sebagai pemecah seri nama yang sama
+URUTAN = (StudentSummary.nama.asc(), StudentSummary.id_user.asc())
+
+
+def _source_query():
+    """Satu baris per user siswa; jika punya beberapa baris student, dipakai id terkecil."""
+    first_student = select(Student.id_user, func.min(Student.id).label('sid'))\
+        .group_by(Student.id_user).subquery()
+    return db.session.query(
+        User.id, User.username, User.nama, User.nisn, User.kelas,
+        Student.id, Student.nama, Student.nisn, Student.kelas,
+        RiasecResult.top3, *[getattr(RiasecResult, f'skor_{d}') for d in DIMENSI],
+        exists().where(ReportScore.id_student == Student.id),
+        Recommendation.paket_prediksi, Recommendation.probabilitas,
+        Recommendation.model_version, Recommendation.created_at
+    ).outerjoin(first_student, first_student.c.id_user == User.id)\
+        .outerjoin(Student, Student.id == first_student.c.sid)\
+        .outerjoin(RiasecResult, RiasecResult.id_student == Student.id)\
+        .outerjoin(Recommendation, Recommendation.id_student == Student.id)\
+        .filter(User.role == 'siswa')
+
+
+def _to_row(r, now):
+    (uid, username, u_nama, u_nisn, u_kelas, sid, s_nama, s_nisn, s_kelas,
+     top3, *rest) = r
+    skor, (has_rapor, paket, proba, versi, rekom_at) = rest[:6], rest[6:]
+    row = {
+        'id_user': uid,
+        'id_student': sid,
+        'username': username,
+        'nama': u_nama or s_nama or username,
+        'nisn': u_nisn or s_nisn,
+        'kelas': u_kelas or s_kelas,
+        'top3': top3,
+        'has_rapor': bool(has_rapor and sid),
+        'paket': paket,
+        'probabilitas': proba,
+        'model_version': versi,
+        'rekom_at': rekom_at,
+        'updated_at': now,
+    }
+    row.update({f'skor_{d}': v for d, v in zip(DIMENSI, skor)})
+    return row
+
+
+def _write(rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(StudentSummary), rows[start:start + BATCH_SIZE])
+
+
+def refresh(user_ids):
+    """Hitung ulang baris ringkasan beberapa user (baris user non-siswa/terhapus ikut dibuang)."""
+    user_ids = [int(u) for u in user_ids]
+    now = datetime.now()
+    rows = [_to_row(r, now) for r in _source_query().filter(User.id.in_(user_ids))]
+    db.session.execute(delete(StudentSummary).where(StudentSummary.id_user.in_(user_ids)))
+    _write(rows)
+    db.session.commit()
+    return len(rows)
+
+
+def rebuild():
+    """Bangun ulang seluruh tabel ringkasan dalam satu transaksi. Return jumlah baris."""
+    now = datetime.now()
+    rows = [_to_row(r, now) for r in _source_query()]
+    db.session.execute(delete(StudentSummary))
+    _write(rows)
+    db.session.commit()
+    return len(rows)
+
+
+def filters_from_args(args):
+    return {k: args.get(k, '') for k in FILTER_KEYS}
+
+
+def kelas_siswa():
+    """Kelas siswa seperti student_summary.kelas (users diutamakan, fallback students) untuk query sumber."""
+    return func.coalesce(func.nullif(User.kelas, ''), Student.kelas)
+
+
+def filter_kelas(kolom, kelas):
+    """
+    Predikat filter kelas dashboard: cocok dengan bagian nama kelas, tanpa beda
+    huruf besar/kecil ('XII' -> XII-1, XII-2). Dipakai juga oleh halaman yang
+    ditautkan dari dashboard (analitik, laporan kelas) supaya isinya sama.
+    """
+    return kolom.ilike(f"%{kelas}%")
+
+
+def apply_filters(query, filters):
+    """Filter daftar siswa dashboard (kode RIASEC, kelas, paket, nama) atas student_summary."""
+    if filters.get('riasec'):
+        query = query.filter(StudentSummary.top3.ilike(f"%{filters['riasec']}%"))
+    if filters.get('kelas'):
+        query = query.filter(filter_kelas(StudentSummary.kelas, filters['kelas']))
+    if filters.get('paket'):
+        query = query.filter(StudentSummary.paket == filters['paket'])
+    if filters.get('nama'):
+        query = query.filter(StudentSummary.nama.ilike(f"%{filters['nama']}%"))
+    return query
+
+
+def daftar(filters):
+    """Query daftar siswa terfilter dan terurut (satu tabel)."""
+    return apply_filters(StudentSummary.query, filters).order_by(*URUTAN)
+
+
+def statistik():
+    """(total siswa, sudah tes, distribusi paket [P1, P2, P3]) dari dua query agregat."""
+    total, sudah_tes = db.session.query(func.count(StudentSummary.id_user), func.count(StudentSummary.top3)).one()
+    dist = dict(db.session.query(StudentSummary.paket, func.count(StudentSummary.id_user))
+                .filter(StudentSummary.paket.isnot(None))
+                .group_by(StudentSummary.paket).all())
+    return total, sudah_tes, [dist.get(p, 0) for p in PAKET_LABELS]
+
+
+def tetangga(user_id, filters):
+    """
+    (id sebelum, id sesudah) user di daftar dengan filter yang sama: dua
+    query keyset (nama, id_user) < / > baris ini dengan LIMIT 1 lewat index
+    nama, bukan window atas seluruh daftar.
+    """
+    row = apply_filters(db.session.query(StudentSummary.nama, StudentSummary.id_user), filters)\
+        .filter(StudentSummary.id_user == user_id).first()
+    if row is None:
+        return None, None
+    nama, uid = row
+    sebelum = or_(StudentSummary.nama < nama, and_(StudentSummary.nama == nama, StudentSummary.id_user < uid))
+    sesudah = or_(StudentSummary.nama > nama, and_(StudentSummary.nama == nama, StudentSummary.id_user > uid))
+    base = apply_filters(db.session.query(StudentSummary.id_user), filters)
+    prev_id = base.filter(sebelum).order_by(StudentSummary.nama.desc(), StudentSummary.id_user.desc()).limit(1).scalar()
+    next_id = base.filter(sesudah).order_by(*URUTAN).limit(1).scalar()
+    return prev_id, next_id
+
+
+@signals.student_changed.connect
+def _on_student_changed(sender, user_id=None, **kwargs):
+    # Ringkasan bukan sumber data: jika gagal, request tetap jalan dan
+    # tabel bisa dibenahi dengan `flask summary rebuild`
+    try:
+        if user_id is not None:
+            refresh([user_id])
+        else:
+            rebuild()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning("Gagal memperbarui student_summary: %s", e)
+
+
+summary_cli = AppGroup('summary', help='Tabel ringkasan siswa (student_summary).')
+
+
+@summary_cli.command('rebuild')
+def rebuild_cmd():
+    """Bangun ulang student_summary dari users/students/riasec_results/recommendations."""
+    t0 = time.perf_counter()
+    n = rebuild()
+    click.echo(f"{n} baris ringkasan ditulis dalam {time.perf_counter() - t0:.2f} detik.")
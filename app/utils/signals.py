@@ -0,0 +1,24 @@
+"""
+Signal aplikasi (blinker, sama seperti flask.signals).
+
+`student_changed` dikirim setiap kali data milik seorang siswa ditulis: hasil
+RIASEC, nilai rapor, rekomendasi, atau pembuatan baris student. Modul cache
+berlangganan signal ini untuk membuang data yang sudah basi.
+
+    signals.student_changed.send(current_app._get_current_object(),
+                                 student_id=..., user_id=..., step='riasec')
+
+student_id=None berarti banyak siswa berubah sekaligus (mis. `flask riasec
+rescore`) sehingga penerima sebaiknya mengosongkan seluruh cache-nya.
+"""
+from blinker import Namespace
+from flask import current_app
+
+_signals = Namespace()
+
+student_changed = _signals.signal('student-changed')
+
+
+def kirim_student_changed(student_id=None, user_id=None, step=None):
+    student_changed.send(current_app._get_current_object(),
+                         student_id=student_id, user_id=user_id, step=step)
@@ -0,0 +1,199 @@
+"""
+Mode SQLite untuk sekolah yang menjalankan aplikasi di satu server.
+
+Aktif otomatis jika SQLALCHEMY_DATABASE_URI memakai sqlite (file) dan
+SQLITE_TUNED tidak dimatikan:
+
+- pragma per koneksi: journal_mode=WAL (pembaca tidak memblokir penulis),
+  synchronous=NORMAL (aman untuk WAL; hanya transaksi terakhir yang bisa
+  hilang saat listrik mati), busy_timeout, cache_size, mmap_size,
+  temp_store=MEMORY;
+- QueuePool berukuran SQLITE_POOL_SIZE supaya koneksi (dan cache halamannya)
+  dipakai ulang antar request;
+- `retry_on_locked`: view tulis yang idempoten diulang singkat dengan backoff
+  jika tetap kena "database is locked" setelah busy_timeout habis.
+
+`flask sqlite bench` membandingkan mode ini dengan pengaturan bawaan pada
+jalur simpan `tes_riasec` dengan banyak siswa bersamaan.
+"""
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from functools import wraps
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+from app import db
+
+
+def is_sqlite(app):
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def aktif(app):
+    return is_sqlite(app) and app.config.get('SQLITE_TUNED', True)
+
+
+def configure(app):
+    """Opsi engine (pool) untuk mode SQLite; dipanggil sebelum db.init_app."""
+    if not aktif(app):
+        return
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    options.setdefault('pool_size', app.config.get('SQLITE_POOL_SIZE', 8))
+    options.setdefault('max_overflow', app.config.get('SQLITE_POOL_SIZE', 8))
+    connect_args = options.setdefault('connect_args', {})
+    # Timeout pysqlite = busy handler; disamakan dengan pragma busy_timeout
+    connect_args.setdefault('timeout', app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000)
+
+
+def _pragmas(app):
+    return [
+        'PRAGMA journal_mode=WAL',
+        f"PRAGMA synchronous={app.config.get('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        f"PRAGMA busy_timeout={int(app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        # Nilai negatif = ukuran dalam KiB
+        f"PRAGMA cache_size=-{int(app.config.get('SQLITE_CACHE_KB', 20000))}",
+        f"PRAGMA mmap_size={int(app.config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+
+def init_app(app):
+    """Pasang pragma pada setiap koneksi baru; dipanggil setelah db.init_app."""
+    if not aktif(app):
+        return
+    pragmas = _pragmas(app)
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        event.listen(db.engine, 'connect', on_connect)
+    app.extensions['sqlite_mode'] = True
+
+
+def _is_locked(error):
+    pesan = str(getattr(error, 'orig', error)).lower()
+    return 'database is locked' in pesan or 'database is busy' in pesan
+
+
+def retry_on_locked(view):
+    """
+    Ulangi view (hanya untuk view yang aman diulang, mis. upsert jawaban) jika
+    SQLite masih terkunci penulis lain. Hanya aktif di mode SQLite.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_app.extensions.get('sqlite_mode'):
+            return view(*args, **kwargs)
+        retries = current_app.config.get('SQLITE_WRITE_RETRIES', 3)
+        for attempt in range(retries + 1):
+            try:
+                return view(*args, **kwargs)
+            except OperationalError as e:
+                if attempt == retries or not _is_locked(e):
+                    raise
+                db.session.rollback()
+                jeda = current_app.config.get('SQLITE_RETRY_BACKOFF', 0.05) * (2 ** attempt)
+                time.sleep(jeda * (0.5 + random.random()))
+    return wrapper
+
+
+# ---------------------------------------------------------------------------
+# CLI: flask sqlite bench
+# ---------------------------------------------------------------------------
+sqlite_cli = AppGroup('sqlite', help='Mode SQLite satu server.')
+
+BENCH_SOAL = 42
+BENCH_PER_HALAMAN = 7
+
+
+def _siapkan(path, tuned, jumlah_siswa):
+    """App baru dengan database SQLite kosong di `path` berisi soal & siswa contoh."""
+    from app import create_app
+    from app.models import User, RiasecQuestion
+    from app.utils import passwords
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'SQLITE_TUNED': tuned,
+        # Hash murah: yang diukur jalur simpan jawaban, bukan login
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1',
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([RiasecQuestion(pertanyaan=f'Soal {i}', dimensi='RIASEC'[i % 6])
+                            for i in range(BENCH_SOAL)])
+        pw = passwords.hash_password('pw')
+        db.session.add_all([User(username=f'bench{i}', password=pw, role='siswa', nama=f'Bench {i}',
+                                 nisn=f'9{i:08d}', kelas='BENCH') for i in range(jumlah_siswa)])
+        db.session.commit()
+        qids = [q.id for q in RiasecQuestion.query.order_by(RiasecQuestion.id)]
+    return app, qids
+
+
+def _jalankan(app, qids, jumlah_siswa, putaran):
+    """Setiap siswa (satu thread) mengisi seluruh halaman tes `putaran` kali."""
+    halaman = [qids[i:i + BENCH_PER_HALAMAN] for i in range(0, len(qids), BENCH_PER_HALAMAN)]
+    latensi, gagal, lock = [], [0], threading.Lock()
+
+    def siswa(i):
+        c = app.test_client()
+        c.post('/login', data={'username': f'bench{i}', 'password': 'pw'})
+        for _ in range(putaran):
+            for page, ids in enumerate(halaman, start=1):
+                data = {'page': str(page), 'nav': 'next', 'pertanyaan_ids': [str(q) for q in ids]}
+                data.update({f'jawaban_{q}': random.choice(('YA', 'TIDAK')) for q in ids})
+                t0 = time.perf_counter()
+                r = c.post('/tes_riasec', data=data)
+                dt = time.perf_counter() - t0
+                with lock:
+                    if r.status_code >= 500:
+                        gagal[0] += 1
+                    else:
+                        latensi.append(dt)
+
+    threads = [threading.Thread(target=siswa, args=(i,)) for i in range(jumlah_siswa)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0, latensi, gagal[0]
+
+
+@sqlite_cli.command('bench')
+@click.option('--siswa', 'jumlah_siswa', default=30, show_default=True, help='Siswa yang mengisi tes bersamaan.')
+@click.option('--putaran', default=2, show_default=True, help='Berapa kali tiap siswa mengisi seluruh tes.')
+def bench_cmd(jumlah_siswa, putaran):
+    """Bandingkan simpan jawaban tes_riasec: SQLite bawaan vs mode SQLite (WAL + pragma)."""
+    tmpdir = tempfile.mkdtemp(prefix='sqlite-bench-')
+    try:
+        for label, tuned in (('bawaan', False), ('mode SQLite', True)):
+            app, qids = _siapkan(os.path.join(tmpdir, f'{int(tuned)}.db'), tuned, jumlah_siswa)
+            app.logger.disabled = True
+            dt, latensi, gagal = _jalankan(app, qids, jumlah_siswa, putaran)
+            with app.app_context():
+                db.engine.dispose()
+            ok = len(latensi)
+            p95 = sorted(latensi)[int(len(latensi) * 0.95) - 1] if latensi else 0
+            click.echo(f"{label:<12} {ok} simpan sukses, {gagal} gagal (locked) dalam {dt:.2f} detik | "
+                       f"{ok / dt:.1f} simpan/detik | p50 {statistics.median(latensi or [0]) * 1000:.0f} ms, "
+                       f"p95 {p95 * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
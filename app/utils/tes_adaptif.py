@@ -0,0 +1,137 @@
+"""
+Mode tes RIASEC adaptif (opsional, RIASEC_ADAPTIF=1).
+
+Tes biasa selalu menampilkan seluruh soal. Padahal yang dipakai hanya kode
+top-3, dan kode itu sering sudah pasti sebelum soal habis. Mode adaptif:
+
+- menghitung skor berjalan per dimensi dan sisa soal per dimensi;
+- berhenti jika kode top-3 sudah pasti secara matematis: untuk SETIAP
+  kemungkinan jawaban soal sisa, urutan huruf 1 > 2 > 3 tetap dan tidak ada
+  dimensi lain yang bisa menyalip huruf ke-3 (termasuk aturan seri R, I, A,
+  S, E, C yang dipakai `riasec_scoring.top3_codes`);
+- memilih soal halaman berikutnya hanya dari dimensi yang masih
+  diperebutkan (pasangan yang belum pasti), bergiliran antar dimensi supaya
+  setiap jawaban memberi informasi paling banyak.
+
+Skor yang disimpan adalah estimasi skor tes penuh (skor x total soal
+dimensi / soal terjawab), supaya input model rekomendasi tetap sebanding
+dengan siswa yang mengerjakan tes penuh. Estimasi itu selalu berada dalam
+rentang skor yang mungkin, jadi kode top-3-nya sama dengan kode yang pasti.
+Hasil ditandai `riasec_results.adaptif` supaya `flask riasec rescore`
+menghitung ulang estimasi itu dari jawaban yang tersimpan.
+
+`flask riasec replay` memutar ulang `riasec_answers` siswa yang sudah
+mengerjakan tes penuh dan melaporkan rata-rata soal dan tulis database yang
+dihemat.
+"""
+from collections import defaultdict
+
+from app.utils.riasec_scoring import DIMENSI, estimasi_penuh, top3_codes
+
+_DIM_INDEX = {d: i for i, d in enumerate(DIMENSI)}
+
+
+def _selalu_di_atas(skor, sisa, a, b):
+    """Dimensi a tetap di atas b apa pun jawaban soal sisa."""
+    terendah_a, tertinggi_b = skor[a], skor[b] + sisa[b]
+    # Seri dipecah menurut urutan RIASEC (indeks lebih kecil menang)
+    return terendah_a > tertinggi_b or (terendah_a == tertinggi_b and a < b)
+
+
+def status(skor, sisa):
+    """
+    Kode top-3 saat ini dan pasangan dimensi (indeks) yang urutannya belum
+    pasti. `skor` dan `sisa` berurutan DIMENSI. Tes selesai jika list
+    pasangan kosong.
+    """
+    kode = top3_codes(skor)[0]
+    i1, i2, i3 = (_DIM_INDEX[h] for h in kode)
+    pasangan = [(i1, i2), (i2, i3)] + [(i3, x) for x in range(len(DIMENSI)) if x not in (i1, i2, i3)]
+    terbuka = [(a, b) for a, b in pasangan if not _selalu_di_atas(skor, sisa, a, b)]
+    return kode, terbuka
+
+
+class SesiAdaptif:
+    """
+    Skor berjalan satu siswa. `soal` = list (id, dimensi) seluruh bank soal,
+    berurutan id.
+    """
+
+    def __init__(self, soal):
+        self.antrian = defaultdict(list)  # indeks dimensi -> id soal yang belum ditanya
+        for qid, dimensi in soal:
+            if dimensi in _DIM_INDEX:
+                self.antrian[_DIM_INDEX[dimensi]].append(qid)
+        self.total = [len(self.antrian[i]) for i in range(len(DIMENSI))]
+        self.dimensi_soal = {qid: _DIM_INDEX[d] for qid, d in soal if d in _DIM_INDEX}
+        self.skor = [0] * len(DIMENSI)
+        self.dijawab = [0] * len(DIMENSI)
+        self.ditanya = []
+
+    @property
+    def sisa(self):
+        return [len(self.antrian[i]) for i in range(len(DIMENSI))]
+
+    def jawab(self, qid, nilai):
+        i = self.dimensi_soal.get(qid)
+        if i is None or qid not in self.antrian[i]:
+            return
+        self.antrian[i].remove(qid)
+        self.skor[i] += 1 if nilai else 0
+        self.dijawab[i] += 1
+        self.ditanya.append(qid)
+
+    def status(self):
+        return status(self.skor, self.sisa)
+
+    def selesai(self):
+        return not self.status()[1]
+
+    def halaman_berikutnya(self, jumlah):
+        """
+        Maksimal `jumlah` id soal berikutnya. Dimensi dengan pasangan terbuka
+        terbanyak didahulukan (seri: sisa soal terbanyak, lalu urutan RIASEC),
+        lalu diambil bergiliran satu soal per dimensi.
+        """
+        _, terbuka = self.status()
+        bobot = defaultdict(int)
+        for a, b in terbuka:
+            bobot[a] += 1
+            bobot[b] += 1
+        sisa = self.sisa
+        urutan = sorted((i for i in bobot if sisa[i]), key=lambda i: (-bobot[i], -sisa[i], i))
+        posisi = {i: 0 for i in urutan}
+        pilihan = []
+        while len(pilihan) < jumlah and urutan:
+            for i in list(urutan):
+                if len(pilihan) >= jumlah:
+                    break
+                if posisi[i] >= len(self.antrian[i]):
+                    urutan.remove(i)
+                    continue
+                pilihan.append(self.antrian[i][posisi[i]])
+                posisi[i] += 1
+        return pilihan
+
+    def skor_estimasi(self):
+        """Estimasi skor tes penuh per dimensi (dict huruf -> int)."""
+        # Rumus yang sama dipakai `flask riasec rescore`; hasil tetap di antara skor dan skor + sisa
+        estimasi = estimasi_penuh(self.skor, self.dijawab, self.total)
+        return {d: int(estimasi[i]) for i, d in enumerate(DIMENSI)}
+
+
+def replay(soal, jawaban, per_halaman):
+    """
+    Putar ulang satu siswa. `jawaban` = dict id soal -> 0/1 untuk seluruh
+    bank soal. Return (soal ditanya, halaman, kode adaptif).
+    """
+    sesi = SesiAdaptif(soal)
+    halaman = 0
+    while not sesi.selesai():
+        ids = sesi.halaman_berikutnya(per_halaman)
+        if not ids:
+            break
+        halaman += 1
+        for qid in ids:
+            sesi.jawab(qid, jawaban[qid])
+    return len(sesi.ditanya), halaman, sesi.status()[0]
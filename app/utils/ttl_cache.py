@@ -0,0 +1,60 @@
+"""
+Cache kecil di memori proses dengan masa berlaku (TTL).
+
+Dipakai modul cache identitas, progres siswa, dan sejenisnya. TTL dibaca dari
+konfigurasi aplikasi saat entri disimpan. Karena cache bersifat per proses,
+perubahan dari worker lain baru terlihat setelah TTL habis; penulisan di
+proses yang sama menghapus entri lewat pop()/clear().
+"""
+import threading
+import time
+
+from flask import current_app
+
+
+class TTLCache:
+    def __init__(self, config_key, default_ttl, maxsize=10000):
+        self.config_key = config_key
+        self.default_ttl = default_ttl
+        self.maxsize = maxsize
+        self._data = {}  # key -> (kedaluwarsa, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return default
+
+    def set(self, key, value):
+        now = time.monotonic()
+        ttl = current_app.config.get(self.config_key, self.default_ttl)
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                for k in [k for k, (exp, _) in self._data.items() if exp <= now]:
+                    del self._data[k]
+                if len(self._data) >= self.maxsize:
+                    self._data.clear()
+            self._data[key] = (now + ttl, value)
+        return value
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, (None, None))[1]
+
+    def pop_if(self, predikat):
+        """Hapus semua entri yang kuncinya memenuhi predikat(key)."""
+        with self._lock:
+            for key in [k for k in self._data if predikat(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._data)
@@ -9,3 +9,93 @@ class Config:
     # Gunakan DATABASE_URL dari .env jika ada, fallback ke default Laragon (root tanpa password)
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'mysql+pymysql://root@localhost/db_rekomendasi')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Registry versi model (lihat app/utils/model_registry.py).
+    # Kosongkan MODEL_REGISTRY_DIR untuk memakai instance/models.
+    MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR')
+    MODEL_REGISTRY_TTL = int(os.environ.get('MODEL_REGISTRY_TTL', 30))
+    MODEL_SHADOW_WORKERS = int(os.environ.get('MODEL_SHADOW_WORKERS', 1))
+    MODEL_SHADOW_MAX_PENDING = int(os.environ.get('MODEL_SHADOW_MAX_PENDING', 100))
+
+    # Log rekomendasi append-only ditulis per batch
+    REKOM_LOG_BATCH_SIZE = int(os.environ.get('REKOM_LOG_BATCH_SIZE', 200))
+    REKOM_LOG_FLUSH_SECONDS = float(os.environ.get('REKOM_LOG_FLUSH_SECONDS', 2))
+    # Percobaan ulang batch log yang gagal karena gangguan database sebelum dikembalikan ke antrean
+    REKOM_LOG_RETRIES = int(os.environ.get('REKOM_LOG_RETRIES', 3))
+
+    # Katalog Jelajah Karir (default app/data/career_catalog.json)
+    CAREER_CATALOG_PATH = os.environ.get('CAREER_CATALOG_PATH')
+    CAREER_CATALOG_CHECK_SECONDS = int(os.environ.get('CAREER_CATALOG_CHECK_SECONDS', 10))
+
+    # Laporan PDF server-side (cache default instance/report_cache)
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR')
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', 2))
+
+    # Perintah Tailwind CLI untuk `flask assets build` (default: `tailwindcss` dari pytailwindcss)
+    TAILWIND_BIN = os.environ.get('TAILWIND_BIN')
+
+    # Kompresi respons teks (brotli dipakai jika paket `brotli` terpasang)
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+
+    # Lama snapshot identitas user (load_user) di-cache per proses, dalam detik
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 60))
+
+    # Cache progres siswa (dashboard siswa & detail guru), dalam detik
+    PROGRESS_CACHE_TTL = int(os.environ.get('PROGRESS_CACHE_TTL', 30))
+
+    # Cache profil siswa di halaman detail guru (termasuk prefetch sebelum/sesudah), dalam detik
+    PROFILE_CACHE_TTL = int(os.environ.get('PROFILE_CACHE_TTL', 60))
+
+    # Cache analitik kelas guru (/guru/analytics), dalam detik
+    ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', 300))
+
+    # Import data siswa per potongan (lihat app/utils/impor.py); default folder instance/imports
+    IMPORT_UPLOAD_DIR = os.environ.get('IMPORT_UPLOAD_DIR')
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 500))
+    # Job 'berjalan' tanpa kemajuan selama ini (detik) dianggap mati dan boleh dilanjutkan
+    IMPORT_STALE_SECONDS = int(os.environ.get('IMPORT_STALE_SECONDS', 300))
+
+    # Hash password (lihat `flask password tune`); hash lama di-upgrade saat login berhasil
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # Pool verifikasi login: kosongkan PASSWORD_WORKERS untuk jumlah core
+    PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', 0)) or None
+    PASSWORD_MAX_PENDING = int(os.environ.get('PASSWORD_MAX_PENDING', 64))
+    PASSWORD_TIMEOUT = float(os.environ.get('PASSWORD_TIMEOUT', 10))
+    PASSWORD_RETRY_AFTER = int(os.environ.get('PASSWORD_RETRY_AFTER', 5))
+    # Pool hash reset password massal per kelas (kosong = separuh jumlah core)
+    PASSWORD_BULK_WORKERS = int(os.environ.get('PASSWORD_BULK_WORKERS', 0)) or None
+
+    # Mode SQLite satu server (aktif jika DATABASE_URL sqlite; lihat app/utils/sqlite_mode.py)
+    SQLITE_TUNED = os.environ.get('SQLITE_TUNED', '1') not in ('0', 'false', 'False')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_CACHE_KB = int(os.environ.get('SQLITE_CACHE_KB', 20000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 8))
+    SQLITE_WRITE_RETRIES = int(os.environ.get('SQLITE_WRITE_RETRIES', 3))
+
+    # Rekomendasi dihitung di thread latar begitu RIASEC + rapor lengkap (REKOM_ASYNC=0: langsung di request)
+    REKOM_ASYNC = os.environ.get('REKOM_ASYNC', '1') not in ('0', 'false', 'False')
+    REKOM_WORKERS = int(os.environ.get('REKOM_WORKERS', 2))
+
+    # Tes RIASEC adaptif: berhenti begitu kode top-3 pasti (lihat app/utils/tes_adaptif.py)
+    RIASEC_ADAPTIF = os.environ.get('RIASEC_ADAPTIF', '0') in ('1', 'true', 'True')
+
+    # Indeks siswa serupa di detail siswa guru (per proses, lihat app/utils/mirip.py)
+    SIMILAR_K = int(os.environ.get('SIMILAR_K', 5))
+    SIMILAR_INDEX_TTL = int(os.environ.get('SIMILAR_INDEX_TTL', 300))
+
+    # Kohort: tahun ajaran siswa baru (kosong = dihitung dari tanggal, mulai Juli) dan arsip kohort lulus
+    TAHUN_AJARAN_AKTIF = os.environ.get('TAHUN_AJARAN_AKTIF')
+    ARSIP_DATABASE_URI = os.environ.get('ARSIP_DATABASE_URI')  # default: instance/arsip.sqlite3
+    ARSIP_BATCH_SIZE = int(os.environ.get('ARSIP_BATCH_SIZE', 500))
+
+    # Pemantauan tes langsung guru (/guru/live, server-sent events)
+    # Setiap stream menahan satu thread: kosongkan LIVE_MAX_STREAMS untuk separuh WEB_THREADS
+    # (samakan WEB_THREADS dengan --threads gunicorn)
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 64))
+    LIVE_MAX_STREAMS = int(os.environ.get('LIVE_MAX_STREAMS', 0)) or None
+    LIVE_HEARTBEAT_SECONDS = int(os.environ.get('LIVE_HEARTBEAT_SECONDS', 15))
+    LIVE_BACKLOG = int(os.environ.get('LIVE_BACKLOG', 200))
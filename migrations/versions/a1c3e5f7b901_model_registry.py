@@ -0,0 +1,52 @@
+"""model registry
+
+Revision ID: a1c3e5f7b901
+Revises: 4cb5136a66ad
+Create Date: 2026-01-12 09:20:11.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b901'
+down_revision = '4cb5136a66ad'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('model_versions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nama', sa.String(length=50), nullable=False),
+    sa.Column('algoritma', sa.String(length=20), nullable=True),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('traffic_pct', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nama')
+    )
+    op.create_table('shadow_evaluations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('id_student', sa.Integer(), nullable=True),
+    sa.Column('versi_serving', sa.String(length=50), nullable=False),
+    sa.Column('versi_shadow', sa.String(length=50), nullable=False),
+    sa.Column('paket_serving', sa.String(length=50), nullable=False),
+    sa.Column('paket_shadow', sa.String(length=50), nullable=False),
+    sa.Column('setuju', sa.Boolean(), nullable=False),
+    sa.Column('latency_serving_ms', sa.Float(), nullable=True),
+    sa.Column('latency_shadow_ms', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_student'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_shadow_evaluations_created_at'), 'shadow_evaluations', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_shadow_evaluations_created_at'), table_name='shadow_evaluations')
+    op.drop_table('shadow_evaluations')
+    op.drop_table('model_versions')
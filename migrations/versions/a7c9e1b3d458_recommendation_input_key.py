@@ -0,0 +1,32 @@
+"""recommendation input key
+
+Revision ID: a7c9e1b3d458
+Revises: f6b8d0a2c347
+Create Date: 2026-02-04 13:20:51.730214
+
+Rekomendasi dihitung di latar belakang (app/utils/rekom_latar.py); halaman
+hasil membaca baris tersimpan selama `input_key` dan `model_version` masih
+sama dengan input dan model saat ini. Baris lama (input_key kosong) dihitung
+ulang saat siswa membuka halaman hasil.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c9e1b3d458'
+down_revision = 'f6b8d0a2c347'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recommendations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('input_key', sa.String(length=16), nullable=True))
+        batch_op.add_column(sa.Column('proba', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('recommendations', schema=None) as batch_op:
+        batch_op.drop_column('proba')
+        batch_op.drop_column('input_key')
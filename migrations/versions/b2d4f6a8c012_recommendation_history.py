@@ -0,0 +1,49 @@
+"""recommendation history
+
+Revision ID: b2d4f6a8c012
+Revises: a1c3e5f7b901
+Create Date: 2026-01-19 14:02:37.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d4f6a8c012'
+down_revision = 'a1c3e5f7b901'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recommendations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('model_version', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_recommendations_id_student'), ['id_student'], unique=False)
+
+    op.create_table('recommendation_logs',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('id_student', sa.Integer(), nullable=False),
+    sa.Column('model_version', sa.String(length=50), nullable=True),
+    sa.Column('paket_prediksi', sa.String(length=50), nullable=False),
+    sa.Column('probabilitas', sa.Float(), nullable=True),
+    sa.Column('fitur', sa.Text(), nullable=False),
+    sa.Column('proba', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_student'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recommendation_logs_created_at'), 'recommendation_logs', ['created_at'], unique=False)
+    op.create_index('ix_recommendation_logs_student_time', 'recommendation_logs', ['id_student', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_recommendation_logs_student_time', table_name='recommendation_logs')
+    op.drop_index(op.f('ix_recommendation_logs_created_at'), table_name='recommendation_logs')
+    op.drop_table('recommendation_logs')
+
+    with op.batch_alter_table('recommendations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recommendations_id_student'))
+        batch_op.drop_column('created_at')
+        batch_op.drop_column('model_version')
@@ -0,0 +1,42 @@
+"""student tahun ajaran
+
+Revision ID: b8d0f2c4e569
+Revises: a7c9e1b3d458
+Create Date: 2026-02-06 10:02:44.918305
+
+Baris students yang sudah ada diisi tahun ajaran saat migrasi dijalankan.
+Tandai angkatan lama dengan `flask arsip tandai <tahun> --kelas ...` sebelum
+memindahkannya ke arsip.
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d0f2c4e569'
+down_revision = 'a7c9e1b3d458'
+branch_labels = None
+depends_on = None
+
+
+def _tahun_ajaran(hari):
+    tahun = hari.year if hari.month >= 7 else hari.year - 1
+    return f'{tahun}/{tahun + 1}'
+
+
+def upgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tahun_ajaran', sa.String(length=9), nullable=True))
+    op.execute(sa.text("UPDATE students SET tahun_ajaran = :tahun WHERE tahun_ajaran IS NULL")
+               .bindparams(tahun=_tahun_ajaran(date.today())))
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.alter_column('tahun_ajaran', existing_type=sa.String(length=9), nullable=False)
+        batch_op.create_index(batch_op.f('ix_students_tahun_ajaran'), ['tahun_ajaran'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_students_tahun_ajaran'))
+        batch_op.drop_column('tahun_ajaran')
@@ -0,0 +1,59 @@
+"""student summary
+
+Revision ID: c3e5a7b9d014
+Revises: b2d4f6a8c012
+Create Date: 2026-01-26 09:41:12.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5a7b9d014'
+down_revision = 'b2d4f6a8c012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('student_summary',
+    sa.Column('id_user', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('id_student', sa.Integer(), nullable=True),
+    sa.Column('username', sa.String(length=100), nullable=False),
+    sa.Column('nama', sa.String(length=150), nullable=False),
+    sa.Column('nisn', sa.String(length=20), nullable=True),
+    sa.Column('kelas', sa.String(length=50), nullable=True),
+    sa.Column('top3', sa.String(length=3), nullable=True),
+    sa.Column('skor_R', sa.Integer(), nullable=True),
+    sa.Column('skor_I', sa.Integer(), nullable=True),
+    sa.Column('skor_A', sa.Integer(), nullable=True),
+    sa.Column('skor_S', sa.Integer(), nullable=True),
+    sa.Column('skor_E', sa.Integer(), nullable=True),
+    sa.Column('skor_C', sa.Integer(), nullable=True),
+    sa.Column('has_rapor', sa.Boolean(), nullable=False),
+    sa.Column('paket', sa.String(length=50), nullable=True),
+    sa.Column('probabilitas', sa.Float(), nullable=True),
+    sa.Column('model_version', sa.String(length=50), nullable=True),
+    sa.Column('rekom_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_user'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_user')
+    )
+    op.create_index(op.f('ix_student_summary_id_student'), 'student_summary', ['id_student'], unique=False)
+    op.create_index(op.f('ix_student_summary_nama'), 'student_summary', ['nama'], unique=False)
+    op.create_index(op.f('ix_student_summary_nisn'), 'student_summary', ['nisn'], unique=False)
+    op.create_index(op.f('ix_student_summary_top3'), 'student_summary', ['top3'], unique=False)
+    op.create_index(op.f('ix_student_summary_paket'), 'student_summary', ['paket'], unique=False)
+    op.create_index('ix_student_summary_kelas_nama', 'student_summary', ['kelas', 'nama'], unique=False)
+    # Isi tabel setelah upgrade: flask summary rebuild
+
+
+def downgrade():
+    op.drop_index('ix_student_summary_kelas_nama', table_name='student_summary')
+    op.drop_index(op.f('ix_student_summary_paket'), table_name='student_summary')
+    op.drop_index(op.f('ix_student_summary_top3'), table_name='student_summary')
+    op.drop_index(op.f('ix_student_summary_nisn'), table_name='student_summary')
+    op.drop_index(op.f('ix_student_summary_nama'), table_name='student_summary')
+    op.drop_index(op.f('ix_student_summary_id_student'), table_name='student_summary')
+    op.drop_table('student_summary')
@@ -0,0 +1,30 @@
+"""riasec result adaptif
+
+Revision ID: c9e1f3a5b670
+Revises: b8d0f2c4e569
+Create Date: 2026-02-07 09:14:05.281377
+
+Hasil tes mode adaptif menyimpan estimasi skor tes penuh, sedangkan
+riasec_answers hanya berisi soal yang ditanya. `flask riasec rescore` memakai
+kolom ini untuk menghitung ulang estimasi yang sama, bukan skor mentah.
+Hasil lama dianggap tes penuh.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e1f3a5b670'
+down_revision = 'b8d0f2c4e569'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('riasec_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('adaptif', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    with op.batch_alter_table('riasec_results', schema=None) as batch_op:
+        batch_op.drop_column('adaptif')
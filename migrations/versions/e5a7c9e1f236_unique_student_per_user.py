@@ -0,0 +1,89 @@
+"""unique student per user
+
+Revision ID: e5a7c9e1f236
+Revises: d4f6a8c0e125
+Create Date: 2026-01-30 08:55:03.612907
+
+Sebelum constraint unik dipasang:
+- baris students ganda untuk user yang sama digabung ke baris dengan id
+  terkecil. Data anak (jawaban, hasil, rapor, rekomendasi, log) dipindah ke
+  baris itu; jika baris itu sudah punya datanya sendiri, data dari baris
+  ganda dibuang (aplikasi memang selalu membaca baris id terkecil);
+- user siswa yang belum punya baris students dibuatkan.
+
+Jalankan `flask summary rebuild` setelah upgrade.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9e1f236'
+down_revision = 'd4f6a8c0e125'
+branch_labels = None
+depends_on = None
+
+# Tabel anak: (nama tabel, kolom pembeda jika satu siswa boleh punya banyak baris)
+CHILD_TABLES = [
+    ('riasec_answers', 'id_question'),
+    ('riasec_results', None),
+    ('report_scores', None),
+    ('recommendations', None),
+    ('recommendation_logs', 'id'),
+    ('shadow_evaluations', 'id'),
+]
+
+
+def _gabung_duplikat(conn):
+    dupes = conn.execute(sa.text(
+        "SELECT s.id, k.keep_id FROM students s "
+        "JOIN (SELECT id_user, MIN(id) AS keep_id FROM students GROUP BY id_user HAVING COUNT(*) > 1) k "
+        "ON k.id_user = s.id_user WHERE s.id <> k.keep_id"
+    )).fetchall()
+    for dup_id, keep_id in dupes:
+        for table, kunci in CHILD_TABLES:
+            params = {'dup': dup_id, 'keep': keep_id}
+            if kunci == 'id':
+                # Riwayat append-only: semuanya dipindah
+                conn.execute(sa.text(f"UPDATE {table} SET id_student = :keep WHERE id_student = :dup"), params)
+            elif kunci:
+                punya = {r[0] for r in conn.execute(
+                    sa.text(f"SELECT {kunci} FROM {table} WHERE id_student = :keep"), params)}
+                for row_id, nilai in conn.execute(
+                        sa.text(f"SELECT id, {kunci} FROM {table} WHERE id_student = :dup"), params).fetchall():
+                    if nilai in punya:
+                        conn.execute(sa.text(f"DELETE FROM {table} WHERE id = :id"), {'id': row_id})
+                    else:
+                        conn.execute(sa.text(f"UPDATE {table} SET id_student = :keep WHERE id = :id"),
+                                     {'keep': keep_id, 'id': row_id})
+                        punya.add(nilai)
+            else:
+                ada = conn.execute(sa.text(f"SELECT 1 FROM {table} WHERE id_student = :keep"), params).first()
+                if ada:
+                    conn.execute(sa.text(f"DELETE FROM {table} WHERE id_student = :dup"), params)
+                else:
+                    conn.execute(sa.text(f"UPDATE {table} SET id_student = :keep WHERE id_student = :dup"), params)
+        conn.execute(sa.text("DELETE FROM students WHERE id = :dup"), {'dup': dup_id})
+
+
+def upgrade():
+    conn = op.get_bind()
+    _gabung_duplikat(conn)
+    # Kolom identitas di users tidak ada di semua database lama
+    kolom = {c['name'] for c in sa.inspect(conn).get_columns('users')}
+    nisn = 'u.nisn' if 'nisn' in kolom else 'NULL'
+    nama = 'COALESCE(u.nama, u.username)' if 'nama' in kolom else 'u.username'
+    kelas = 'u.kelas' if 'kelas' in kolom else 'NULL'
+    conn.execute(sa.text(
+        "INSERT INTO students (id_user, nisn, nama, kelas) "
+        f"SELECT u.id, {nisn}, {nama}, {kelas} FROM users u "
+        "WHERE u.role = 'siswa' AND NOT EXISTS (SELECT 1 FROM students s WHERE s.id_user = u.id)"
+    ))
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_students_id_user', ['id_user'])
+
+
+def downgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_students_id_user', type_='unique')
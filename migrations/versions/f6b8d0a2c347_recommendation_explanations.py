@@ -0,0 +1,35 @@
+"""recommendation explanations
+
+Revision ID: f6b8d0a2c347
+Revises: e5a7c9e1f236
+Create Date: 2026-02-02 09:41:18.204716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b8d0a2c347'
+down_revision = 'e5a7c9e1f236'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recommendation_explanations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('id_student', sa.Integer(), nullable=False),
+    sa.Column('model_version', sa.String(length=50), nullable=False),
+    sa.Column('input_key', sa.String(length=16), nullable=False),
+    sa.Column('paket', sa.String(length=50), nullable=False),
+    sa.Column('kontribusi', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_student'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id_student')
+    )
+
+
+def downgrade():
+    op.drop_table('recommendation_explanations')
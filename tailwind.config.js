@@ -0,0 +1,8 @@
+/** Konfigurasi build CSS (`flask assets build`). Kelas yang tidak dipakai di template dibuang. */
+module.exports = {
+  content: ["./app/templates/**/*.html"],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};